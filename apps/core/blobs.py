@@ -0,0 +1,155 @@
+"""
+Content-addressed storage of product images.
+
+Uploads are hashed while they are streamed to a temporary file, then moved
+to `blobs/<aa>/<bb>/<sha256><ext>`. Files already on disk are moved instead,
+and are not hashed again when they carry their verified `sha256`.
+
+Identical uploads therefore share one file, tracked by a `MediaBlob` row
+counting the products using it. When the last product lets go of a blob,
+the file and its image variants are deleted once the transaction commits.
+
+A blob reused by an upload that is still in flight has a fresh modification
+time, so blobs touched within `MEDIA_BLOB_GRACE` seconds are left to the
+`collect_blobs` command instead.
+"""
+import hashlib
+import os
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.utils.deconstruct import deconstructible
+
+from apps.core import images
+
+BLOB_PREFIX = 'blobs/'
+CHUNK_SIZE = 64 * 1024
+
+
+def blob_name(digest, extension):
+    return f'{BLOB_PREFIX}{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+
+def is_blob(name):
+    return name.startswith(BLOB_PREFIX)
+
+
+@deconstructible
+class BlobStorage(FileSystemStorage):
+    """File system storage keeping every distinct content once."""
+
+    def get_available_name(self, name, max_length=None):
+        # The name is derived from the content in _save().
+        return name
+
+    def _save(self, name, content):
+        extension = os.path.splitext(name)[1].lower()
+        temp_dir = self.path(f'{BLOB_PREFIX}tmp')
+        os.makedirs(temp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        if hasattr(content, 'temporary_file_path'):
+            # Already on disk, hash it and move it instead of copying.
+            temp_path = content.temporary_file_path()
+            if getattr(content, 'sha256', None) is None:
+                for chunk in content.chunks(CHUNK_SIZE):
+                    digest.update(chunk)
+            owned = False
+        else:
+            fd, temp_path = tempfile.mkstemp(dir=temp_dir)
+            try:
+                with os.fdopen(fd, 'wb') as temp_file:
+                    for chunk in content.chunks(CHUNK_SIZE):
+                        digest.update(chunk)
+                        temp_file.write(chunk)
+            except BaseException:
+                os.remove(temp_path)
+                raise
+            owned = True
+
+        name = blob_name(getattr(content, 'sha256', None) or
+                         digest.hexdigest(), extension)
+        path = self.path(name)
+        if os.path.exists(path):
+            # Mark the blob as in use for collect().
+            os.utime(path)
+            if owned:
+                os.remove(temp_path)
+            return name
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if owned:
+            os.replace(temp_path, path)
+        else:
+            file_move_safe(temp_path, path, allow_overwrite=True)
+        if self.file_permissions_mode is not None:
+            os.chmod(path, self.file_permissions_mode)
+        return name
+
+
+blob_storage = BlobStorage()
+
+
+def retain(name):
+    """Count a new reference to the blob `name`."""
+    from apps.core.models import MediaBlob
+
+    if not is_blob(name):
+        return
+    MediaBlob.objects.bulk_create(
+        [MediaBlob(name=name, size=blob_storage.size(name))],
+        ignore_conflicts=True,
+    )
+    MediaBlob.objects.filter(name=name).update(
+        references=F('references') + 1
+    )
+
+
+def release(name):
+    """Drop a reference to the image `name`, deleting unused files once
+    the transaction commits."""
+    from apps.core.models import MediaBlob
+
+    if not is_blob(name):
+        # Files stored before blobs are kept, their variants are not shared.
+        transaction.on_commit(lambda: images.delete_variants(name))
+        return
+    MediaBlob.objects.filter(name=name, references__gt=0).update(
+        references=F('references') - 1
+    )
+    transaction.on_commit(lambda: collect(name))
+
+
+def recently_used(name):
+    try:
+        modified = os.path.getmtime(blob_storage.path(name))
+    except FileNotFoundError:
+        return False
+    return time.time() - modified < settings.MEDIA_BLOB_GRACE
+
+
+def collect(name):
+    """Delete the blob `name` and its variants if no product uses it."""
+    from apps.core.models import MediaBlob
+
+    if recently_used(name):
+        return False
+    deleted, _ = MediaBlob.objects.filter(name=name, references=0).delete()
+    if deleted:
+        blob_storage.delete(name)
+        images.delete_variants(name)
+    return bool(deleted)
+
+
+def iter_blob_files():
+    """Yield the names of the blob files on disk."""
+    root = blob_storage.path(BLOB_PREFIX)
+    for directory, _, files in os.walk(root):
+        relative = os.path.relpath(directory, blob_storage.location)
+        if os.path.basename(directory) == 'tmp':
+            continue
+        for file_name in files:
+            yield os.path.join(relative, file_name).replace(os.sep, '/')
@@ -0,0 +1,3 @@
+"""
+PostgreSQL backend checking connections out of an in-process pool.
+"""
@@ -0,0 +1,68 @@
+"""
+PostgreSQL database backend using pooled connections.
+
+Select it with `'ENGINE': 'apps.core.db.postgresql_pool'` and configure the
+pool with the `POOL` entry of the database settings, e.g.:
+
+    'POOL': {'SIZE': 5, 'MAX_OVERFLOW': 10, 'TIMEOUT': 10, 'MAX_IDLE': 300}
+
+Closing the connection returns it to the pool, and every request returns
+its connection when it finishes, so `CONN_MAX_AGE` is not used.
+"""
+import os
+import time
+
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+from django.utils.asyncio import async_unsafe
+
+from .creation import DatabaseCreation
+from .pool import get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+    pool = None
+
+    def get_pool_key(self, conn_params):
+        return (self.alias, conn_params.get('dbname'),
+                conn_params.get('host'), conn_params.get('port'),
+                conn_params.get('user'))
+
+    def get_pool(self, conn_params):
+        options = self.settings_dict.get('POOL', {})
+        return get_pool(
+            self.get_pool_key(conn_params),
+            **{name.lower(): value for name, value in options.items()},
+        )
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        pool = self.get_pool(conn_params)
+        connection = pool.acquire(
+            lambda: super(DatabaseWrapper, self).get_new_connection(
+                conn_params
+            )
+        )
+        self.pool = pool
+        # Set by the parent for new connections only.
+        self.isolation_level = IsolationLevel(self.settings_dict[
+            'OPTIONS'
+        ].get('isolation_level', IsolationLevel.READ_COMMITTED))
+        return connection
+
+    @async_unsafe
+    def connect(self):
+        super().connect()
+        # Give the connection back when the current request finishes.
+        self.close_at = time.monotonic()
+
+    def _close(self):
+        pool, self.pool = self.pool, None
+        if pool is None:
+            return super()._close()
+        if pool.pid != os.getpid():
+            # Inherited from the parent process, which still uses it.
+            return
+        with self.wrap_database_errors:
+            pool.release(self.connection, discard=self.in_atomic_block)
@@ -0,0 +1,199 @@
+"""
+Thread-safe pool of database connections.
+
+Connections are opened by the `connect` callable given at checkout. The
+pool keeps up to `size` connections open and opens up to `max_overflow`
+more under load, closing them again once returned. Callers wait up to
+`timeout` seconds for a connection when all are in use. Connections idle for
+longer than `max_idle` seconds are closed, and those idle for longer than
+`ping_after` seconds are checked before being handed out.
+
+Pools belong to the process that created them: a forked child starts with
+pools of its own and never touches the sockets it inherited.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+import psycopg2
+
+
+class PoolTimeout(psycopg2.OperationalError):
+    """No connection became available within the checkout timeout."""
+
+
+class ConnectionPool:
+    """Pool of connections to one database."""
+
+    def __init__(self, size=5, max_overflow=10, timeout=10,
+                 max_idle=300, ping_after=30):
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.ping_after = ping_after
+        self.pid = os.getpid()
+        self.idle = deque()
+        self.opened = 0
+        self.in_use = 0
+        self.waiting = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.checkout_time = 0.0
+        self.max_checkout_time = 0.0
+        self.condition = threading.Condition()
+
+    def acquire(self, connect):
+        """Check out an idle connection or open a new one."""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        with self.condition:
+            stale = self.evict_idle()
+            while True:
+                if self.idle:
+                    conn, released_at = self.idle.pop()
+                    break
+                if self.opened < self.size + self.max_overflow:
+                    self.opened += 1
+                    conn = released_at = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(
+                        f'No connection available within {self.timeout}s '
+                        f'({self.in_use} in use).'
+                    )
+                self.waiting += 1
+                try:
+                    self.condition.wait(remaining)
+                finally:
+                    self.waiting -= 1
+            self.in_use += 1
+        close_quietly(stale)
+
+        if conn is not None and not self.is_usable(conn, released_at):
+            close_quietly([conn])
+            conn = None
+        if conn is None:
+            try:
+                conn = connect()
+            except BaseException:
+                with self.condition:
+                    self.opened -= 1
+                    self.in_use -= 1
+                    self.condition.notify()
+                raise
+
+        elapsed = time.monotonic() - start
+        with self.condition:
+            self.checkouts += 1
+            self.checkout_time += elapsed
+            self.max_checkout_time = max(self.max_checkout_time, elapsed)
+        return conn
+
+    def release(self, conn, discard=False):
+        """Return a connection, closing it if broken or over the size."""
+        if not discard and not conn.closed:
+            try:
+                if (conn.get_transaction_status() !=
+                        psycopg2.extensions.TRANSACTION_STATUS_IDLE):
+                    conn.rollback()
+            except psycopg2.Error:
+                discard = True
+        discard = discard or bool(conn.closed)
+        with self.condition:
+            self.in_use -= 1
+            if discard or self.opened > self.size:
+                self.opened -= 1
+            else:
+                self.idle.append((conn, time.monotonic()))
+                conn = None
+            self.condition.notify()
+        if conn is not None:
+            close_quietly([conn])
+
+    def is_usable(self, conn, released_at):
+        if conn.closed:
+            return False
+        if time.monotonic() - released_at < self.ping_after:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            if not conn.autocommit:
+                conn.rollback()
+        except psycopg2.Error:
+            return False
+        return True
+
+    def evict_idle(self):
+        """Remove connections idle for too long, the oldest come first."""
+        stale = []
+        cutoff = time.monotonic() - self.max_idle
+        while self.idle and self.idle[0][1] < cutoff:
+            stale.append(self.idle.popleft()[0])
+            self.opened -= 1
+        return stale
+
+    def close(self):
+        """Close every idle connection."""
+        with self.condition:
+            stale = [conn for conn, released_at in self.idle]
+            self.opened -= len(stale)
+            self.idle.clear()
+        close_quietly(stale)
+
+    def stats(self):
+        with self.condition:
+            return {
+                'size': self.size,
+                'max_overflow': self.max_overflow,
+                'open': self.opened,
+                'idle': len(self.idle),
+                'in_use': self.in_use,
+                'waiting': self.waiting,
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'checkout_ms_avg': round(
+                    self.checkout_time / self.checkouts * 1000
+                    if self.checkouts else 0.0, 3
+                ),
+                'checkout_ms_max': round(self.max_checkout_time * 1000, 3),
+            }
+
+
+def close_quietly(conns):
+    for conn in conns:
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+def get_pool(key, **options):
+    """Return the pool of this process for `key`, creating it if needed."""
+    with pools_lock:
+        pool = pools.get(key)
+        if pool is None or pool.pid != os.getpid():
+            pool = pools[key] = ConnectionPool(**options)
+        return pool
+
+
+def current_pools():
+    """Return the pools created by this process, by key."""
+    with pools_lock:
+        return {key: pool for key, pool in pools.items()
+                if pool.pid == os.getpid()}
+
+
+def close_pools(database=None):
+    """Close the idle connections of all pools, or those of a database."""
+    for key, pool in current_pools().items():
+        if database is None or key[1] == database:
+            pool.close()
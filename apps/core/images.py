@@ -0,0 +1,198 @@
+"""
+Resized variants of product images.
+
+Every uploaded image gets a square thumbnail and a medium size, each saved
+as WebP and JPEG without the EXIF metadata of the upload. The variants are
+written next to the original under `images/variants/` and recorded with the
+dimensions of the original on the product.
+
+Processing runs after the upload is committed, in a small thread pool so
+the request returns at once. With `IMAGE_PROCESSING_EAGER` it runs before
+the request returns instead, which tests rely on.
+"""
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from apps.core import versions
+
+logger = logging.getLogger(__name__)
+
+# Name: (size, whether to crop to exactly that size).
+VARIANTS = {
+    'thumbnail': ((256, 256), True),
+    'medium': ((1024, 1024), False),
+}
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+# EXIF orientations rotating the image by 90 or 270 degrees.
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+executor = None
+executor_lock = threading.Lock()
+
+
+def variant_path(name, variant, extension):
+    """Return the storage path of a variant of the image `name`."""
+    return f'images/variants/{os.path.basename(name)}/{variant}.{extension}'
+
+
+def variant_paths(name):
+    return [variant_path(name, variant, extension)
+            for variant in VARIANTS for extension in FORMATS]
+
+
+def delete_variants(name):
+    """Delete the variant files of the image `name`."""
+    for path in variant_paths(name):
+        default_storage.delete(path)
+
+
+def replace_file(path, content):
+    """Write the content at the storage path, atomically replacing a file
+    there, so products processing one image concurrently record the same
+    paths."""
+    full_path = default_storage.path(path)
+    directory = os.path.dirname(full_path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            temp_file.write(content)
+        os.chmod(temp_path, default_storage.file_permissions_mode or 0o644)
+        os.replace(temp_path, full_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    return path
+
+
+def load_image(file):
+    """Open an image upright and return it with its upright size."""
+    image = Image.open(file)
+    width, height = image.size
+    if image.getexif().get(0x0112) in TRANSPOSED_ORIENTATIONS:
+        width, height = height, width
+    # Let the JPEG decoder scale down while reading the pixels.
+    image.draft('RGB', max(size for size, crop in VARIANTS.values()))
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert(
+            'RGBA' if 'transparency' in image.info or 'A' in image.mode
+            else 'RGB'
+        )
+    return image, (width, height)
+
+
+def resize(image, size, crop):
+    if crop:
+        return ImageOps.fit(image, size, Image.LANCZOS)
+    image = image.copy()
+    image.thumbnail(size, Image.LANCZOS)
+    return image
+
+
+def encode(image, image_format, options):
+    """Encode the image, flattening transparency for JPEG."""
+    if image_format == 'JPEG' and image.mode == 'RGBA':
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+    buffer = BytesIO()
+    # No `exif` is passed, so the metadata of the upload is dropped.
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def create_variants(name):
+    """Write the variants of the image `name` and return their paths with
+    the size of the original."""
+    from apps.core.models import Product
+
+    storage = Product._meta.get_field('image').storage
+    with storage.open(name) as file:
+        image, size = load_image(file)
+        variants = {}
+        for variant, (variant_size, crop) in VARIANTS.items():
+            resized = resize(image, variant_size, crop)
+            for extension, (image_format, options) in FORMATS.items():
+                variants.setdefault(variant, {})[extension] = replace_file(
+                    variant_path(name, variant, extension),
+                    encode(resized, image_format, options),
+                )
+    return variants, size
+
+
+def process_image(product_id, name):
+    """Create the variants of the product image `name`, unless the product
+    has moved on to another image."""
+    from apps.core.models import Product
+
+    product = Product.objects.filter(pk=product_id, image=name).values(
+        'user_id'
+    ).first()
+    if product is None:
+        return
+    # Products sharing the stored image share its variants.
+    processed = Product.objects.filter(
+        image=name, image_variants__isnull=False
+    ).values('image_width', 'image_height', 'image_variants').first()
+    created = processed is None
+    if created:
+        try:
+            variants, (width, height) = create_variants(name)
+        except (OSError, Image.DecompressionBombError):
+            logger.exception('Could not process image %s', name)
+            return
+        processed = {'image_width': width, 'image_height': height,
+                     'image_variants': variants}
+    updated = Product.objects.filter(pk=product_id, image=name).update(
+        **processed
+    )
+    if updated:
+        versions.bump(product['user_id'], 'product')
+    elif created and not Product.objects.filter(image=name).exists():
+        # The product moved on while the variants were written, and no
+        # other product shares them.
+        delete_variants(name)
+
+
+def run_in_background(product_id, name):
+    try:
+        process_image(product_id, name)
+    except Exception:
+        logger.exception('Could not process image %s', name)
+    finally:
+        close_old_connections()
+
+
+def get_executor():
+    global executor
+    with executor_lock:
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_PROCESSING_WORKERS,
+                thread_name_prefix='images',
+            )
+        return executor
+
+
+def schedule(product_id, name):
+    """Process the image once the current transaction commits."""
+    def submit():
+        if settings.IMAGE_PROCESSING_EAGER:
+            process_image(product_id, name)
+        else:
+            get_executor().submit(run_in_background, product_id, name)
+
+    transaction.on_commit(submit)
@@ -0,0 +1,79 @@
+"""
+Ingredient dictionary built from the products' INCI lists.
+
+`Product.ingredients` stays the text the user entered. Its comma separated
+names are normalized, stored once in the shared `Ingredient` table and
+linked to the product, so ingredient filters become index lookups instead
+of text scans.
+"""
+from django.db.models import Exists, OuterRef
+
+from .models import Ingredient, ProductIngredient
+
+
+def normalize_ingredient(name):
+    """Return the normalized form of an ingredient name."""
+    return ' '.join(name.split()).lower()[:255]
+
+
+def parse_ingredients(text):
+    """Return the normalized ingredient names of a comma separated list,
+    without duplicates and in listing order."""
+    names = dict.fromkeys(normalize_ingredient(part)
+                          for part in text.split(','))
+    names.pop('', None)
+    return list(names)
+
+
+def intern_ingredients(names):
+    """Return a name to id mapping, creating the missing ingredients."""
+    names = set(names)
+    if not names:
+        return {}
+    mapping = dict(Ingredient.objects.filter(name__in=names)
+                   .values_list('name', 'id'))
+    missing = names - mapping.keys()
+    if missing:
+        Ingredient.objects.bulk_create(
+            [Ingredient(name=name) for name in missing],
+            ignore_conflicts=True,
+        )
+        mapping.update(Ingredient.objects.filter(name__in=missing)
+                       .values_list('name', 'id'))
+    return mapping
+
+
+def sync_ingredients(products):
+    """Replace the ingredient links of the products with their lists."""
+    parsed = {product.id: parse_ingredients(product.ingredients)
+              for product in products}
+    if not parsed:
+        return
+    ingredient_ids = intern_ingredients(
+        name for names in parsed.values() for name in names
+    )
+    ProductIngredient.objects.filter(product_id__in=parsed).delete()
+    ProductIngredient.objects.bulk_create([
+        ProductIngredient(product_id=product_id,
+                          ingredient_id=ingredient_ids[name],
+                          position=position)
+        for product_id, names in parsed.items()
+        for position, name in enumerate(names)
+    ])
+
+
+def filter_by_ingredients(queryset, contains=(), excludes=()):
+    """Filter products listing every ingredient of `contains` and none of
+    `excludes`."""
+    for name in contains:
+        queryset = queryset.filter(Exists(ProductIngredient.objects.filter(
+            product=OuterRef('pk'),
+            ingredient__name=normalize_ingredient(name),
+        )))
+    excludes = [normalize_ingredient(name) for name in excludes]
+    if excludes:
+        queryset = queryset.filter(~Exists(ProductIngredient.objects.filter(
+            product=OuterRef('pk'),
+            ingredient__name__in=excludes,
+        )))
+    return queryset
@@ -0,0 +1,37 @@
+"""
+Django command linking existing products to the ingredient dictionary.
+"""
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.core.ingredients import sync_ingredients
+from apps.core.models import Product
+
+
+class Command(BaseCommand):
+    """Parse the ingredients of every product in batches."""
+    help = 'Link existing products to the ingredient dictionary.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        products = (Product.objects.exclude(ingredients='')
+                    .only('id', 'ingredients')
+                    .order_by('id')
+                    .iterator(chunk_size=batch_size))
+        total = 0
+        while True:
+            batch = list(islice(products, batch_size))
+            if not batch:
+                break
+            with transaction.atomic():
+                sync_ingredients(batch)
+            total += len(batch)
+            self.stdout.write(f'Linked {total} products.')
+        self.stdout.write(self.style.SUCCESS(
+            f'Done, {total} products linked.'
+        ))
@@ -0,0 +1,41 @@
+"""
+Django command deleting expired resumable uploads.
+"""
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.core.blobs import blob_storage
+from apps.core.models import UploadSession
+
+
+class Command(BaseCommand):
+    """Delete expired upload sessions and part files without a session."""
+    help = 'Delete expired resumable uploads.'
+
+    def handle(self, *args, **options):
+        expired = UploadSession.objects.filter(expires_at__lte=timezone.now())
+        deleted, _ = expired.delete()
+
+        directory = blob_storage.path('uploads')
+        sessions = {str(pk) for pk in
+                    UploadSession.objects.values_list('pk', flat=True)}
+        cutoff = time.time() - settings.UPLOAD_SESSION_TTL
+        removed = 0
+        if os.path.isdir(directory):
+            for entry in os.scandir(directory):
+                session_id = entry.name.removesuffix('.part')
+                # Parts of expired sessions were last written before the
+                # cutoff, parts of sessions being created after it.
+                if (session_id not in sessions and
+                        entry.stat().st_mtime < cutoff):
+                    os.remove(entry.path)
+                    removed += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Done, {deleted} expired sessions deleted, '
+            f'{removed} part files removed.'
+        ))
@@ -0,0 +1,48 @@
+"""
+Django command deleting image blobs no product uses.
+"""
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.core import blobs, images
+from apps.core.models import MediaBlob
+
+
+class Command(BaseCommand):
+    """Delete unreferenced blobs, orphaned files and stale uploads."""
+    help = 'Delete image blobs no product uses.'
+
+    def handle(self, *args, **options):
+        storage = blobs.blob_storage
+        collected = freed = 0
+        unused = MediaBlob.objects.filter(references=0).values_list(
+            'name', 'size'
+        )
+        for name, size in unused.iterator():
+            if blobs.collect(name):
+                collected += 1
+                freed += size
+
+        # Files of uploads whose transaction rolled back have no row.
+        known = set(MediaBlob.objects.values_list('name', flat=True))
+        for name in blobs.iter_blob_files():
+            if name not in known and not blobs.recently_used(name):
+                freed += storage.size(name)
+                storage.delete(name)
+                images.delete_variants(name)
+                collected += 1
+
+        temp_dir = storage.path(f'{blobs.BLOB_PREFIX}tmp')
+        cutoff = time.time() - settings.MEDIA_BLOB_GRACE
+        if os.path.isdir(temp_dir):
+            for entry in os.scandir(temp_dir):
+                if entry.stat().st_mtime < cutoff:
+                    freed += entry.stat().st_size
+                    os.remove(entry.path)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Done, {collected} blobs deleted, {freed:,} bytes freed.'
+        ))
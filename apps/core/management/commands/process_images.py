@@ -0,0 +1,33 @@
+"""
+Django command creating the variants of product images.
+"""
+from django.core.management.base import BaseCommand
+
+from apps.core.images import process_image
+from apps.core.models import Product
+
+
+class Command(BaseCommand):
+    """Process images uploaded before the pipeline or lost on a restart."""
+    help = 'Create the resized variants of product images.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Process images that already have variants as well.',
+        )
+
+    def handle(self, *args, **options):
+        products = Product.objects.exclude(image='')
+        if not options['all']:
+            products = products.filter(image_variants__isnull=True)
+        total = 0
+        for product_id, name in products.order_by('id').values_list(
+                'id', 'image').iterator():
+            process_image(product_id, name)
+            total += 1
+            if total % 100 == 0:
+                self.stdout.write(f'Processed {total} images.')
+        self.stdout.write(self.style.SUCCESS(
+            f'Done, {total} images processed.'
+        ))
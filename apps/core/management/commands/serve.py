@@ -0,0 +1,123 @@
+"""
+Django command serving the API with gunicorn.
+"""
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from gunicorn.app.base import BaseApplication
+
+from apps.core.db.postgresql_pool.pool import close_pools
+
+
+# Caches holding their entries in the memory of each process. Versions,
+# cached responses and auth snapshots kept there never reach other workers.
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+)
+
+
+def has_local_cache():
+    """Return whether a cache keeps its entries per process."""
+    return any(cache['BACKEND'] in LOCAL_CACHE_BACKENDS
+               for cache in settings.CACHES.values())
+
+
+def close_connections(server, worker):
+    """Drop database connections, so forked workers open their own."""
+    connections.close_all()
+    close_pools()
+
+
+class Application(BaseApplication):
+    """Gunicorn application serving the Django WSGI or ASGI handler."""
+
+    def __init__(self, options, asgi=False):
+        self.options = options
+        self.asgi = asgi
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        if self.asgi:
+            from cosmetics_api.asgi import application
+        else:
+            from cosmetics_api.wsgi import application
+        return application
+
+
+class Command(BaseCommand):
+    """Serve the API with preloaded, recycled gunicorn workers."""
+    help = 'Serve the API with gunicorn.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bind', default='0.0.0.0:8000')
+        parser.add_argument(
+            '--workers', type=int,
+            default=int(os.environ.get('WEB_CONCURRENCY', 0)),
+            help='Number of worker processes, 2 per CPU plus 1 by default '
+                 'and 1 per CPU with --asgi. 1 unless a shared cache is '
+                 'configured.',
+        )
+        parser.add_argument(
+            '--asgi', action='store_true',
+            help='Serve the ASGI application with uvicorn workers.',
+        )
+        parser.add_argument(
+            '--max-requests', type=int, default=1000,
+            help='Restart a worker after this many requests.',
+        )
+        parser.add_argument('--max-requests-jitter', type=int, default=100)
+        parser.add_argument('--timeout', type=int, default=30)
+        parser.add_argument(
+            '--graceful-timeout', type=int, default=30,
+            help='Seconds workers get to finish requests on shutdown.',
+        )
+        parser.add_argument('--keep-alive', type=int, default=5)
+        parser.add_argument(
+            '--access-log', default='-',
+            help="Access log file, '-' for stdout and '' to disable.",
+        )
+
+    def handle(self, *args, **options):
+        cpus = os.cpu_count() or 1
+        workers = options['workers']
+        if has_local_cache():
+            if workers > 1:
+                raise CommandError(
+                    'Several workers need a shared cache, set '
+                    'CACHE_BACKEND and CACHE_LOCATION.'
+                )
+            workers = 1
+        elif not workers:
+            workers = cpus if options['asgi'] else cpus * 2 + 1
+        if options['asgi']:
+            # Every ASGI request runs its queries in a thread of its own, so
+            # persistent connections of the stock engine would pile up one
+            # per thread. The pooled engine ignores this setting.
+            for database in settings.DATABASES.values():
+                database['CONN_MAX_AGE'] = 0
+        gunicorn_options = {
+            'bind': options['bind'],
+            'workers': workers,
+            'worker_class': ('uvicorn.workers.UvicornWorker'
+                             if options['asgi'] else 'sync'),
+            'preload_app': True,
+            'max_requests': options['max_requests'],
+            'max_requests_jitter': options['max_requests_jitter'],
+            'timeout': options['timeout'],
+            'graceful_timeout': options['graceful_timeout'],
+            'keepalive': options['keep_alive'],
+            'accesslog': options['access_log'] or None,
+            'post_fork': close_connections,
+            'worker_exit': close_connections,
+        }
+        self.stdout.write(
+            f'Serving on {options["bind"]} with {workers} '
+            f'{gunicorn_options["worker_class"]} workers.'
+        )
+        Application(gunicorn_options, asgi=options['asgi']).run()
@@ -0,0 +1,99 @@
+"""
+Multi-pattern matching of ingredient terms.
+
+`KeywordMatcher` is an Aho-Corasick automaton over words: terms and texts
+are split into lower case words, so every ingredient list is scanned once
+whatever the number of terms, and terms only match whole words.
+"""
+import re
+from collections import OrderedDict, deque
+
+
+WORD_RE = re.compile(r'\w+')
+MAX_CACHED_MATCHERS = 1024
+
+
+def split_words(text):
+    return WORD_RE.findall(text.lower())
+
+
+class KeywordMatcher:
+    """Find which of many terms occur in a text."""
+
+    def __init__(self, terms):
+        self.terms = {}
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [()]
+        for term in terms:
+            words = tuple(split_words(term))
+            if words and words not in self.terms:
+                self.terms[words] = term
+                self.add(words)
+        self.build_fail_links()
+
+    def __bool__(self):
+        return bool(self.terms)
+
+    def add(self, words):
+        node = 0
+        for word in words:
+            child = self.goto[node].get(word)
+            if child is None:
+                child = len(self.goto)
+                self.goto[node][word] = child
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(())
+            node = child
+        self.output[node] += (words,)
+
+    def build_fail_links(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for word, child in self.goto[node].items():
+                queue.append(child)
+                fail = self.fail[node]
+                while fail and word not in self.goto[fail]:
+                    fail = self.fail[fail]
+                self.fail[child] = self.goto[fail].get(word, 0)
+                self.output[child] += self.output[self.fail[child]]
+
+    def iter_matches(self, text):
+        """Yield the matched term keys in order of appearance."""
+        goto, fail, output = self.goto, self.fail, self.output
+        node = 0
+        for word in split_words(text):
+            while node and word not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(word, 0)
+            yield from output[node]
+
+    def search(self, text):
+        """Return the terms found in text, without duplicates."""
+        found = dict.fromkeys(self.iter_matches(text))
+        return [self.terms[words] for words in found]
+
+    def matches(self, text):
+        """Return whether any term occurs in text."""
+        return next(self.iter_matches(text), None) is not None
+
+
+_matchers = OrderedDict()
+
+
+def get_blacklist_matcher(blacklist):
+    """Return the compiled matcher of a blacklist.
+
+    Matchers are cached per process and compiled again only when the
+    blacklist version changes.
+    """
+    cached = _matchers.get(blacklist.pk)
+    if cached is None or cached[0] != blacklist.version:
+        cached = (blacklist.version, KeywordMatcher(blacklist.terms))
+        _matchers[blacklist.pk] = cached
+        if len(_matchers) > MAX_CACHED_MATCHERS:
+            _matchers.popitem(last=False)
+    _matchers.move_to_end(blacklist.pk)
+    return cached[1]
@@ -0,0 +1,170 @@
+"""
+Delivery of product images to their owners.
+
+With `MEDIA_ACCEL` set the view only checks access and hands the file to
+the front proxy: nginx serves `X-Accel-Redirect` paths below the internal
+`MEDIA_ACCEL_PREFIX` location, Apache and lighttpd serve the `X-Sendfile`
+path. Ranges and conditional requests are then answered by the proxy.
+
+Without a proxy the file is streamed by `FileResponse`, answering Range,
+If-Range and conditional requests here. WSGI servers offering a file
+wrapper, gunicorn among them, send it with sendfile() from the current
+offset, so the bytes never pass through Python.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+
+from apps.core import images
+from apps.core.models import Product
+
+VARIANT_PREFIX = 'images/variants/'
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+class FileRange:
+    """Open file limited to `length` bytes from `start`.
+
+    `fileno()` and `tell()` reach the file so a WSGI file wrapper can
+    sendfile() the range, `read()` stops at its end for the others.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+def is_owner(user, name):
+    """Return whether `name` is the image, or a variant of the image, of
+    one of the user's products."""
+    products = Product.objects.filter(user=user)
+    if name.startswith(VARIANT_PREFIX):
+        basename = name[len(VARIANT_PREFIX):].split('/', 1)[0]
+        if name not in images.variant_paths(basename):
+            return False
+        products = products.filter(image__endswith=f'/{basename}')
+    else:
+        products = products.filter(image=name)
+    return products.exists()
+
+
+def parse_range(header, size):
+    """Return the (start, length) of a single byte range, None to send the
+    whole file."""
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        # Several or malformed ranges, the whole file answers them too.
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        suffix = int(last)
+        if not suffix:
+            raise RangeNotSatisfiable()
+        start = max(size - suffix, 0)
+        end = size - 1
+    if start >= size:
+        raise RangeNotSatisfiable()
+    return start, end - start + 1
+
+
+def range_applies(request, etag, last_modified):
+    """Return whether the If-Range validator of the request still holds."""
+    validator = request.headers.get('If-Range')
+    if validator is None:
+        return True
+    if validator.startswith('"'):
+        return validator == etag
+    return parse_http_date_safe(validator) == last_modified
+
+
+def accel_response(name, path):
+    response = HttpResponse(content_type=guess_type(name))
+    if settings.MEDIA_ACCEL == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = quote(
+            settings.MEDIA_ACCEL_PREFIX + name
+        )
+    else:
+        response['X-Sendfile'] = path
+    return response
+
+
+def file_response(request, path, name, stat):
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    last_modified = int(stat.st_mtime)
+    response = get_conditional_response(request, etag=etag,
+                                        last_modified=last_modified)
+    if response is None:
+        byte_range = None
+        header = request.headers.get('Range')
+        if header and range_applies(request, etag, last_modified):
+            try:
+                byte_range = parse_range(header, stat.st_size)
+            except RangeNotSatisfiable:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{stat.st_size}'
+                return response
+        file = open(path, 'rb')
+        if byte_range is None:
+            response = FileResponse(file, content_type=guess_type(name))
+        else:
+            start, length = byte_range
+            response = FileResponse(FileRange(file, start, length),
+                                    status=206,
+                                    content_type=guess_type(name))
+            response['Content-Length'] = length
+            response['Content-Range'] = (
+                f'bytes {start}-{start + length - 1}/{stat.st_size}'
+            )
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def guess_type(name):
+    return mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+
+def serve(request, name):
+    """Return the response delivering the media file `name`."""
+    path = default_storage.path(name)
+    if settings.MEDIA_ACCEL:
+        response = accel_response(name, path)
+    else:
+        response = file_response(request, path, name, os.stat(path))
+    patch_cache_control(response, private=True,
+                        max_age=settings.MEDIA_CACHE_MAX_AGE)
+    return response
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.6 on 2026-10-17 23:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Ingredient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ProductIngredient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField()),
+                ('ingredient', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='product_links', to='core.ingredient')),
+                ('product', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='ingredient_links', to='core.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['ingredient', 'product'], name='ingredient_product_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='productingredient',
+            constraint=models.UniqueConstraint(fields=('product', 'ingredient'), name='unique_ingredient_per_product'),
+        ),
+    ]
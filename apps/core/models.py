@@ -1,10 +1,14 @@
 """
 Database models.
 """
+import uuid
 
 from django.conf import settings
 from django.apps import apps
-from django.db import models
+from django.db import models, transaction
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import (
     BaseUserManager,
     AbstractBaseUser,
@@ -14,6 +18,8 @@ from .choices import (
     PRICES,
     UNITS,
 )
+from . import taxonomy
+from .blobs import blob_storage
 
 
 def get_default_category(group):
@@ -30,7 +36,9 @@ class UserManager(BaseUserManager):
             raise ValueError('You must provide a valid email address.')
         user = self.model(email=self.normalize_email(email), **extra_fields)
         user.set_password(password)
-        user.save()
+        # Commit the user together with the groups created on signup.
+        with transaction.atomic(using=self._db):
+            user.save(using=self._db)
 
         return user
 
@@ -50,6 +58,8 @@ class User(AbstractBaseUser, PermissionsMixin):
     username = models.CharField(max_length=255)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    # Bumped to revoke every signed token issued to the user.
+    token_generation = models.PositiveIntegerField(default=0)
 
     objects = UserManager()
 
@@ -64,6 +74,12 @@ class Brand(models.Model):
     )
     name = models.CharField(max_length=100)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'name', 'id'],
+                         name='brand_user_name_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -76,6 +92,12 @@ class Group(models.Model):
     )
     name = models.CharField(max_length=100)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'name', 'id'],
+                         name='group_user_name_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -96,6 +118,10 @@ class Category(models.Model):
             models.UniqueConstraint(fields=['name', 'group'],
                                     name='unique_category_per_group')
         ]
+        indexes = [
+            models.Index(fields=['user', 'group', 'name', 'id'],
+                         name='category_user_group_name_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -109,6 +135,12 @@ class Store(models.Model):
     )
     name = models.CharField(max_length=100)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'name', 'id'],
+                         name='store_user_name_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -137,12 +169,133 @@ class Product(models.Model):
     stores = models.ManyToManyField(Store, blank=True)
     is_available = models.BooleanField(default=True)
     is_favourite = models.BooleanField(default=False)
-    image = models.ImageField(upload_to='images', blank=True)
+    image = models.ImageField(upload_to='images',
+                              storage=blob_storage,
+                              blank=True)
+    # Filled in by apps.core.images once the upload is processed.
+    image_width = models.PositiveIntegerField(null=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, editable=False)
+    image_variants = models.JSONField(null=True, editable=False)
+    # Weighted name and ingredients, maintained by a database trigger.
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'name', 'id'],
+                         name='product_user_name_idx'),
+            GinIndex(fields=['search_vector'],
+                     name='product_search_vector_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Known ingredients let saves skip unchanged ingredient lists.
+        if 'ingredients' in instance.__dict__:
+            instance._loaded_ingredients = instance.ingredients
+        if 'image' in instance.__dict__:
+            instance._loaded_image = instance.image.name
+        return instance
+
+    @property
+    def image_changed(self):
+        return ('image' in self.__dict__ and
+                self.image.name != getattr(self, '_loaded_image', None))
 
     def save(self, *args, **kwargs):
-        if not self.category:
-            self.category = get_default_category(self.group)
+        if not self.category_id:
+            self.category_id = taxonomy.get_default_category_id(
+                self.group_id
+            )
+        if self.image_changed:
+            # Variants of the previous image no longer apply.
+            self.image_width = self.image_height = None
+            self.image_variants = None
         super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
+
+
+class Ingredient(models.Model):
+    """Ingredient name shared by all products."""
+    name = models.CharField(max_length=255, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
+class ProductIngredient(models.Model):
+    """Ingredient listed on a product, parsed from its ingredients."""
+    product = models.ForeignKey(Product,
+                                on_delete=models.CASCADE,
+                                related_name='ingredient_links',
+                                db_index=False)
+    ingredient = models.ForeignKey(Ingredient,
+                                   on_delete=models.CASCADE,
+                                   related_name='product_links',
+                                   db_index=False)
+    position = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'ingredient'],
+                                    name='unique_ingredient_per_product')
+        ]
+        indexes = [
+            models.Index(fields=['ingredient', 'product'],
+                         name='ingredient_product_idx'),
+        ]
+
+
+class MediaBlob(models.Model):
+    """Stored file shared by every product image with its content."""
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField()
+    # Products using the file, it is deleted when none are left.
+    references = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+
+class UploadSession(models.Model):
+    """Resumable upload of a product image, received in chunks."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4,
+                          editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL,
+                             on_delete=models.CASCADE)
+    product = models.ForeignKey(Product,
+                                on_delete=models.CASCADE,
+                                related_name='upload_sessions')
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    # Hex SHA-256 of the whole file, checked when the upload is finalized.
+    checksum = models.CharField(max_length=64)
+    offset = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f'Upload of {self.filename}'
+
+
+class Blacklist(models.Model):
+    """Ingredient terms a user wants flagged on their products."""
+    user = models.OneToOneField(settings.AUTH_USER_MODEL,
+                                on_delete=models.CASCADE,
+                                related_name='blacklist')
+    terms = ArrayField(models.CharField(max_length=255),
+                       default=list,
+                       blank=True)
+    # Bumped on every change, compiled matchers are cached per version.
+    version = models.PositiveIntegerField(default=1)
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            self.version += 1
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f'Blacklist of {self.user}'
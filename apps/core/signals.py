@@ -0,0 +1,108 @@
+"""Signals keeping the taxonomy cache, catalog versions, ingredient links,
+image blobs and variants up to date."""
+
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_init,
+    post_save,
+)
+from django.dispatch import receiver
+
+from apps.core import blobs, images, taxonomy, versions
+from apps.core.ingredients import sync_ingredients
+from apps.core.models import (
+    Brand,
+    Store,
+    Group,
+    Category,
+    Product,
+    Blacklist,
+)
+
+VERSIONED_MODELS = (Brand, Store, Group, Category, Product, Blacklist)
+
+
+@receiver(post_init, sender=Category)
+def remember_category_group(sender, instance, **kwargs):
+    """Remember the loaded group so a move between groups is noticed."""
+    # Reading a deferred group would cost a query per category.
+    if 'group_id' in instance.__dict__:
+        instance._loaded_group_id = instance.group_id
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category(sender, instance, **kwargs):
+    """Forget the default category of the groups the category belongs to."""
+    taxonomy.invalidate_default_category(
+        *{instance.group_id,
+          getattr(instance, '_loaded_group_id', None)} - {None}
+    )
+    instance._loaded_group_id = instance.group_id
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group(sender, instance, **kwargs):
+    """Forget the groups of the owner and the default category."""
+    taxonomy.invalidate_groups(instance.user_id)
+    taxonomy.invalidate_default_category(instance.id)
+
+
+@receiver(post_save, sender=Product)
+def link_product_ingredients(sender, instance, created, **kwargs):
+    """Link the product to its ingredients when they change."""
+    update_fields = kwargs.get('update_fields')
+    if 'ingredients' not in instance.__dict__ or (
+            update_fields is not None and 'ingredients' not in update_fields):
+        return
+    if created:
+        changed = bool(instance.ingredients)
+    else:
+        loaded = getattr(instance, '_loaded_ingredients', None)
+        changed = instance.ingredients != loaded
+    if changed:
+        sync_ingredients([instance])
+    instance._loaded_ingredients = instance.ingredients
+
+
+@receiver(post_save, sender=Product)
+def track_product_image(sender, instance, **kwargs):
+    """Count references to a new image, process it and release the old
+    one."""
+    if not instance.image_changed:
+        return
+    loaded = getattr(instance, '_loaded_image', None)
+    if loaded:
+        blobs.release(loaded)
+    if instance.image.name:
+        blobs.retain(instance.image.name)
+        images.schedule(instance.pk, instance.image.name)
+    instance._loaded_image = instance.image.name
+
+
+@receiver(post_delete, sender=Product)
+def release_product_image(sender, instance, **kwargs):
+    """Release the image of a deleted product."""
+    if 'image' in instance.__dict__ and instance.image.name:
+        blobs.release(instance.image.name)
+
+
+def bump_version(sender, instance, **kwargs):
+    """Change the catalog version of the resource of the instance."""
+    versions.bump(instance.user_id, sender._meta.model_name)
+
+
+for model in VERSIONED_MODELS:
+    post_save.connect(bump_version, sender=model,
+                      dispatch_uid=f'bump_version_{model._meta.model_name}')
+    post_delete.connect(bump_version, sender=model,
+                        dispatch_uid=f'bump_version_{model._meta.model_name}')
+
+
+@receiver(m2m_changed, sender=Product.stores.through)
+def bump_product_stores_version(sender, instance, action, **kwargs):
+    """Change the product version when product stores change."""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        versions.bump(instance.user_id, 'product')
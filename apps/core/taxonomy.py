@@ -0,0 +1,75 @@
+"""
+Cached lookups of the group and category taxonomy.
+
+The default category of every group and the ids of the groups owned by a
+user change rarely but are needed on every product save and category
+create, so they are kept in Django's cache and invalidated by the signal
+receivers in `apps.core.signals`.
+"""
+from django.apps import apps
+from django.core.cache import cache
+
+
+DEFAULT_CATEGORY_NAME = 'Other'
+CACHE_TIMEOUT = 60 * 60
+
+stats = {'hits': 0, 'misses': 0}
+
+
+def reset_stats():
+    """Reset the hit and miss counters."""
+    stats.update(hits=0, misses=0)
+
+
+def default_category_key(group_id):
+    return f'taxonomy:default-category:{group_id}'
+
+
+def user_groups_key(user_id):
+    return f'taxonomy:groups:{user_id}'
+
+
+def get_or_load(key, load):
+    """Return the cached value of key, loading and caching it on a miss."""
+    value = cache.get(key)
+    if value is not None:
+        stats['hits'] += 1
+        return value
+    stats['misses'] += 1
+    value = load()
+    cache.set(key, value, CACHE_TIMEOUT)
+    return value
+
+
+def get_default_category_id(group_id):
+    """Return the id of the default category of a group.
+
+    Raises Category.DoesNotExist when the group has no default category.
+    """
+    Category = apps.get_model('core', 'Category')
+    return get_or_load(
+        default_category_key(group_id),
+        lambda: Category.objects.values_list('id', flat=True).get(
+            group_id=group_id, name=DEFAULT_CATEGORY_NAME
+        ),
+    )
+
+
+def get_group_ids(user_id):
+    """Return the ids of the groups owned by a user."""
+    Group = apps.get_model('core', 'Group')
+    return get_or_load(
+        user_groups_key(user_id),
+        lambda: frozenset(
+            Group.objects.filter(user_id=user_id).values_list('id',
+                                                              flat=True)
+        ),
+    )
+
+
+def invalidate_default_category(*group_ids):
+    cache.delete_many([default_category_key(pk) for pk in group_ids])
+
+
+def invalidate_groups(user_id):
+    cache.delete(user_groups_key(user_id))
@@ -0,0 +1,272 @@
+"""
+Tests for the content-addressed image blobs.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.core.files.base import ContentFile, File
+from django.core.files.uploadedfile import (
+    SimpleUploadedFile,
+    TemporaryUploadedFile,
+)
+from django.core.management import call_command
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from PIL import Image
+
+from .. import blobs, images
+from ..models import Group, MediaBlob, Product
+
+
+def create_user(email='user1@example.com', password='Testpass123'):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(email, password)
+
+
+def create_image_file(size=(600, 400), name='photo.jpg'):
+    """Create and return an uploaded JPEG image."""
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, 'JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+class ChunkedReader:
+    """File-like object refusing reads larger than a chunk."""
+
+    def __init__(self, data):
+        self.data = data
+        self.position = 0
+        self.largest_read = 0
+
+    def read(self, size=-1):
+        assert 0 < size <= blobs.CHUNK_SIZE, 'unbounded read'
+        self.largest_read = max(self.largest_read, size)
+        chunk = self.data[self.position:self.position + size]
+        self.position += len(chunk)
+        return chunk
+
+    def seek(self, position):
+        self.position = position
+
+    def tell(self):
+        return self.position
+
+
+class BlobTestCase(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings = override_settings(MEDIA_ROOT=self.media_root,
+                                     IMAGE_PROCESSING_EAGER=True,
+                                     MEDIA_BLOB_GRACE=0)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.storage = blobs.blob_storage
+
+
+class BlobStorageTests(BlobTestCase):
+    """Test files are stored once under their content hash."""
+
+    def test_name_is_content_hash(self):
+        """Test the stored name is derived from the bytes."""
+        name = self.storage.save('images/photo.JPG', ContentFile(b'data'))
+
+        digest = hashlib.sha256(b'data').hexdigest()
+        self.assertEqual(
+            name, f'blobs/{digest[:2]}/{digest[2:4]}/{digest}.jpg'
+        )
+        with self.storage.open(name) as file:
+            self.assertEqual(file.read(), b'data')
+
+    def test_identical_content_stored_once(self):
+        """Test uploads with the same bytes share one file."""
+        first = self.storage.save('images/a.jpg', ContentFile(b'data'))
+        second = self.storage.save('images/b.jpg', ContentFile(b'data'))
+        other = self.storage.save('images/c.jpg', ContentFile(b'other'))
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertEqual(len(list(blobs.iter_blob_files())), 2)
+        self.assertEqual(os.listdir(self.storage.path('blobs/tmp')), [])
+
+    def test_streamed_in_chunks(self):
+        """Test uploads are never read into memory at once."""
+        data = os.urandom(blobs.CHUNK_SIZE * 3 + 10)
+        reader = ChunkedReader(data)
+
+        name = self.storage.save('images/large.jpg',
+                                 File(reader, name='large.jpg'))
+
+        self.assertEqual(reader.largest_read, blobs.CHUNK_SIZE)
+        self.assertEqual(self.storage.size(name), len(data))
+
+    def test_temporary_upload_moved(self):
+        """Test uploads spooled to disk are moved, not copied."""
+        upload = TemporaryUploadedFile('large.jpg', 'image/jpeg', 4, None)
+        upload.write(b'data')
+        upload.seek(0)
+        temp_path = upload.temporary_file_path()
+
+        name = self.storage.save('images/large.jpg', upload)
+        upload.close()
+
+        self.assertFalse(os.path.exists(temp_path))
+        self.assertTrue(self.storage.exists(name))
+
+
+class BlobReferenceTests(BlobTestCase):
+    """Test blobs are counted per product and deleted when unused."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = create_user()
+        self.group = Group.objects.get(name='Skin care', user=self.user)
+
+    def create_product(self, image=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            product = Product.objects.create(
+                user=self.user, name='Product', group=self.group,
+                capacity=50, image=image or create_image_file(),
+            )
+        return product
+
+    def delete_product(self, product):
+        with self.captureOnCommitCallbacks(execute=True):
+            product.delete()
+
+    def test_shared_blob_counted(self):
+        """Test products uploading the same image share one blob."""
+        first = self.create_product()
+        second = self.create_product()
+
+        self.assertEqual(first.image.name, second.image.name)
+        blob = MediaBlob.objects.get()
+        self.assertEqual(blob.references, 2)
+        self.assertEqual(blob.size, self.storage.size(blob.name))
+
+    def test_blob_deleted_with_last_reference(self):
+        """Test the file and variants go when the last product does."""
+        first = self.create_product()
+        second = self.create_product()
+        name = first.image.name
+
+        self.delete_product(first)
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(MediaBlob.objects.get().references, 1)
+
+        self.delete_product(second)
+        self.assertFalse(self.storage.exists(name))
+        self.assertFalse(MediaBlob.objects.exists())
+        for path in images.variant_paths(name):
+            self.assertFalse(self.storage.exists(path))
+
+    def test_replaced_image_released(self):
+        """Test replacing an image releases the old blob."""
+        product = self.create_product()
+        old_name = product.image.name
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.image = create_image_file(size=(300, 300),
+                                              name='new.jpg')
+            product.save()
+
+        self.assertFalse(self.storage.exists(old_name))
+        self.assertEqual(MediaBlob.objects.get().name, product.image.name)
+
+    def test_variants_shared(self):
+        """Test a second upload reuses the variants of the first."""
+        first = self.create_product()
+
+        with mock.patch.object(images, 'create_variants') as create:
+            second = self.create_product()
+
+        create.assert_not_called()
+        second.refresh_from_db()
+        first.refresh_from_db()
+        self.assertEqual(second.image_variants, first.image_variants)
+
+    def process_moving_away(self, product, name):
+        """Process the image while the product switches to another one
+        just before the variants are recorded."""
+        update = QuerySet.update
+
+        def move_then_update(queryset, **kwargs):
+            if 'image_variants' in kwargs:
+                update(Product.objects.filter(pk=product.pk),
+                       image='images/other.jpg')
+            return update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', autospec=True,
+                               side_effect=move_then_update):
+            images.process_image(product.pk, name)
+
+    def assert_variants_exist(self, name, exist=True):
+        for path in images.variant_paths(name):
+            self.assertEqual(self.storage.exists(path), exist, path)
+
+    def test_shared_variants_kept_when_product_moves_on(self):
+        """Test variants copied from another product are not deleted."""
+        first = self.create_product()
+        second = self.create_product()
+        name = first.image.name
+        Product.objects.filter(pk=second.pk).update(image_variants=None)
+
+        self.process_moving_away(second, name)
+
+        self.assert_variants_exist(name)
+        first.refresh_from_db()
+        self.assertIsNotNone(first.image_variants)
+
+    def test_written_variants_kept_for_other_products(self):
+        """Test variants written for a product that moved on are kept
+        while another product uses the image."""
+        first = self.create_product()
+        second = self.create_product()
+        name = first.image.name
+        Product.objects.filter(image=name).update(image_variants=None)
+
+        self.process_moving_away(second, name)
+
+        self.assert_variants_exist(name)
+
+    def test_unused_written_variants_deleted(self):
+        """Test variants nobody uses are deleted."""
+        product = self.create_product()
+        name = product.image.name
+        Product.objects.filter(pk=product.pk).update(image_variants=None)
+
+        self.process_moving_away(product, name)
+
+        self.assert_variants_exist(name, exist=False)
+
+    @override_settings(MEDIA_BLOB_GRACE=300)
+    def test_recently_used_blob_left_to_command(self):
+        """Test fresh blobs are kept until collect_blobs runs."""
+        product = self.create_product()
+        name = product.image.name
+        self.delete_product(product)
+
+        self.assertTrue(self.storage.exists(name))
+        with override_settings(MEDIA_BLOB_GRACE=0):
+            call_command('collect_blobs', stdout=StringIO())
+
+        self.assertFalse(self.storage.exists(name))
+        self.assertFalse(MediaBlob.objects.exists())
+
+    def test_orphaned_files_collected(self):
+        """Test files without a blob row are deleted by the command."""
+        name = self.storage.save('images/orphan.jpg', ContentFile(b'data'))
+        kept = self.create_product()
+
+        out = StringIO()
+        call_command('collect_blobs', stdout=out)
+
+        self.assertFalse(self.storage.exists(name))
+        self.assertTrue(self.storage.exists(kept.image.name))
+        self.assertIn('1 blobs deleted', out.getvalue())
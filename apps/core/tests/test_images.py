@@ -0,0 +1,196 @@
+"""
+Tests for the product image variants.
+"""
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from PIL import Image
+
+from .. import images
+from ..models import Group, Product
+
+
+def create_user(email='user1@example.com', password='Testpass123'):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(email, password)
+
+
+def create_image_file(size=(1200, 600), mode='RGB', image_format='JPEG',
+                      orientation=None, name='photo.jpg', color='red'):
+    """Create and return an uploaded image carrying EXIF metadata."""
+    exif = Image.Exif()
+    exif[0x010F] = 'Test camera'
+    if orientation:
+        exif[0x0112] = orientation
+    buffer = BytesIO()
+    Image.new(mode, size, color).save(buffer, image_format, exif=exif)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+class ImageVariantTests(TestCase):
+    """Test variants are created when a product image is uploaded."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings = override_settings(MEDIA_ROOT=self.media_root,
+                                     IMAGE_PROCESSING_EAGER=True,
+                                     MEDIA_BLOB_GRACE=0)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.user = create_user()
+        self.group = Group.objects.get(name='Skin care', user=self.user)
+
+    def create_product(self, image):
+        with self.captureOnCommitCallbacks(execute=True):
+            product = Product.objects.create(user=self.user, name='Product',
+                                             group=self.group, capacity=50,
+                                             image=image)
+        product.refresh_from_db()
+        return product
+
+    def open_variant(self, product, variant, extension):
+        return Image.open(default_storage.open(
+            product.image_variants[variant][extension]
+        ))
+
+    def test_variants_created(self):
+        """Test thumbnails and medium sizes exist in both formats."""
+        product = self.create_product(create_image_file())
+
+        self.assertEqual((product.image_width, product.image_height),
+                         (1200, 600))
+        for extension, image_format in (('webp', 'WEBP'), ('jpeg', 'JPEG')):
+            with self.subTest(extension=extension):
+                thumbnail = self.open_variant(product, 'thumbnail', extension)
+                medium = self.open_variant(product, 'medium', extension)
+                self.assertEqual(thumbnail.format, image_format)
+                self.assertEqual(thumbnail.size, (256, 256))
+                self.assertEqual(medium.size, (1024, 512))
+
+    def test_variants_replace_concurrent_writes(self):
+        """Test variants keep their fixed paths when a concurrent run
+        writes the same files meanwhile."""
+        product = self.create_product(create_image_file())
+        name = product.image.name
+        paths = images.variant_paths(name)
+        encode = images.encode
+
+        def write_concurrently(*args):
+            for path in paths:
+                with open(default_storage.path(path), 'wb') as file:
+                    file.write(b'concurrent')
+            return encode(*args)
+
+        with mock.patch.object(images, 'encode',
+                               side_effect=write_concurrently):
+            variants, size = images.create_variants(name)
+
+        self.assertEqual(variants, product.image_variants)
+        directory = os.path.dirname(default_storage.path(paths[0]))
+        self.assertEqual(sorted(os.listdir(directory)),
+                         sorted(os.path.basename(path) for path in paths))
+
+    def test_exif_stripped(self):
+        """Test variants carry no EXIF metadata."""
+        product = self.create_product(create_image_file())
+
+        for variant, formats in product.image_variants.items():
+            for extension in formats:
+                image = self.open_variant(product, variant, extension)
+                self.assertEqual(dict(image.getexif()), {})
+
+    def test_exif_orientation_applied(self):
+        """Test rotated photos are stored upright."""
+        product = self.create_product(create_image_file(orientation=6))
+
+        self.assertEqual((product.image_width, product.image_height),
+                         (600, 1200))
+        medium = self.open_variant(product, 'medium', 'jpeg')
+        self.assertEqual(medium.size, (512, 1024))
+
+    def test_transparency_flattened_for_jpeg(self):
+        """Test transparent images keep alpha in WebP only."""
+        product = self.create_product(create_image_file(
+            mode='RGBA', image_format='PNG', name='logo.png',
+            color=(255, 0, 0, 128),
+        ))
+
+        self.assertEqual(
+            self.open_variant(product, 'thumbnail', 'webp').mode, 'RGBA'
+        )
+        self.assertEqual(
+            self.open_variant(product, 'thumbnail', 'jpeg').mode, 'RGB'
+        )
+
+    def test_replaced_image_variants_deleted(self):
+        """Test a new image replaces the variants of the old one."""
+        product = self.create_product(create_image_file())
+        old_paths = images.variant_paths(product.image.name)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.image = create_image_file(size=(300, 300),
+                                              name='new.jpg')
+            product.save()
+        product.refresh_from_db()
+
+        self.assertEqual((product.image_width, product.image_height),
+                         (300, 300))
+        for path in old_paths:
+            self.assertFalse(default_storage.exists(path))
+
+    def test_unchanged_image_not_processed(self):
+        """Test saving other fields does not process the image again."""
+        product = self.create_product(create_image_file())
+
+        with mock.patch.object(images, 'schedule') as schedule:
+            product.name = 'Renamed'
+            product.save()
+
+        schedule.assert_not_called()
+
+    def test_deleted_product_variants_deleted(self):
+        """Test deleting a product deletes its variants."""
+        product = self.create_product(create_image_file())
+        paths = images.variant_paths(product.image.name)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            product.delete()
+
+        for path in paths:
+            self.assertFalse(default_storage.exists(path))
+
+    def test_invalid_image_skipped(self):
+        """Test unreadable uploads leave the product without variants."""
+        upload = SimpleUploadedFile('broken.jpg', b'not an image')
+
+        with self.assertLogs('apps.core.images', 'ERROR'):
+            product = self.create_product(upload)
+
+        self.assertIsNone(product.image_variants)
+
+    @override_settings(IMAGE_PROCESSING_EAGER=False)
+    def test_processing_runs_in_background(self):
+        """Test uploads hand the work to the executor after commit."""
+        executor = mock.Mock()
+        with mock.patch.object(images, 'get_executor',
+                               return_value=executor):
+            with self.captureOnCommitCallbacks(execute=False) as callbacks:
+                product = Product.objects.create(
+                    user=self.user, name='Product', group=self.group,
+                    capacity=50, image=create_image_file(),
+                )
+            executor.submit.assert_not_called()
+            for callback in callbacks:
+                callback()
+
+        executor.submit.assert_called_once_with(
+            images.run_in_background, product.id, product.image.name
+        )
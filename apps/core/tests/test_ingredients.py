@@ -0,0 +1,88 @@
+"""
+Tests for the ingredient dictionary.
+"""
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+
+from ..ingredients import parse_ingredients
+from ..models import (
+    Group,
+    Product,
+    Ingredient,
+    ProductIngredient,
+)
+
+
+def create_user(email='user1@example.com', password='Testpass123'):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(email, password)
+
+
+class IngredientTests(TestCase):
+    """Test parsing and linking ingredients."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.group = Group.objects.get(name='Skin care', user=self.user)
+
+    def create_product(self, ingredients):
+        return Product.objects.create(user=self.user, name='Test product',
+                                      group=self.group, capacity=50,
+                                      ingredients=ingredients)
+
+    def linked_names(self, product):
+        return list(product.ingredient_links.order_by('position')
+                    .values_list('ingredient__name', flat=True))
+
+    def test_parse_ingredients(self):
+        """Test names are normalized and de-duplicated in order."""
+        names = parse_ingredients(' Aqua,  Sodium   Hyaluronate,,aqua, ')
+
+        self.assertEqual(names, ['aqua', 'sodium hyaluronate'])
+
+    def test_ingredients_linked_on_save(self):
+        """Test saving a product links its ingredients."""
+        product = self.create_product('Aqua, Glycerin')
+
+        self.assertEqual(self.linked_names(product), ['aqua', 'glycerin'])
+
+        product.ingredients = 'Glycerin, Urea'
+        product.save()
+
+        self.assertEqual(self.linked_names(product), ['glycerin', 'urea'])
+
+    def test_ingredients_shared_between_products(self):
+        """Test common ingredients are stored once."""
+        self.create_product('Aqua, Glycerin')
+        self.create_product('AQUA, Urea')
+
+        self.assertEqual(Ingredient.objects.count(), 3)
+        self.assertEqual(ProductIngredient.objects.count(), 4)
+
+    def test_unchanged_ingredients_not_parsed_again(self):
+        """Test saving other fields keeps the links untouched."""
+        product = Product.objects.get(pk=self.create_product('Aqua').pk)
+        link = product.ingredient_links.get()
+
+        product.name = 'Renamed'
+        product.save()
+
+        self.assertTrue(ProductIngredient.objects.filter(pk=link.pk)
+                        .exists())
+
+    def test_backfill_command(self):
+        """Test the backfill links products created without signals."""
+        Product.objects.bulk_create([
+            Product(user=self.user, name=f'Product {i}', group=self.group,
+                    category=self.group.categories.get(), capacity=50,
+                    ingredients='Aqua, Niacinamide')
+            for i in range(3)
+        ])
+
+        call_command('backfill_ingredients', batch_size=2, stdout=StringIO())
+
+        self.assertEqual(ProductIngredient.objects.count(), 6)
+        self.assertEqual(Ingredient.objects.count(), 2)
@@ -0,0 +1,57 @@
+"""
+Tests for the multi-pattern term matcher.
+"""
+from django.test import SimpleTestCase
+
+from ..matching import KeywordMatcher, get_blacklist_matcher
+from ..models import Blacklist
+
+
+class KeywordMatcherTests(SimpleTestCase):
+    """Test matching terms in ingredient lists."""
+
+    def test_search_whole_words(self):
+        """Test terms only match whole words, ignoring case."""
+        matcher = KeywordMatcher(['Alcohol', 'urea', 'PEG-40'])
+
+        self.assertEqual(
+            matcher.search('Aqua, Ureas, Cetyl ALCOHOL, peg 40'),
+            ['Alcohol', 'PEG-40'],
+        )
+
+    def test_search_overlapping_terms(self):
+        """Test terms sharing words are all found."""
+        matcher = KeywordMatcher(['alcohol', 'alcohol denat',
+                                  'denat', 'sodium laureth sulfate',
+                                  'laureth'])
+
+        self.assertEqual(
+            matcher.search('Alcohol Denat., Sodium Laureth Sulfate'),
+            ['alcohol', 'alcohol denat', 'denat', 'laureth',
+             'sodium laureth sulfate'],
+        )
+
+    def test_search_after_partial_match(self):
+        """Test a failed partial match falls back to shorter terms."""
+        matcher = KeywordMatcher(['sodium lauryl sulfate', 'lauryl'])
+
+        self.assertEqual(matcher.search('sodium lauryl glucoside'),
+                         ['lauryl'])
+
+    def test_empty_matcher(self):
+        """Test a matcher without terms never matches."""
+        matcher = KeywordMatcher(['', ' , '])
+
+        self.assertFalse(matcher)
+        self.assertFalse(matcher.matches('Aqua'))
+
+    def test_matcher_cached_per_version(self):
+        """Test blacklists are compiled again only when changed."""
+        blacklist = Blacklist(pk=1, terms=['parfum'], version=1)
+        matcher = get_blacklist_matcher(blacklist)
+
+        self.assertIs(get_blacklist_matcher(blacklist), matcher)
+
+        blacklist.terms, blacklist.version = ['fragrance'], 2
+        self.assertTrue(get_blacklist_matcher(blacklist)
+                        .matches('Fragrance'))
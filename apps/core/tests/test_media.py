@@ -0,0 +1,221 @@
+"""
+Tests for the delivery of product images.
+"""
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from PIL import Image
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from .. import media
+from ..models import Group, Product
+
+
+def media_url(name):
+    """Create and return the URL of a media file."""
+    return reverse('media', args=[name])
+
+
+def create_user(email='user1@example.com', password='Testpass123'):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(email, password)
+
+
+def create_image_file(size=(600, 400), name='photo.jpg'):
+    """Create and return an uploaded JPEG image."""
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, 'JPEG')
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+class MediaViewTests(TestCase):
+    """Test product images are served to their owners only."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings = override_settings(MEDIA_ROOT=self.media_root,
+                                     IMAGE_PROCESSING_EAGER=True,
+                                     MEDIA_ACCEL='')
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product = Product.objects.create(
+                user=self.user, name='Product', capacity=50,
+                group=Group.objects.get(name='Skin care', user=self.user),
+                image=create_image_file(),
+            )
+        self.product.refresh_from_db()
+        self.name = self.product.image.name
+        with default_storage.open(self.name) as file:
+            self.data = file.read()
+
+    def get(self, name, **headers):
+        res = self.client.get(media_url(name), **headers)
+        if res.streaming:
+            res.content_bytes = b''.join(res.streaming_content)
+        return res
+
+    def test_owner_gets_image(self):
+        """Test the whole file is streamed with validators."""
+        res = self.get(self.name)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.content_bytes, self.data)
+        self.assertEqual(res['Content-Type'], 'image/jpeg')
+        self.assertEqual(res['Content-Length'], str(len(self.data)))
+        self.assertEqual(res['Accept-Ranges'], 'bytes')
+        self.assertIn('ETag', res)
+        self.assertIn('Last-Modified', res)
+        self.assertIn('private', res['Cache-Control'])
+
+    def test_variant_served(self):
+        """Test the variants of an owned image are served."""
+        path = self.product.image_variants['thumbnail']['webp']
+
+        res = self.get(path)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'image/webp')
+
+    def test_other_user_not_found(self):
+        """Test images of other users are not served."""
+        self.client.force_authenticate(create_user('user2@example.com'))
+
+        res = self.get(self.name)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_auth_required(self):
+        """Test anonymous requests are refused."""
+        self.client.force_authenticate(None)
+
+        res = self.get(self.name)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_unreferenced_files_not_served(self):
+        """Test files no product uses, like upload parts, are hidden."""
+        default_storage.save('uploads/session.part', BytesIO(b'data'))
+
+        for name in ('uploads/session.part', f'{self.name}/../x.jpg'):
+            with self.subTest(name=name):
+                res = self.get(name)
+                self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_byte_range(self):
+        """Test ranges are answered with partial content."""
+        size = len(self.data)
+        cases = [
+            ('bytes=0-9', 0, 10),
+            ('bytes=100-', 100, size - 100),
+            ('bytes=-50', size - 50, 50),
+            (f'bytes=10-{size + 100}', 10, size - 10),
+        ]
+        for header, start, length in cases:
+            with self.subTest(header=header):
+                res = self.get(self.name, HTTP_RANGE=header)
+
+                self.assertEqual(res.status_code,
+                                 status.HTTP_206_PARTIAL_CONTENT)
+                self.assertEqual(res.content_bytes,
+                                 self.data[start:start + length])
+                self.assertEqual(res['Content-Length'], str(length))
+                self.assertEqual(
+                    res['Content-Range'],
+                    f'bytes {start}-{start + length - 1}/{size}',
+                )
+
+    def test_unsatisfiable_range(self):
+        """Test ranges past the end are refused."""
+        res = self.get(self.name, HTTP_RANGE=f'bytes={len(self.data)}-')
+
+        self.assertEqual(res.status_code,
+                         status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        self.assertEqual(res['Content-Range'], f'bytes */{len(self.data)}')
+
+    def test_unsupported_range_sends_whole_file(self):
+        """Test several or malformed ranges get the whole file."""
+        for header in ('bytes=0-1,5-6', 'bytes=9-1', 'items=0-1'):
+            with self.subTest(header=header):
+                res = self.get(self.name, HTTP_RANGE=header)
+
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                self.assertEqual(res.content_bytes, self.data)
+
+    def test_if_range(self):
+        """Test a stale If-Range validator gets the whole file."""
+        etag = self.get(self.name)['ETag']
+
+        fresh = self.get(self.name, HTTP_RANGE='bytes=0-9',
+                         HTTP_IF_RANGE=etag)
+        stale = self.get(self.name, HTTP_RANGE='bytes=0-9',
+                         HTTP_IF_RANGE='"stale"')
+
+        self.assertEqual(fresh.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(stale.status_code, status.HTTP_200_OK)
+        self.assertEqual(stale.content_bytes, self.data)
+
+    def test_conditional_requests(self):
+        """Test unchanged files are answered with 304."""
+        res = self.get(self.name)
+
+        for headers in ({'HTTP_IF_NONE_MATCH': res['ETag']},
+                        {'HTTP_IF_MODIFIED_SINCE': res['Last-Modified']}):
+            with self.subTest(headers=headers):
+                cached = self.get(self.name, **headers)
+                self.assertEqual(cached.status_code,
+                                 status.HTTP_304_NOT_MODIFIED)
+                self.assertEqual(cached['ETag'], res['ETag'])
+
+    @override_settings(MEDIA_ACCEL='x-accel-redirect',
+                       MEDIA_ACCEL_PREFIX='/protected/')
+    def test_x_accel_redirect(self):
+        """Test nginx is told to send the file."""
+        res = self.get(self.name)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['X-Accel-Redirect'], f'/protected/{self.name}')
+        self.assertEqual(res['Content-Type'], 'image/jpeg')
+        self.assertEqual(res.content, b'')
+
+    @override_settings(MEDIA_ACCEL='x-sendfile')
+    def test_x_sendfile(self):
+        """Test Apache is told the path of the file."""
+        res = self.get(self.name)
+
+        self.assertEqual(res['X-Sendfile'], default_storage.path(self.name))
+        self.assertEqual(res.content, b'')
+
+    @override_settings(MEDIA_ACCEL='x-accel-redirect')
+    def test_accel_checks_owner(self):
+        """Test the proxy is only sent owned files."""
+        self.client.force_authenticate(create_user('user2@example.com'))
+
+        res = self.get(self.name)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertNotIn('X-Accel-Redirect', res)
+
+
+class FileRangeTests(TestCase):
+    """Test ranges of open files."""
+
+    def test_reads_stop_at_range_end(self):
+        """Test the bytes after the range are never read."""
+        file_range = media.FileRange(BytesIO(b'0123456789'), 2, 5)
+
+        self.assertEqual(file_range.read(3), b'234')
+        self.assertEqual(file_range.read(8192), b'56')
+        self.assertEqual(file_range.read(8192), b'')
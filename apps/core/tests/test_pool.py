@@ -0,0 +1,233 @@
+"""
+Tests for the database connection pool.
+"""
+import threading
+import time
+
+import psycopg2
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TransactionTestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework import status
+
+from ..db.postgresql_pool.pool import (
+    ConnectionPool,
+    PoolTimeout,
+    current_pools,
+)
+
+
+DB_POOL_URL = reverse('core:db-pool')
+BRAND_LIST_URL = reverse('product:brand-list')
+
+
+class FakeConnection:
+    """Stand-in for a psycopg2 connection."""
+    autocommit = True
+
+    def __init__(self):
+        self.closed = 0
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        self.rollbacks = 0
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """Test checkouts, overflow, timeouts and eviction."""
+
+    def create_pool(self, **options):
+        options.setdefault('size', 2)
+        options.setdefault('max_overflow', 1)
+        options.setdefault('timeout', 0.05)
+        return ConnectionPool(**options)
+
+    def test_released_connection_reused(self):
+        """Test a returned connection is handed out again."""
+        pool = self.create_pool()
+        conn = pool.acquire(FakeConnection)
+        pool.release(conn)
+
+        self.assertIs(pool.acquire(FakeConnection), conn)
+        self.assertEqual(pool.stats()['open'], 1)
+
+    def test_overflow_closed_on_release(self):
+        """Test connections over the size are closed once returned."""
+        pool = self.create_pool()
+        conns = [pool.acquire(FakeConnection) for _ in range(3)]
+        for conn in conns:
+            pool.release(conn)
+
+        stats = pool.stats()
+        self.assertEqual((stats['open'], stats['idle'], stats['in_use']),
+                         (2, 2, 0))
+        self.assertEqual([conn.closed for conn in conns], [1, 0, 0])
+
+    def test_checkout_timeout(self):
+        """Test a full pool raises once the checkout timeout passes."""
+        pool = self.create_pool()
+        for _ in range(3):
+            pool.acquire(FakeConnection)
+
+        with self.assertRaises(PoolTimeout):
+            pool.acquire(FakeConnection)
+        self.assertEqual(pool.stats()['timeouts'], 1)
+
+    def test_waiter_gets_released_connection(self):
+        """Test a waiting checkout takes the next returned connection."""
+        pool = self.create_pool(max_overflow=0, timeout=5)
+        conns = [pool.acquire(FakeConnection) for _ in range(2)]
+        result = []
+        waiter = threading.Thread(
+            target=lambda: result.append(pool.acquire(FakeConnection))
+        )
+        waiter.start()
+        while not pool.stats()['waiting']:
+            time.sleep(0.001)
+
+        pool.release(conns[0])
+        waiter.join()
+
+        self.assertIs(result[0], conns[0])
+        self.assertEqual(pool.stats()['waiting'], 0)
+
+    def test_idle_connections_evicted(self):
+        """Test connections idle for too long are closed."""
+        pool = self.create_pool(max_idle=0)
+        conn = pool.acquire(FakeConnection)
+        pool.release(conn)
+
+        self.assertIsNot(pool.acquire(FakeConnection), conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.stats()['open'], 1)
+
+    def test_open_transaction_rolled_back(self):
+        """Test connections are returned without an open transaction."""
+        pool = self.create_pool()
+        conn = pool.acquire(FakeConnection)
+        conn.status = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+        pool.release(conn)
+
+        self.assertEqual(conn.rollbacks, 1)
+        self.assertIs(pool.acquire(FakeConnection), conn)
+
+    def test_broken_connection_discarded(self):
+        """Test closed connections are not returned to the pool."""
+        pool = self.create_pool()
+        conn = pool.acquire(FakeConnection)
+        conn.close()
+        pool.release(conn)
+
+        self.assertEqual(pool.stats()['open'], 0)
+        self.assertIsNot(pool.acquire(FakeConnection), conn)
+
+    def test_failed_connect_frees_slot(self):
+        """Test a failing connect does not use up the pool."""
+        pool = self.create_pool()
+
+        def connect():
+            raise psycopg2.OperationalError()
+
+        with self.assertRaises(psycopg2.OperationalError):
+            pool.acquire(connect)
+        self.assertEqual(pool.stats()['open'], 0)
+        self.assertEqual(pool.stats()['in_use'], 0)
+
+
+class PoolStressTests(TransactionTestCase):
+    """Test requests under load give back every connection."""
+    requests = 10000
+    threads = 4
+
+    def setUp(self):
+        user = get_user_model().objects.create_superuser(
+            'admin@example.com', 'Testpass123'
+        )
+        self.token = Token.objects.create(user=user).key
+        self.factory = RequestFactory()
+        self.handler = WSGIHandler()
+
+    def request(self, url):
+        environ = self.factory.get(
+            url, HTTP_AUTHORIZATION=f'Token {self.token}'
+        ).environ
+        response = self.handler(environ, lambda status, headers: None)
+        response.close()
+        return response
+
+    def get_pool(self):
+        key = ('default', connection.settings_dict['NAME'])
+        return next(pool for pool_key, pool in current_pools().items()
+                    if pool_key[:2] == key)
+
+    def test_no_leaked_connections(self):
+        """Test 10k concurrent requests leave no connection checked out."""
+        connection.close()
+        failures = []
+        per_thread = self.requests // self.threads
+
+        def client():
+            for i in range(per_thread):
+                url = BRAND_LIST_URL if i % 2 else DB_POOL_URL
+                if self.request(url).status_code != status.HTTP_200_OK:
+                    failures.append(url)
+
+        threads = [threading.Thread(target=client)
+                   for _ in range(self.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(failures, [])
+        pool = self.get_pool()
+        stats = pool.stats()
+        self.assertEqual(stats['in_use'], 0)
+        self.assertEqual(stats['waiting'], 0)
+        self.assertEqual(stats['timeouts'], 0)
+        self.assertLessEqual(stats['open'], stats['size'])
+        self.assertGreaterEqual(stats['checkouts'], self.requests)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT count(*) FROM pg_stat_activity '
+                'WHERE datname = current_database()'
+            )
+            server_connections = cursor.fetchone()[0]
+        # Every server connection is one the pool knows about.
+        self.assertEqual(server_connections, pool.stats()['open'])
+
+    def test_metrics(self):
+        """Test the pool metrics endpoint reports the pool."""
+        res = self.request(DB_POOL_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        pools = [pool for pool in res.data['pools']
+                 if pool['database'] == connection.settings_dict['NAME']]
+        self.assertEqual(pools[0]['alias'], 'default')
+        self.assertEqual(pools[0]['in_use'], 1)
+        self.assertIn('checkout_ms_avg', pools[0])
+
+    def test_metrics_admin_only(self):
+        """Test pool metrics require an admin user."""
+        user = get_user_model().objects.create_user('test@example.com',
+                                                    'Testpass123')
+        token = Token.objects.create(user=user).key
+        environ = self.factory.get(
+            DB_POOL_URL, HTTP_AUTHORIZATION=f'Token {token}'
+        ).environ
+        res = self.handler(environ, lambda status, headers: None)
+        res.close()
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
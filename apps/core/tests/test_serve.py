@@ -0,0 +1,52 @@
+"""
+Tests for the serve command.
+"""
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, override_settings
+
+
+LOCAL_CACHE = {'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+}}
+SHARED_CACHE = {'default': {
+    'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+    'LOCATION': 'redis://cache:6379/0',
+}}
+
+
+@mock.patch('apps.core.management.commands.serve.Application')
+class ServeCommandTests(SimpleTestCase):
+    """Test the number of workers follows the cache backend."""
+
+    def serve(self, *args):
+        call_command('serve', *args, stdout=mock.Mock())
+
+    def workers(self, application):
+        options = application.call_args.args[0]
+        return options['workers']
+
+    @override_settings(CACHES=LOCAL_CACHE)
+    def test_local_cache_single_worker(self, application):
+        """Test a per-process cache is served by one worker."""
+        self.serve()
+
+        self.assertEqual(self.workers(application), 1)
+
+    @override_settings(CACHES=LOCAL_CACHE)
+    def test_local_cache_refuses_workers(self, application):
+        """Test several workers are refused on a per-process cache."""
+        with self.assertRaises(CommandError):
+            self.serve('--workers', '3')
+
+        application.assert_not_called()
+
+    @override_settings(CACHES=SHARED_CACHE)
+    @mock.patch('os.cpu_count', return_value=4)
+    def test_shared_cache_workers(self, cpu_count, application):
+        """Test a shared cache gets 2 workers per CPU plus 1."""
+        self.serve()
+
+        self.assertEqual(self.workers(application), 9)
@@ -0,0 +1,84 @@
+"""
+Tests for the taxonomy cache.
+"""
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+
+from .. import taxonomy
+from ..models import (
+    Group,
+    Category,
+    Product,
+)
+
+
+def create_user(email='user1@example.com', password='Testpass123'):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(email, password)
+
+
+class TaxonomyCacheTests(TestCase):
+    """Test the taxonomy cache."""
+
+    def setUp(self):
+        cache.clear()
+        taxonomy.reset_stats()
+        self.user = create_user()
+        self.group = Group.objects.get(name='Skin care', user=self.user)
+
+    def create_product(self, name='Test product'):
+        return Product.objects.create(user=self.user, name=name,
+                                      group=self.group, capacity=50)
+
+    def test_default_category_cached(self):
+        """Test only the first product save looks up the default category."""
+        first = self.create_product()
+
+        with CaptureQueriesContext(connection) as queries:
+            second = self.create_product()
+
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(taxonomy.stats, {'hits': 1, 'misses': 1})
+        self.assertEqual(first.category.name, 'Other')
+        self.assertEqual(second.category_id, first.category_id)
+
+    def test_default_category_invalidated_on_change(self):
+        """Test replacing the default category drops the cached id."""
+        old = self.create_product().category
+        old.name = 'Old other'
+        old.save()
+        new = Category.objects.create(name='Other', group=self.group,
+                                      user=self.user)
+
+        product = self.create_product()
+
+        self.assertEqual(product.category, new)
+        self.assertEqual(taxonomy.stats['misses'], 2)
+
+    def test_default_category_invalidated_on_move(self):
+        """Test moving the default category to another group."""
+        category = self.create_product().category
+        category.group = Group.objects.get(name='Other', user=self.user)
+        category.save()
+
+        with self.assertRaises(Category.DoesNotExist):
+            self.create_product()
+
+    def test_group_ids_cached_and_invalidated(self):
+        """Test the user groups are cached until a group changes."""
+        group_ids = taxonomy.get_group_ids(self.user.id)
+        taxonomy.get_group_ids(self.user.id)
+
+        self.assertEqual(group_ids, set(
+            Group.objects.filter(user=self.user).values_list('id', flat=True)
+        ))
+        self.assertEqual(taxonomy.stats, {'hits': 1, 'misses': 1})
+
+        group = Group.objects.create(name='New group', user=self.user)
+
+        self.assertIn(group.id, taxonomy.get_group_ids(self.user.id))
+        self.assertEqual(taxonomy.stats['misses'], 2)
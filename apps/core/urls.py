@@ -0,0 +1,13 @@
+"""
+URL mappings for the operational API.
+"""
+from django.urls import path
+
+from .views import DatabasePoolView
+
+
+app_name = 'core'
+
+urlpatterns = [
+    path('db-pool/', DatabasePoolView.as_view(), name='db-pool'),
+]
@@ -0,0 +1,56 @@
+"""
+Per-user version counters of the catalog resources.
+
+Every resource (brand, store, group, category, product and blacklist) of a
+user has a counter in Django's cache, bumped by the signal receivers in
+`apps.core.signals` and by the bulk write paths. The API derives ETags from
+the counters, so polls of unchanged data are answered without queries.
+
+Counters start at the current time in nanoseconds, so a counter evicted
+from the cache never comes back with a value it had before.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+CACHE_TIMEOUT = None
+
+
+def version_key(user_id, resource):
+    return f'versions:{user_id}:{resource}'
+
+
+def get_versions(user_id, resources):
+    """Return the versions of the resources of a user, in order."""
+    keys = [version_key(user_id, resource) for resource in resources]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            version = time.time_ns()
+            cache.add(key, version, CACHE_TIMEOUT)
+            # A cache not keeping the counter gives no 304, not stale ones.
+            stored = cache.get(key)
+            versions[key] = version if stored is None else stored
+    return [versions[key] for key in keys]
+
+
+def increment(keys):
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), CACHE_TIMEOUT)
+
+
+def bump(user_id, *resources):
+    """Change the versions of the resources of a user.
+
+    Inside a transaction the versions are bumped again on commit, so an
+    ETag computed from uncommitted data does not survive the commit.
+    """
+    keys = [version_key(user_id, resource) for resource in resources]
+    increment(keys)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: increment(keys))
@@ -0,0 +1,48 @@
+"""
+Operational views of the API.
+"""
+from django.http import Http404
+from drf_spectacular.utils import extend_schema
+from rest_framework import permissions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.core import media
+from apps.core.db.postgresql_pool.pool import current_pools
+from apps.user.authentication import SignedTokenAuthentication
+
+
+@extend_schema(responses={200: dict})
+class DatabasePoolView(APIView):
+    """Report the connection pools of the serving process."""
+    authentication_classes = [SignedTokenAuthentication,
+                              TokenAuthentication]
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        pools = [
+            {'alias': alias, 'database': database, **pool.stats()}
+            for (alias, database, *_), pool in current_pools().items()
+        ]
+        return Response({'pools': pools})
+
+
+@extend_schema(exclude=True)
+class MediaView(APIView):
+    """Serve product images and their variants to the product owner."""
+    authentication_classes = [SignedTokenAuthentication,
+                              TokenAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def perform_content_negotiation(self, request, force=False):
+        # Files are sent as they are, whatever the client accepts.
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, name):
+        if not media.is_owner(request.user, name):
+            raise Http404()
+        try:
+            return media.serve(request, name)
+        except FileNotFoundError:
+            raise Http404()
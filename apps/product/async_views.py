@@ -0,0 +1,185 @@
+"""
+Async read-only views of the product API.
+
+Under ASGI these views run on the event loop instead of hopping to a worker
+thread for every request. Authentication, counts and page reads use the
+async ORM. Related objects are prefetched by hand, since `aiterator()` does
+not support `prefetch_related()`. The loaded objects are then serialized by
+the API serializers, so responses match the sync views.
+"""
+from collections import defaultdict
+
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from apps.core.ingredients import filter_by_ingredients
+from apps.core.matching import get_blacklist_matcher
+from apps.core.models import (
+    Brand,
+    Store,
+    Group,
+    Category,
+    Product,
+    Blacklist,
+)
+from apps.user.authentication import (
+    SignedTokenAuthentication,
+    aauthenticate,
+)
+from . import serializers
+from .pagination import AsyncLimitOffsetPagination
+
+
+def set_prefetched(instance, name, objects):
+    """Store objects as the prefetched result of a related manager."""
+    queryset = getattr(instance, name).all()
+    queryset._result_cache = objects
+    queryset._prefetch_done = True
+    if not hasattr(instance, '_prefetched_objects_cache'):
+        instance._prefetched_objects_cache = {}
+    instance._prefetched_objects_cache[name] = queryset
+
+
+class AsyncCatalogView(View):
+    """List or, given a `pk`, retrieve objects of the request user."""
+    http_method_names = ['get', 'head', 'options']
+    model = None
+    serializer_class = None
+    list_serializer_class = None
+    ordering = ('-name', '-id')
+    renderer = JSONRenderer()
+
+    async def get(self, request, pk=None, **kwargs):
+        try:
+            user = await aauthenticate(request)
+            if user is None:
+                raise exceptions.NotAuthenticated()
+        except exceptions.APIException as exc:
+            response = self.render({'detail': exc.detail},
+                                   status.HTTP_401_UNAUTHORIZED)
+            response['WWW-Authenticate'] = SignedTokenAuthentication.keyword
+            return response
+
+        request = Request(request)
+        request.user = user
+        queryset = self.get_queryset(request, **kwargs).order_by(
+            *self.ordering
+        )
+        if pk is None:
+            paginator = AsyncLimitOffsetPagination()
+            objects = await paginator.apaginate_queryset(queryset, request)
+        else:
+            obj = await queryset.filter(pk=pk).afirst()
+            if obj is None:
+                return self.render(
+                    {'detail': exceptions.NotFound.default_detail},
+                    status.HTTP_404_NOT_FOUND,
+                )
+            objects = [obj]
+
+        await self.prefetch(objects)
+        context = await self.get_serializer_context(request)
+        if pk is not None:
+            return self.render(
+                self.serializer_class(objects[0], context=context).data
+            )
+        serializer_class = self.list_serializer_class or self.serializer_class
+        data = serializer_class(objects, many=True, context=context).data
+        return self.render(paginator.get_paginated_data(data))
+
+    def get_queryset(self, request, **kwargs):
+        return self.model.objects.filter(user=request.user)
+
+    async def prefetch(self, objects):
+        """Load the related objects needed by the serializer."""
+
+    async def get_serializer_context(self, request):
+        return {'request': request}
+
+    def render(self, data, status_code=status.HTTP_200_OK):
+        return HttpResponse(self.renderer.render(data),
+                            content_type='application/json',
+                            status=status_code)
+
+
+class BrandAsyncView(AsyncCatalogView):
+    """List and retrieve brands."""
+    model = Brand
+    serializer_class = serializers.BrandSerializer
+
+
+class StoreAsyncView(AsyncCatalogView):
+    """List and retrieve stores."""
+    model = Store
+    serializer_class = serializers.StoreSerializer
+
+
+class GroupAsyncView(AsyncCatalogView):
+    """List and retrieve groups with their categories."""
+    model = Group
+    serializer_class = serializers.GroupSerializer
+
+    async def prefetch(self, groups):
+        categories = defaultdict(list)
+        queryset = Category.objects.filter(group__in=groups)
+        async for category in queryset.aiterator():
+            categories[category.group_id].append(category)
+        for group in groups:
+            set_prefetched(group, 'categories', categories[group.id])
+
+
+class CategoryAsyncView(AsyncCatalogView):
+    """List and retrieve categories of a group."""
+    model = Category
+    serializer_class = serializers.CategorySerializer
+
+    def get_queryset(self, request, group_id=None, **kwargs):
+        return super().get_queryset(request).filter(group_id=group_id)
+
+
+class ProductAsyncView(AsyncCatalogView):
+    """List and retrieve products, filtered like the product viewset."""
+    model = Product
+    serializer_class = serializers.ProductSerializer
+    list_serializer_class = serializers.ProductListSerializer
+
+    def get_queryset(self, request, **kwargs):
+        queryset = super().get_queryset(request).select_related(
+            'brand',
+            'group',
+            'category',
+        ).defer('search_vector')
+        params = request.query_params
+        return filter_by_ingredients(
+            queryset,
+            contains=self.split_param(params.get('contains', '')),
+            excludes=self.split_param(params.get('excludes', '')),
+        )
+
+    @staticmethod
+    def split_param(value):
+        return [name for name in value.split(',') if name.strip()]
+
+    async def prefetch(self, products):
+        stores = defaultdict(list)
+        Through = Product.stores.through
+        links = Through.objects.filter(
+            product__in=products
+        ).select_related('store').order_by('store_id')
+        async for link in links.aiterator():
+            stores[link.product_id].append(link.store)
+        for product in products:
+            set_prefetched(product, 'stores', stores[product.id])
+
+    async def get_serializer_context(self, request):
+        context = await super().get_serializer_context(request)
+        try:
+            blacklist = await Blacklist.objects.aget(user=request.user)
+        except Blacklist.DoesNotExist:
+            context['blacklist_matcher'] = None
+        else:
+            context['blacklist_matcher'] = get_blacklist_matcher(blacklist)
+        return context
@@ -0,0 +1,136 @@
+"""
+Batches of operations against the catalog endpoints.
+
+Every operation is dispatched to the viewset serving its path, as the
+request of the batch with another method, path and JSON body. The user
+authenticated by the batch is forced on each of them, so tokens are
+checked once. An operation with a `ref` can be referred to by later ones:
+`{"$ref": "name"}` in a body and `{name}` in a path stand for the id of
+the object it returned.
+"""
+import copy
+import io
+import json
+import re
+from urllib.parse import urlsplit
+
+from django.db import IntegrityError, transaction
+from django.http import QueryDict
+from django.urls import Resolver404, resolve, reverse
+from rest_framework import exceptions, status
+
+
+REF_KEY = '$ref'
+PATH_REF = re.compile(r'\{(\w+)\}')
+ACTIONS = ('list', 'create', 'retrieve', 'update', 'partial_update',
+           'destroy')
+
+
+class OperationFailed(Exception):
+    """Raised to roll the batch back after a failed operation."""
+
+
+def resolve_refs(value, refs):
+    """Return the value with its references replaced by ids."""
+    if isinstance(value, dict):
+        if set(value) == {REF_KEY}:
+            return lookup(value[REF_KEY], refs)
+        return {key: resolve_refs(item, refs) for key, item in value.items()}
+    if isinstance(value, list):
+        return [resolve_refs(item, refs) for item in value]
+    return value
+
+
+def lookup(name, refs):
+    try:
+        return refs[name]
+    except (KeyError, TypeError):
+        raise exceptions.ValidationError({
+            'detail': f'Unknown reference: {name}.'
+        })
+
+
+def resolve_path(path, refs):
+    """Return the absolute path with its references replaced by ids."""
+    path = PATH_REF.sub(lambda match: str(lookup(match[1], refs)), path)
+    if not path.startswith('/'):
+        path = reverse('product:api-root') + path
+    return path
+
+
+def build_request(request, method, path, body):
+    """Return a copy of the request for one operation of the batch."""
+    parts = urlsplit(path)
+    content = b'' if body is None else json.dumps(body).encode()
+    sub = copy.copy(request._request)
+    sub.method = method
+    sub.path = sub.path_info = parts.path
+    sub.META = {
+        key: value for key, value in sub.META.items()
+        if not key.startswith('HTTP_IF_')
+    }
+    sub.META.update({
+        'REQUEST_METHOD': method,
+        'PATH_INFO': parts.path,
+        'QUERY_STRING': parts.query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(content)),
+        'HTTP_ACCEPT': 'application/json',
+    })
+    sub.GET = QueryDict(parts.query)
+    for attr in ('_body', '_post', '_files'):
+        sub.__dict__.pop(attr, None)
+    sub._stream = io.BytesIO(content)
+    sub._read_started = False
+    sub._force_auth_user = request.user
+    sub._force_auth_token = request.auth
+    return sub
+
+
+def run_operation(request, operation, refs, viewsets):
+    """Dispatch one operation and return its status and data."""
+    method = operation['method']
+    path = resolve_path(operation['path'], refs)
+    try:
+        match = resolve(urlsplit(path).path)
+    except Resolver404:
+        raise exceptions.NotFound()
+    view = match.func
+    if getattr(view, 'cls', None) not in viewsets:
+        raise exceptions.NotFound()
+    if view.actions.get(method.lower()) not in ACTIONS:
+        raise exceptions.MethodNotAllowed(method)
+    sub = build_request(request, method, path,
+                        resolve_refs(operation.get('body'), refs))
+    sub.resolver_match = match
+    try:
+        # A savepoint, so a failed write leaves the batch usable.
+        with transaction.atomic():
+            response = view(sub, *match.args, **match.kwargs)
+    except IntegrityError as exc:
+        raise exceptions.ValidationError({
+            'detail': 'The objects conflict with existing ones.'
+        }) from exc
+    return response.status_code, response.data
+
+
+def run(request, operations, viewsets):
+    """Run the operations in order and return their results.
+
+    Stops at the first failed operation and raises `OperationFailed`
+    with the results so far, the caller rolls the batch back.
+    """
+    refs = {}
+    results = []
+    for operation in operations:
+        try:
+            code, data = run_operation(request, operation, refs, viewsets)
+        except exceptions.APIException as exc:
+            code, data = exc.status_code, exc.detail
+        results.append({'status': code, 'body': data})
+        if not status.is_success(code):
+            raise OperationFailed(results)
+        ref = operation.get('ref')
+        if ref and isinstance(data, dict) and 'id' in data:
+            refs[ref] = data['id']
+    return results
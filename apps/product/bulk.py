@@ -0,0 +1,151 @@
+"""
+Bulk create, update and delete of brands, stores and categories.
+
+A list POSTed to a collection is created with one `bulk_create`, a list
+PATCHed to it updates the objects of its ids with one `bulk_update` and a
+DELETE with `{"ids": [...]}` removes them with one filtered `delete()`.
+The whole list is validated before anything is written.
+"""
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from rest_framework import exceptions, routers, serializers, status
+from rest_framework.response import Response
+
+from apps.core import versions
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """List serializer writing its objects with one query.
+
+    `Meta.bulk_read_only_fields` of the child are not written in bulk,
+    like the group of categories, which comes from the URL.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name in getattr(self.child.Meta, 'bulk_read_only_fields', ()):
+            self.child.fields[name].read_only = True
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        return model.objects.bulk_create([
+            model(**attrs) for attrs in validated_data
+        ])
+
+    def update(self, instances, validated_data):
+        fields = set()
+        for instance, attrs in zip(instances, validated_data):
+            for name, value in attrs.items():
+                setattr(instance, name, value)
+            fields.update(attrs)
+        if fields:
+            self.child.Meta.model.objects.bulk_update(instances,
+                                                      sorted(fields))
+        return instances
+
+
+class BulkDeleteSerializer(serializers.Serializer):
+    """Serializer for the ids of a bulk delete."""
+    ids = serializers.ListField(child=serializers.IntegerField(),
+                                allow_empty=False,
+                                max_length=settings.BULK_MAX_SIZE)
+
+
+def get_ids(data):
+    """Return the ids of the objects of a bulk update, in order."""
+    if not isinstance(data, list) or not data:
+        raise exceptions.ValidationError({
+            'detail': 'Send a list of objects with their ids.'
+        })
+    if len(data) > settings.BULK_MAX_SIZE:
+        raise exceptions.ValidationError({
+            'detail': f'Send at most {settings.BULK_MAX_SIZE} objects.'
+        })
+    ids = [item.get('id') if isinstance(item, dict) else None
+           for item in data]
+    if not all(type(pk) is int for pk in ids):
+        raise exceptions.ValidationError({
+            'id': ['Every object needs an integer id.']
+        })
+    if len(ids) != len(set(ids)):
+        raise exceptions.ValidationError({'id': ['Ids must be unique.']})
+    return ids
+
+
+class BulkRouter(routers.DefaultRouter):
+    """Router sending PATCH and DELETE of collections to the bulk
+    actions of viewsets that have them."""
+    routes = [
+        route._replace(mapping={**route.mapping,
+                                'patch': 'bulk_update',
+                                'delete': 'bulk_destroy'})
+        if route.name == '{basename}-list' else route
+        for route in routers.DefaultRouter.routes
+    ]
+
+
+class BulkModelMixin:
+    """Create, update and delete lists of objects in one request.
+
+    Bulk writes send no signals, so `bulk_written()` bumps the version of
+    the resource itself.
+    """
+
+    def create(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            return super().create(request, *args, **kwargs)
+        if len(request.data) > settings.BULK_MAX_SIZE:
+            raise exceptions.ValidationError({
+                'detail': f'Send at most {settings.BULK_MAX_SIZE} objects.'
+            })
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        with self.bulk_write():
+            self.perform_create(serializer)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def bulk_update(self, request, *args, **kwargs):
+        """Update the objects of the ids of a list."""
+        ids = get_ids(request.data)
+        with transaction.atomic():
+            found = self.get_queryset().select_for_update().in_bulk(ids)
+            missing = [pk for pk in ids if pk not in found]
+            if missing:
+                raise exceptions.ValidationError({
+                    'id': [f'Not found: {", ".join(map(str, missing))}.']
+                })
+            serializer = self.get_serializer(
+                [found[pk] for pk in ids], data=request.data,
+                many=True, partial=True,
+            )
+            serializer.is_valid(raise_exception=True)
+            with self.bulk_write():
+                serializer.save()
+        return Response(serializer.data)
+
+    def bulk_destroy(self, request, *args, **kwargs):
+        """Delete the objects of a list of ids."""
+        serializer = BulkDeleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        self.get_queryset().filter(
+            id__in=serializer.validated_data['ids']
+        ).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @contextmanager
+    def bulk_write(self):
+        """Write in a savepoint and invalidate after the write."""
+        try:
+            with transaction.atomic():
+                yield
+        except IntegrityError as exc:
+            raise exceptions.ValidationError({
+                'detail': 'The objects conflict with existing ones.'
+            }) from exc
+        self.bulk_written()
+
+    def bulk_written(self):
+        versions.bump(self.request.user.id,
+                      self.queryset.model._meta.model_name)
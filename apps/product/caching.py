@@ -0,0 +1,147 @@
+"""
+HTTP and response caching of the product API.
+"""
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.utils.cache import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from apps.core import versions
+
+
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 5
+LOCK_POLL_INTERVAL = 0.01
+
+stats = {'hits': 0, 'misses': 0}
+
+
+def reset_stats():
+    """Reset the hit and miss counters."""
+    stats.update(hits=0, misses=0)
+
+
+def get_or_build(key, build, timeout):
+    """Return the cached value of key, building it on a miss.
+
+    Only one caller builds a missing value at a time: the others wait for
+    it instead of running the same build, and build it themselves only if
+    the lock is not released in time. None values are not cached.
+    """
+    value = cache.get(key)
+    if value is not None:
+        stats['hits'] += 1
+        return value
+    lock_key = f'{key}:lock'
+    deadline = time.monotonic() + LOCK_WAIT
+    while not cache.add(lock_key, 1, LOCK_TIMEOUT):
+        time.sleep(LOCK_POLL_INTERVAL)
+        value = cache.get(key)
+        if value is not None:
+            stats['hits'] += 1
+            return value
+        if time.monotonic() > deadline:
+            stats['misses'] += 1
+            return build()
+    stats['misses'] += 1
+    try:
+        value = build()
+        if value is not None:
+            cache.set(key, value, timeout)
+    finally:
+        cache.delete(lock_key)
+    return value
+
+
+class ConditionalGetMixin:
+    """Answer `If-None-Match` from the catalog version counters.
+
+    The ETag of list and detail responses is derived from the user's
+    versions of `etag_resources`, so a client polling unchanged data gets
+    a 304 Not Modified before any query runs.
+    """
+    etag_resources = ()
+
+    def get_resource_versions(self, request):
+        """Return the versions of `etag_resources`, read once per request."""
+        if not hasattr(self, '_resource_versions'):
+            self._resource_versions = versions.get_versions(
+                request.user.id, self.etag_resources
+            )
+        return self._resource_versions
+
+    def get_etag(self, request):
+        values = self.get_resource_versions(request)
+        key = '|'.join([
+            str(request.user.id),
+            request.get_full_path(),
+            request.accepted_media_type,
+            *map(str, values),
+        ])
+        return quote_etag(hashlib.md5(key.encode()).hexdigest())
+
+    def conditional(self, handler, request, *args, **kwargs):
+        """Run the handler unless the client has the current response."""
+        if not self.etag_resources:
+            return handler(request, *args, **kwargs)
+        etag = self.get_etag(request)
+        client_etags = parse_etags(request.headers.get('If-None-Match', ''))
+        if etag in client_etags or f'W/{etag}' in client_etags:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (status.HTTP_200_OK,
+                                    status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
+
+
+class ResponseCacheMixin:
+    """Cache the serialized data of list and detail responses.
+
+    Entries are keyed by user, absolute URL, which holds the pagination
+    window, and the versions of `etag_resources`, so any change to those
+    resources moves the view to new keys. Put it after
+    `ConditionalGetMixin` so 304 answers skip the cache entirely.
+    """
+    response_cache_timeout = 60 * 60
+
+    def get_response_cache_key(self, request):
+        key = '|'.join([
+            str(request.user.id),
+            request.build_absolute_uri(),
+            *map(str, self.get_resource_versions(request)),
+        ])
+        return f'responses:{hashlib.md5(key.encode()).hexdigest()}'
+
+    def cached(self, handler, request, *args, **kwargs):
+        """Return the cached response data or run the handler."""
+        response = None
+
+        def build():
+            nonlocal response
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return None
+            return response.data
+
+        data = get_or_build(self.get_response_cache_key(request), build,
+                            self.response_cache_timeout)
+        if response is not None:
+            return response
+        return Response(data)
+
+    def list(self, request, *args, **kwargs):
+        return self.cached(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached(super().retrieve, request, *args, **kwargs)
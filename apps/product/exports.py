@@ -0,0 +1,56 @@
+"""
+Streaming export of a user's product catalog.
+"""
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db.models import OuterRef
+
+from apps.core.models import Store, Product
+
+
+EXPORT_FIELDS = [
+    'id',
+    'name',
+    'brand',
+    'group',
+    'category',
+    'stores',
+    'price',
+    'ingredients',
+    'capacity',
+    'unit',
+    'is_available',
+    'is_favourite',
+]
+
+
+def iter_catalog_rows(user, chunk_size=2000):
+    """Yield the user's products as flat rows.
+
+    Rows are read through a server-side cursor `chunk_size` at a time, with
+    related names joined and store names aggregated in the same query, so
+    memory use does not depend on the size of the catalog. The columns
+    match the ones accepted by the product import.
+    """
+    store_names = ArraySubquery(
+        Store.objects.filter(product=OuterRef('pk'))
+        .order_by('name')
+        .values('name')
+    )
+    queryset = Product.objects.filter(user=user).annotate(
+        store_names=store_names,
+    ).order_by('id').values_list(
+        'id',
+        'name',
+        'brand__name',
+        'group__name',
+        'category__name',
+        'store_names',
+        'price',
+        'ingredients',
+        'capacity',
+        'unit',
+        'is_available',
+        'is_favourite',
+    )
+    for values in queryset.iterator(chunk_size=chunk_size):
+        yield dict(zip(EXPORT_FIELDS, values))
@@ -0,0 +1,143 @@
+"""
+Sparse fieldsets and expanded relations of product responses.
+
+`?fields=id,name` limits a response to the listed fields and
+`?expand=brand,category,stores` replaces the primary keys of those
+relations with their objects. The fields left also shape the SQL:
+`shape_queryset()` loads only their columns with `.only()`, and joins or
+prefetches a relation only when one of the fields reads it.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import exceptions, serializers
+
+
+class FieldsetSerializerMixin:
+    """Apply the `fields` and `expand` of the serializer context.
+
+    `expandable_fields` maps a relation to the serializer class and
+    arguments of its expanded form, `method_field_sources` the method
+    fields to the model fields they read.
+    """
+    expandable_fields = {}
+    method_field_sources = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        for name in self.context.get('expand', ()):
+            serializer_class, kwargs = self.expandable_fields[name]
+            fields[name] = serializer_class(read_only=True, **kwargs)
+        selected = self.context.get('fields')
+        if selected is not None:
+            fields = {name: field for name, field in fields.items()
+                      if name in selected}
+        return fields
+
+
+def split_names(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def parse_fieldset(params, serializer_class):
+    """Return the selected fields, None for all, and the relations to
+    expand of the query parameters."""
+    fields = split_names(params.get('fields', '')) or None
+    expand = split_names(params.get('expand', ''))
+    unknown = set(fields or ()) - set(serializer_class.Meta.fields)
+    if unknown:
+        raise exceptions.ValidationError({
+            'fields': [f'Unknown fields: {", ".join(sorted(unknown))}.']
+        })
+    unknown = set(expand) - set(serializer_class.expandable_fields)
+    if unknown:
+        raise exceptions.ValidationError({
+            'expand': [f'Choose from: '
+                       f'{", ".join(serializer_class.expandable_fields)}.']
+        })
+    if fields is not None:
+        expand = [name for name in expand if name in fields]
+    return fields, tuple(expand)
+
+
+def related_columns(field):
+    """Return the columns of the related model a relation field reads."""
+    if isinstance(field, serializers.ListSerializer):
+        field = field.child
+    if isinstance(field, serializers.Serializer):
+        return {'__'.join(child.source_attrs)
+                for child in field.fields.values()}
+    if isinstance(field, serializers.ManyRelatedField):
+        field = field.child_relation
+    if isinstance(field, serializers.SlugRelatedField):
+        return {field.slug_field}
+    return set(field.source_attrs[1:2])
+
+
+def shape_queryset(queryset, serializer):
+    """Load only what the fields of the serializer read."""
+    meta = queryset.model._meta
+    columns = {meta.pk.name}
+    joins = set()
+    prefetches = {}
+    for name, field in serializer.fields.items():
+        if isinstance(field, serializers.SerializerMethodField):
+            columns.update(serializer.method_field_sources.get(name, ()))
+            continue
+        if not field.source_attrs:
+            continue
+        source = field.source_attrs[0]
+        try:
+            model_field = meta.get_field(source)
+        except FieldDoesNotExist:
+            # An annotation, like the search rank.
+            continue
+        if model_field.many_to_many:
+            prefetches.setdefault(source, {'id'}).update(
+                related_columns(field)
+            )
+        elif model_field.is_relation and (
+                isinstance(field, serializers.Serializer)
+                or len(field.source_attrs) > 1):
+            joins.add(source)
+            columns.add(source)
+            columns.update(f'{source}__{column}'
+                           for column in related_columns(field))
+        else:
+            columns.add(source)
+
+    queryset = queryset.only(*columns)
+    if joins:
+        queryset = queryset.select_related(*sorted(joins))
+    for source, related in prefetches.items():
+        related_model = meta.get_field(source).related_model
+        queryset = queryset.prefetch_related(Prefetch(
+            source,
+            queryset=related_model.objects.only(*related).order_by('id'),
+        ))
+    return queryset
+
+
+class FieldsetMixin:
+    """Read `?fields=` and `?expand=` in `fieldset_actions`."""
+    fieldset_actions = ('list', 'retrieve')
+
+    def get_fieldset(self):
+        """Return the selected fields and expanded relations."""
+        if not hasattr(self, '_fieldset'):
+            self._fieldset = (None, ())
+            if self.action in self.fieldset_actions:
+                self._fieldset = parse_fieldset(self.request.query_params,
+                                                self.get_serializer_class())
+        return self._fieldset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'], context['expand'] = self.get_fieldset()
+        return context
+
+    def shape_queryset(self, queryset):
+        fields, expand = self.get_fieldset()
+        serializer = self.get_serializer_class()(
+            context={'fields': fields, 'expand': expand}
+        )
+        return shape_queryset(queryset, serializer)
@@ -0,0 +1,248 @@
+"""
+Streaming bulk import of products.
+"""
+import codecs
+import csv
+import json
+from itertools import islice
+from operator import itemgetter
+
+from django.db import transaction
+from rest_framework import serializers
+
+from apps.core.choices import PRICES, UNITS
+from apps.core import versions
+from apps.core.ingredients import sync_ingredients
+from apps.core.models import (
+    Brand,
+    Store,
+    Group,
+    Category,
+    Product,
+)
+
+
+CSV_CONTENT_TYPES = ('text/csv',)
+JSONL_CONTENT_TYPES = (
+    'application/x-ndjson',
+    'application/jsonl',
+    'application/json-lines',
+)
+STORE_SEPARATOR = '|'
+
+
+class NameListField(serializers.ListField):
+    """List of names, also accepted as a '|' separated string."""
+    child = serializers.CharField(max_length=100)
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            data = [name.strip() for name in data.split(STORE_SEPARATOR)
+                    if name.strip()]
+        return super().to_internal_value(data)
+
+
+class ProductImportRowSerializer(serializers.Serializer):
+    """Serializer validating a single imported product row."""
+    name = serializers.CharField(max_length=255)
+    brand = serializers.CharField(max_length=100, required=False)
+    group = serializers.CharField(max_length=100)
+    category = serializers.CharField(max_length=100, required=False)
+    stores = NameListField(required=False)
+    price = serializers.ChoiceField(choices=PRICES, required=False)
+    ingredients = serializers.CharField(required=False, allow_blank=True)
+    capacity = serializers.FloatField()
+    unit = serializers.ChoiceField(choices=UNITS, required=False)
+    is_available = serializers.BooleanField(required=False)
+    is_favourite = serializers.BooleanField(required=False)
+
+
+def read_jsonl(stream):
+    """Yield (line number, row) pairs from a JSON Lines stream."""
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row
+
+
+def read_csv(stream):
+    """Yield (line number, row) pairs from a CSV stream with a header."""
+    reader = csv.DictReader(codecs.iterdecode(stream, 'utf-8'))
+    for row in reader:
+        yield reader.line_num, {
+            key: value for key, value in row.items()
+            if key is not None and value != ''
+        }
+
+
+class ProductImporter:
+    """Validate and insert streamed product rows chunk by chunk.
+
+    Brand, category and store names of every chunk are resolved with one
+    query per model, missing brands and stores are created, and products
+    and their stores are written with `bulk_create`. Invalid rows are
+    reported and skipped without aborting the import.
+    """
+    chunk_size = 1000
+
+    def __init__(self, user, chunk_size=None):
+        self.user = user
+        if chunk_size is not None:
+            self.chunk_size = chunk_size
+        self.row_serializer = ProductImportRowSerializer()
+        self.created = 0
+        self.errors = []
+
+    @classmethod
+    def get_reader(cls, content_type):
+        """Return the row reader for a content type or None."""
+        content_type = content_type.partition(';')[0].strip().lower()
+        if content_type in CSV_CONTENT_TYPES:
+            return read_csv
+        if content_type in JSONL_CONTENT_TYPES:
+            return read_jsonl
+        return None
+
+    def run(self, rows):
+        """Import (line number, row) pairs and return the summary."""
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            self.import_chunk(chunk)
+        # Name errors of a chunk are found after its validation errors.
+        self.errors.sort(key=itemgetter('line'))
+        return {
+            'created': self.created,
+            'failed': len(self.errors),
+            'errors': self.errors,
+        }
+
+    def add_error(self, line, errors):
+        self.errors.append({'line': line, 'errors': errors})
+
+    def validate_chunk(self, chunk):
+        """Return (line number, validated data) pairs of valid rows."""
+        valid = []
+        for line, row in chunk:
+            if not isinstance(row, dict):
+                self.add_error(line, {
+                    'non_field_errors': ['Expected an object.']
+                })
+                continue
+            # Missing and null values both fall back to the defaults.
+            row = {key: value for key, value in row.items()
+                   if value is not None}
+            try:
+                data = self.row_serializer.run_validation(row)
+            except serializers.ValidationError as exc:
+                self.add_error(line, exc.detail)
+                continue
+            valid.append((line, data))
+        return valid
+
+    def resolve_names(self, model, names, create=False):
+        """Map names to ids of the user objects, creating missing ones."""
+        mapping = {}
+        if not names:
+            return mapping
+        objects = model.objects.filter(
+            user=self.user, name__in=names
+        ).order_by('-id').values_list('name', 'id')
+        mapping.update(objects)
+        missing = names - mapping.keys()
+        if create and missing:
+            created = model.objects.bulk_create([
+                model(user=self.user, name=name) for name in sorted(missing)
+            ])
+            mapping.update((obj.name, obj.id) for obj in created)
+            # bulk_create sends no signals.
+            versions.bump(self.user.id, model._meta.model_name)
+        return mapping
+
+    def resolve_categories(self, rows, groups):
+        """Map (group id, category name) to category ids."""
+        names = {data.get('category', 'Other') for _, data in rows}
+        group_ids = {groups[data['group']] for _, data in rows
+                     if data['group'] in groups}
+        categories = Category.objects.filter(
+            user=self.user, group_id__in=group_ids, name__in=names
+        ).values_list('group_id', 'name', 'id')
+        return {(group_id, name): pk for group_id, name, pk in categories}
+
+    def import_chunk(self, chunk):
+        rows = self.validate_chunk(chunk)
+        if not rows:
+            return
+
+        groups = self.resolve_names(
+            Group, {data['group'] for _, data in rows}
+        )
+        categories = self.resolve_categories(rows, groups)
+
+        resolved = []
+        for line, data in rows:
+            group_id = groups.get(data['group'])
+            if group_id is None:
+                self.add_error(line, {'group': ['Group does not exist.']})
+                continue
+            category_id = categories.get(
+                (group_id, data.get('category', 'Other'))
+            )
+            if category_id is None:
+                self.add_error(line, {
+                    'category': ['Category does not exist in the group.']
+                })
+                continue
+            resolved.append((data, group_id, category_id))
+        if not resolved:
+            return
+
+        with transaction.atomic():
+            brands = self.resolve_names(
+                Brand,
+                {data['brand'] for data, _, _ in resolved if 'brand' in data},
+                create=True,
+            )
+            stores = self.resolve_names(
+                Store,
+                {name for data, _, _ in resolved
+                 for name in data.get('stores', [])},
+                create=True,
+            )
+            products = Product.objects.bulk_create([
+                self.build_product(data, group_id, category_id, brands)
+                for data, group_id, category_id in resolved
+            ])
+            Through = Product.stores.through
+            Through.objects.bulk_create([
+                Through(product_id=product.id, store_id=stores[name])
+                for product, (data, _, _) in zip(products, resolved)
+                for name in dict.fromkeys(data.get('stores', []))
+            ])
+            sync_ingredients([product for product in products
+                              if product.ingredients])
+            versions.bump(self.user.id, 'product')
+        self.created += len(products)
+
+    def build_product(self, data, group_id, category_id, brands):
+        fields = {
+            key: data[key]
+            for key in ('price', 'ingredients', 'unit',
+                        'is_available', 'is_favourite')
+            if key in data
+        }
+        return Product(
+            user=self.user,
+            name=data['name'],
+            brand_id=brands.get(data.get('brand')),
+            group_id=group_id,
+            category_id=category_id,
+            capacity=data['capacity'],
+            **fields
+        )
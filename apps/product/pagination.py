@@ -0,0 +1,187 @@
+"""
+Pagination for the product API.
+"""
+import json
+from operator import attrgetter
+
+from django.db.models import Q
+from rest_framework import exceptions
+from rest_framework.pagination import (
+    Cursor,
+    CursorPagination,
+    LimitOffsetPagination,
+)
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination seeking on every ordering field.
+
+    The cursor holds the values of all ordering fields of the last row, so
+    a page is read with an indexable `WHERE (name, id) < (...)` condition
+    instead of an OFFSET, and no COUNT query is made.
+    """
+    ordering = ('-name', '-id')
+    # Types of the values of the ordering fields in a cursor.
+    position_types = (str, int)
+    page_size_query_param = 'limit'
+    max_page_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        cursor = self.decode_cursor(request)
+        if cursor is None:
+            position, reverse = None, False
+        else:
+            position, reverse = cursor.position, cursor.reverse
+
+        ordering = self.ordering
+        if reverse:
+            ordering = [self.invert(field) for field in ordering]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.get_seek_filter(position,
+                                                            ordering))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        return self.page
+
+    @staticmethod
+    def invert(field):
+        return field[1:] if field.startswith('-') else '-' + field
+
+    def get_seek_filter(self, position, ordering):
+        """Return the condition selecting rows after the position."""
+        fields = [field.lstrip('-') for field in ordering]
+        lookups = ['lt' if field.startswith('-') else 'gt'
+                   for field in ordering]
+        condition = Q()
+        equal = {}
+        for field, lookup, value in zip(fields, lookups, position):
+            condition |= Q(**equal, **{f'{field}__{lookup}': value})
+            equal[field] = value
+        # Bound the leading field too, so it can be used as an index range.
+        bound = {f'{fields[0]}__{lookups[0]}e': position[0]}
+        return Q(**bound) & condition
+
+    def get_position(self, instance):
+        return [attrgetter(field.lstrip('-'))(instance)
+                for field in self.ordering]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        position = self.get_position(self.page[-1])
+        return self.encode_cursor(Cursor(offset=0,
+                                         reverse=False,
+                                         position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        position = self.get_position(self.page[0])
+        return self.encode_cursor(Cursor(offset=0,
+                                         reverse=True,
+                                         position=position))
+
+    def encode_cursor(self, cursor):
+        return super().encode_cursor(cursor._replace(
+            position=json.dumps(cursor.position)
+        ))
+
+    def decode_cursor(self, request):
+        cursor = super().decode_cursor(request)
+        if cursor is None:
+            return None
+        try:
+            position = json.loads(cursor.position)
+        except (TypeError, ValueError):
+            raise exceptions.NotFound(self.invalid_cursor_message)
+        if not self.is_valid_position(position):
+            raise exceptions.NotFound(self.invalid_cursor_message)
+        return cursor._replace(position=position)
+
+    def is_valid_position(self, position):
+        """Return whether the values can be compared to the fields."""
+        if (not isinstance(position, list)
+                or len(position) != len(self.position_types)):
+            return False
+        for value, value_type in zip(position, self.position_types):
+            # Exact types, so booleans are not taken for ids.
+            if type(value) is not value_type:
+                return False
+            if value_type is int and not -2 ** 63 <= value < 2 ** 63:
+                return False
+            if value_type is str and '\x00' in value:
+                return False
+        return True
+
+
+class PaginationModeMixin:
+    """Select the pagination class of a viewset.
+
+    The mode defaults to `pagination_mode` and can be switched per request
+    with the `?pagination=offset|cursor` query parameter.
+    """
+    pagination_modes = {
+        'offset': LimitOffsetPagination,
+        'cursor': KeysetPagination,
+    }
+    pagination_mode = 'offset'
+    pagination_mode_query_param = 'pagination'
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            mode = self.pagination_mode
+            request = getattr(self, 'request', None)
+            if request is not None:
+                mode = request.query_params.get(
+                    self.pagination_mode_query_param, mode
+                )
+            if mode not in self.pagination_modes:
+                raise exceptions.ValidationError({
+                    self.pagination_mode_query_param: [
+                        f'Choose one of: {", ".join(self.pagination_modes)}.'
+                    ]
+                })
+            self._paginator = self.pagination_modes[mode]()
+        return self._paginator
+
+
+class AsyncLimitOffsetPagination(LimitOffsetPagination):
+    """Limit/offset pagination reading the page with the async ORM."""
+
+    async def apaginate_queryset(self, queryset, request):
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        self.count = await queryset.acount()
+        self.offset = self.get_offset(request)
+        self.request = request
+        if self.count == 0 or self.offset > self.count:
+            return []
+        page = queryset[self.offset:self.offset + self.limit]
+        return [obj async for obj in page.aiterator()]
+
+    def get_paginated_data(self, data):
+        return {
+            'count': self.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
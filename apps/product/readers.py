@@ -0,0 +1,188 @@
+"""
+Fast read path of list and detail responses.
+
+Most of the time of a list response goes to the per-field machinery of
+DRF serializers. A `ValuesReader` compiles a serializer class once into
+the `values_list()` lookups it reads and a converter per field, then
+builds the same representation straight from the row tuples. Nested
+serializers of reverse foreign keys are read with one query per page,
+the same query `prefetch_related()` makes.
+
+Plain model fields, dotted sources and primary key relations are
+compiled, serializers with other fields are left to DRF.
+"""
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import generics, serializers
+from rest_framework.response import Response
+
+from .renderers import ORJSONRenderer
+
+# Fields whose representation is the database value itself.
+IDENTITY_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.IntegerField,
+)
+# Fields needing the model instance rather than its column value.
+INSTANCE_FIELDS = (
+    serializers.FileField,
+    serializers.ManyRelatedField,
+    serializers.SerializerMethodField,
+)
+
+
+class UnsupportedField(Exception):
+    pass
+
+
+class ValuesReader:
+    """Representation of a model serializer built from `values_list()`."""
+
+    def __init__(self, serializer_class):
+        serializer = serializer_class()
+        self.model = serializer.Meta.model
+        self.lookups = []
+        # (name, index in the row, converter), a None index for nested.
+        self.fields = []
+        # (name, reader, name of the foreign key to this model).
+        self.nested = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.ListSerializer):
+                self.nested.append((name, *self.compile_nested(field)))
+                self.fields.append((name, None, None))
+            else:
+                lookup, convert = self.compile_field(field)
+                self.fields.append((name, self.add_lookup(lookup), convert))
+        self.pk_index = self.add_lookup(self.model._meta.pk.attname)
+
+    def add_lookup(self, lookup):
+        if lookup not in self.lookups:
+            self.lookups.append(lookup)
+        return self.lookups.index(lookup)
+
+    def compile_field(self, field):
+        """Return the lookup and converter of a field."""
+        if not field.source_attrs or isinstance(field, INSTANCE_FIELDS):
+            raise UnsupportedField(field.field_name)
+        lookup = '__'.join(field.source_attrs)
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            if field.pk_field is not None:
+                raise UnsupportedField(field.field_name)
+            return lookup, None
+        if isinstance(field, serializers.RelatedField):
+            raise UnsupportedField(field.field_name)
+        try:
+            self.model._meta.get_field(field.source_attrs[0])
+        except FieldDoesNotExist:
+            # A property or method of the model.
+            raise UnsupportedField(field.field_name)
+        if isinstance(field, IDENTITY_FIELDS):
+            return lookup, None
+        return lookup, field.to_representation
+
+    def compile_nested(self, field):
+        """Return the reader and foreign key of a nested many serializer."""
+        try:
+            relation = self.model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            raise UnsupportedField(field.field_name)
+        if not relation.one_to_many:
+            raise UnsupportedField(field.field_name)
+        reader = ValuesReader(type(field.child))
+        return reader, relation.field.name
+
+    def get_queryset(self, queryset, **options):
+        """Return the rows of the queryset the representation is built of."""
+        return queryset.prefetch_related(None).values_list(*self.lookups,
+                                                           **options)
+
+    def to_representation(self, rows):
+        """Return the representations of the rows."""
+        data = []
+        for row in rows:
+            item = {}
+            for name, index, convert in self.fields:
+                if index is None:
+                    item[name] = []
+                    continue
+                value = row[index]
+                if convert is not None and value is not None:
+                    value = convert(value)
+                item[name] = value
+            data.append(item)
+        for name, reader, foreign_key in self.nested:
+            by_pk = {row[self.pk_index]: item[name]
+                     for row, item in zip(rows, data)}
+            related = reader.model._default_manager.filter(
+                **{f'{foreign_key}__in': list(by_pk)}
+            )
+            child_rows = list(related.values_list(*reader.lookups,
+                                                  foreign_key))
+            children = reader.to_representation(child_rows)
+            for row, child in zip(child_rows, children):
+                by_pk[row[-1]].append(child)
+        return data
+
+
+@lru_cache(maxsize=None)
+def get_reader(serializer_class):
+    """Return the reader of a serializer class, None if unsupported."""
+    try:
+        return ValuesReader(serializer_class)
+    except UnsupportedField:
+        return None
+
+
+class ValuesReadMixin:
+    """Serve list and retrieve from `values_list()` rows.
+
+    The fast path is opt-in: it is taken when content negotiation selects
+    `ORJSONRenderer`, offered to clients asking for its media type, and
+    other requests keep the DRF serializers. Put it before the DRF model
+    mixins.
+    """
+    values_read = True
+
+    def get_values_reader(self):
+        renderer = getattr(self.request, 'accepted_renderer', None)
+        if not (self.values_read and isinstance(renderer, ORJSONRenderer)):
+            return None
+        return get_reader(self.get_serializer_class())
+
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if self.values_read:
+            renderers.insert(0, ORJSONRenderer())
+        return renderers
+
+    def list(self, request, *args, **kwargs):
+        reader = self.get_values_reader()
+        if reader is None:
+            return super().list(request, *args, **kwargs)
+        # Named rows keep the attributes KeysetPagination seeks on.
+        queryset = reader.get_queryset(
+            self.filter_queryset(self.get_queryset()), named=True
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            data = reader.to_representation(page)
+            return self.get_paginated_response(data)
+        return Response(reader.to_representation(list(queryset)))
+
+    def retrieve(self, request, *args, **kwargs):
+        reader = self.get_values_reader()
+        if reader is None:
+            return super().retrieve(request, *args, **kwargs)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = reader.get_queryset(
+            self.filter_queryset(self.get_queryset())
+        )
+        row = generics.get_object_or_404(
+            queryset, **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        self.check_object_permissions(request, row)
+        return Response(reader.to_representation([row])[0])
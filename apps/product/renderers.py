@@ -0,0 +1,96 @@
+"""
+Renderers for the product API.
+"""
+import csv
+import io
+import json
+
+import orjson
+from rest_framework import renderers
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    """Render JSON with orjson, byte for byte like `JSONRenderer`.
+
+    Dates, times and dataclasses go through the DRF encoder, and indented,
+    ASCII only or non compact output is left to `JSONRenderer`. Very small
+    and large floats differ, orjson writes `0.00001` for `1e-05`, so use it
+    for data without floats.
+
+    Clients opt in with `Accept: application/json; fast=true`, plain JSON
+    clients keep `JSONRenderer`.
+    """
+    media_type = 'application/json; fast=true'
+    format = 'fastjson'
+    options = (orjson.OPT_PASSTHROUGH_DATETIME
+               | orjson.OPT_PASSTHROUGH_DATACLASS)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        if indent or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        ret = orjson.dumps(data, default=self.encoder_class().default,
+                           option=self.options)
+        # Like JSONRenderer, escape the separators invalid in JavaScript.
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace(
+            '\u2029'.encode(), b'\\u2029'
+        )
+
+
+class JSONLinesRenderer(renderers.BaseRenderer):
+    """Render rows as JSON Lines, one object per line."""
+    media_type = 'application/x-ndjson'
+    format = 'jsonl'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if not isinstance(data, list):
+            data = [data]
+        return b''.join(self.render_rows(data))
+
+    def render_rows(self, rows, fields=None):
+        """Yield encoded lines of the rows."""
+        for row in rows:
+            yield (json.dumps(row, ensure_ascii=False) + '\n').encode()
+
+
+class CSVRenderer(renderers.BaseRenderer):
+    """Render rows as CSV with a header line."""
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+    list_separator = '|'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if not isinstance(data, list):
+            data = [data]
+        fields = list(data[0]) if data else []
+        return b''.join(self.render_rows(data, fields))
+
+    def render_rows(self, rows, fields=None):
+        """Yield encoded lines of the rows preceded by the header."""
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fields)
+        writer.writeheader()
+        yield self.flush(buffer)
+        for row in rows:
+            writer.writerow({
+                key: self.list_separator.join(value)
+                if isinstance(value, list) else value
+                for key, value in row.items()
+            })
+            yield self.flush(buffer)
+
+    def flush(self, buffer):
+        value = buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+        return value
@@ -0,0 +1,36 @@
+"""
+Full-text search over product names and ingredients.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F
+
+
+SEARCH_CONFIG = 'simple'
+SEARCH_MODES = ('websearch', 'plain', 'phrase', 'prefix')
+WORD_RE = re.compile(r'\w+')
+
+
+def build_search_query(text, mode='websearch'):
+    """Return the SearchQuery for text or None when it has no words.
+
+    `prefix` matches words starting with every given term, the other modes
+    are passed to PostgreSQL's query parsers.
+    """
+    if mode == 'prefix':
+        words = WORD_RE.findall(text)
+        if not words:
+            return None
+        raw = ' & '.join(f'{word}:*' for word in words)
+        return SearchQuery(raw, search_type='raw', config=SEARCH_CONFIG)
+    if not WORD_RE.search(text):
+        return None
+    return SearchQuery(text, search_type=mode, config=SEARCH_CONFIG)
+
+
+def search_products(queryset, query):
+    """Filter products matching the query, best ranked first."""
+    return queryset.filter(search_vector=query).annotate(
+        rank=SearchRank(F('search_vector'), query),
+    ).order_by('-rank', '-id')
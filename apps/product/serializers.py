@@ -1,15 +1,27 @@
 """
 Serializers for the product API view.
 """
+import os
+from typing import Optional
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.validators import validate_image_file_extension
 from rest_framework import serializers
 
+from apps.core import taxonomy
 from apps.core.models import (
     Brand,
     Store,
     Group,
     Category,
     Product,
+    Blacklist,
+    UploadSession,
 )
+from .bulk import BulkListSerializer
+from .fieldsets import FieldsetSerializerMixin
 
 
 class BrandSerializer(serializers.ModelSerializer):
@@ -19,6 +31,7 @@ class BrandSerializer(serializers.ModelSerializer):
         model = Brand
         fields = ['id', 'name']
         read_only_fields = ['id']
+        list_serializer_class = BulkListSerializer
 
 
 class StoreSerializer(serializers.ModelSerializer):
@@ -28,15 +41,7 @@ class StoreSerializer(serializers.ModelSerializer):
         model = Store
         fields = ['id', 'name']
         read_only_fields = ['id']
-
-
-class ProductSerializer(serializers.ModelSerializer):
-    """Serializer for product."""
-
-    class Meta:
-        model = Product
-        fields = ['id', 'name']
-        read_only_fields = ['id']
+        list_serializer_class = BulkListSerializer
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -50,6 +55,190 @@ class CategorySerializer(serializers.ModelSerializer):
         extra_kwargs = {
             'group': {'required': False},
         }
+        list_serializer_class = BulkListSerializer
+        bulk_read_only_fields = ['group']
+
+
+class UserPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Primary key field limited to objects owned by the request user."""
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        request = self.context.get('request')
+        if request is None:
+            return queryset
+        return queryset.filter(user=request.user)
+
+
+class ProductSerializer(FieldsetSerializerMixin,
+                        serializers.ModelSerializer):
+    """Serializer for product."""
+    brand = UserPrimaryKeyRelatedField(queryset=Brand.objects.all(),
+                                       allow_null=True,
+                                       required=False)
+    brand_name = serializers.CharField(source='brand.name',
+                                       read_only=True,
+                                       default=None)
+    group = UserPrimaryKeyRelatedField(queryset=Group.objects.all())
+    group_name = serializers.CharField(source='group.name', read_only=True)
+    category = UserPrimaryKeyRelatedField(queryset=Category.objects.all(),
+                                          allow_null=True,
+                                          required=False)
+    category_name = serializers.CharField(source='category.name',
+                                          read_only=True,
+                                          default=None)
+    stores = UserPrimaryKeyRelatedField(queryset=Store.objects.all(),
+                                        many=True,
+                                        required=False)
+    store_names = serializers.SlugRelatedField(source='stores',
+                                               slug_field='name',
+                                               many=True,
+                                               read_only=True)
+    images = serializers.SerializerMethodField()
+    flagged = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Product
+        fields = [
+            'id',
+            'name',
+            'brand',
+            'brand_name',
+            'group',
+            'group_name',
+            'category',
+            'category_name',
+            'price',
+            'ingredients',
+            'capacity',
+            'unit',
+            'stores',
+            'store_names',
+            'is_available',
+            'is_favourite',
+            'image',
+            'image_width',
+            'image_height',
+            'images',
+            'flagged',
+        ]
+        read_only_fields = ['id']
+
+    expandable_fields = {
+        'brand': (BrandSerializer, {}),
+        'category': (CategorySerializer, {}),
+        'stores': (StoreSerializer, {'many': True}),
+    }
+    method_field_sources = {
+        'images': ['image_variants'],
+        'flagged': ['ingredients'],
+    }
+
+    def get_images(self, product) -> Optional[dict]:
+        """URLs of the resized image variants by size and format, null
+        until the upload is processed."""
+        if not product.image_variants:
+            return None
+        request = self.context.get('request')
+        urls = {}
+        for variant, paths in product.image_variants.items():
+            urls[variant] = {}
+            for extension, path in paths.items():
+                url = default_storage.url(path)
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+                urls[variant][extension] = url
+        return urls
+
+    def get_flagged(self, product) -> bool:
+        """Whether the ingredients contain a blacklisted term."""
+        matcher = self.context.get('blacklist_matcher')
+        return bool(matcher) and matcher.matches(product.ingredients)
+
+    def validate(self, attrs):
+        """Check the category belongs to the product group."""
+        group = attrs.get('group', getattr(self.instance, 'group', None))
+        if 'category' in attrs:
+            category = attrs['category']
+        else:
+            category = getattr(self.instance, 'category', None)
+        if category is not None and category.group_id != group.id:
+            if 'category' in attrs:
+                raise serializers.ValidationError(
+                    {'category': 'Category does not belong to the group.'}
+                )
+            # Group changed, fall back to the default category of new group.
+            attrs['category'] = category = None
+        if category is None:
+            try:
+                taxonomy.get_default_category_id(group.id)
+            except Category.DoesNotExist:
+                raise serializers.ValidationError(
+                    {'category': 'The group has no default category, '
+                                 'choose one.'}
+                )
+        return attrs
+
+
+class ProductListSerializer(ProductSerializer):
+    """Serializer for product lists, pointing at the image variants only."""
+
+    class Meta(ProductSerializer.Meta):
+        fields = [field for field in ProductSerializer.Meta.fields
+                  if field != 'image']
+
+
+class ProductSearchSerializer(ProductListSerializer):
+    """Serializer for product search results."""
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta(ProductListSerializer.Meta):
+        fields = ProductListSerializer.Meta.fields + ['rank']
+
+
+class BlacklistSerializer(serializers.ModelSerializer):
+    """Serializer for the ingredient blacklist."""
+    terms = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        max_length=1000,
+    )
+
+    class Meta:
+        model = Blacklist
+        fields = ['terms', 'version']
+        read_only_fields = ['version']
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """Serializer for resumable image uploads."""
+    product = UserPrimaryKeyRelatedField(queryset=Product.objects.all())
+    size = serializers.IntegerField(min_value=1)
+    checksum = serializers.RegexField(r'^[0-9a-fA-F]{64}$')
+
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'product', 'filename', 'size', 'checksum', 'offset',
+                  'expires_at']
+        read_only_fields = ['id', 'offset', 'expires_at']
+
+    def validate_filename(self, value):
+        name = os.path.basename(value)[-100:]
+        if not name:
+            raise serializers.ValidationError('Enter a file name.')
+        # Like uploads to the image field.
+        validate_image_file_extension(File(None, name))
+        return name
+
+    def validate_size(self, value):
+        if value > settings.UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f'Ensure the file has at most '
+                f'{settings.UPLOAD_MAX_SIZE} bytes.'
+            )
+        return value
+
+    def validate_checksum(self, value):
+        return value.lower()
 
 
 class GroupSerializer(serializers.ModelSerializer):
@@ -60,3 +249,26 @@ class GroupSerializer(serializers.ModelSerializer):
         model = Group
         fields = ['id', 'name', 'categories']
         read_only_fields = ['id']
+
+
+class BatchOperationSerializer(serializers.Serializer):
+    """Serializer for one operation of a batch."""
+    method = serializers.ChoiceField(
+        choices=['GET', 'POST', 'PUT', 'PATCH', 'DELETE']
+    )
+    path = serializers.CharField(max_length=255)
+    body = serializers.JSONField(required=False)
+    ref = serializers.RegexField(r'^\w+$', max_length=50, required=False)
+
+
+class BatchSerializer(serializers.Serializer):
+    """Serializer for an ordered list of operations."""
+    operations = BatchOperationSerializer(many=True, allow_empty=False,
+                                          max_length=settings.BATCH_MAX_SIZE)
+
+    def validate_operations(self, value):
+        refs = [operation['ref'] for operation in value
+                if 'ref' in operation]
+        if len(refs) != len(set(refs)):
+            raise serializers.ValidationError('References must be unique.')
+        return value
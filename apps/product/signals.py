@@ -1,5 +1,7 @@
 """Signals creating Groups and Categories."""
 
+from django.conf import settings
+from django.db import transaction
 from django.db.models.signals import post_save
 from django.contrib.auth import get_user_model
 from django.dispatch import receiver
@@ -9,23 +11,20 @@ from apps.core.models import Group, Category
 
 User = get_user_model()
 
-GROUP_NAMES = [
-    "Skin care",
-    "Hair care",
-    "Body care",
-    "Makeup",
-    "Other"
-]
-
 
 @receiver(post_save, sender=User)
 def create_groups_and_categories_for_user(sender, instance, created, **kwargs):
-    """Creates groups end 'Other' category in each group (except 'Other')
-    when user is created."""
+    """Creates the groups and categories of `settings.DEFAULT_TAXONOMY`
+    when user is created, with one INSERT per model in one transaction."""
     if created:
-        for group_name in GROUP_NAMES:
-            group = Group.objects.create(name=group_name, user=instance)
-            if group_name != 'Other':
-                Category.objects.create(name='Other',
-                                        group=group,
-                                        user=instance)
+        taxonomy = settings.DEFAULT_TAXONOMY
+        with transaction.atomic(savepoint=False):
+            groups = Group.objects.bulk_create([
+                Group(name=group_name, user=instance)
+                for group_name in taxonomy
+            ])
+            Category.objects.bulk_create([
+                Category(name=category_name, group=group, user=instance)
+                for group in groups
+                for category_name in taxonomy[group.name]
+            ])
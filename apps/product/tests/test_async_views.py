@@ -0,0 +1,119 @@
+"""
+Tests for the async read-only views.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.core.models import Brand, Store, Group, Category, Product
+from apps.user.authentication import issue_token
+
+
+def create_user(**params):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**params)
+
+
+class AsyncViewTests(TestCase):
+    """Test the async views answer like the viewsets."""
+
+    def setUp(self):
+        self.user = create_user(email='test@example.com',
+                                username='Testuser',
+                                password='Testpass123')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.group = Group.objects.get(name='Skin care', user=self.user)
+        self.category = Category.objects.create(name='Creams',
+                                                group=self.group,
+                                                user=self.user)
+        brand = Brand.objects.create(name='Test brand', user=self.user)
+        stores = [Store.objects.create(name=f'Store {i}', user=self.user)
+                  for i in range(2)]
+        for i in range(3):
+            product = Product.objects.create(
+                user=self.user, name=f'Product {i}', brand=brand,
+                group=self.group, category=self.category, capacity=50,
+                ingredients='Aqua, Glycerin' if i else 'Aqua, Parfum',
+            )
+            product.stores.set(stores)
+        other_user = create_user(email='test2@example.com',
+                                 username='Testuser2',
+                                 password='Testpass456')
+        Brand.objects.create(name='Other brand', user=other_user)
+        self.product = product
+
+    async def aget(self, name, *args, params=None, keyword='Token',
+                   key=None):
+        key = key or self.token.key
+        return await self.async_client.get(
+            reverse(f'product:{name}', args=args), params or {},
+            headers={'Authorization': f'{keyword} {key}'},
+        )
+
+    async def assertSameResponse(self, name, *args, params=None):
+        """Assert the async view returns what the viewset returns."""
+        res = await self.aget(f'async-{name}', *args, params=params)
+        expected = await sync_to_async(self.client.get)(
+            reverse(f'product:{name}', args=args), params or {},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        # Page links differ only by the async prefix.
+        content = res.content.replace(b'/async/', b'/')
+        self.assertEqual(json.loads(content), expected.json())
+
+    async def test_lists_match_viewsets(self):
+        """Test every async list matches the viewset list."""
+        for name in ('brand-list', 'store-list', 'group-list',
+                     'product-list'):
+            with self.subTest(name=name):
+                await self.assertSameResponse(name)
+        await self.assertSameResponse('category-list', self.group.id)
+
+    async def test_pagination_and_filters_match_viewsets(self):
+        """Test limit, offset and ingredient filters are applied."""
+        await self.assertSameResponse('product-list',
+                                      params={'limit': 1, 'offset': 1})
+        await self.assertSameResponse('product-list',
+                                      params={'excludes': 'parfum'})
+
+    async def test_details_match_viewsets(self):
+        """Test every async detail matches the viewset detail."""
+        await self.assertSameResponse('product-detail', self.product.id)
+        await self.assertSameResponse('group-detail', self.group.id)
+        await self.assertSameResponse('category-detail', self.group.id,
+                                      self.category.id)
+
+    async def test_signed_token(self):
+        """Test signed tokens authenticate the async views."""
+        res = await self.aget('async-brand-list', keyword='Bearer',
+                              key=issue_token(self.user))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(res.content)['count'], 1)
+
+    async def test_auth_required(self):
+        """Test missing and invalid credentials are rejected."""
+        url = reverse('product:async-brand-list')
+        res = await self.async_client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        res = await self.aget('async-brand-list', key='invalid')
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_other_user_object_not_found(self):
+        """Test objects of other users are not found."""
+        brand = await Brand.objects.aget(name='Other brand')
+
+        res = await self.aget('async-brand-detail', brand.id)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
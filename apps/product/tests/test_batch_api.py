@@ -0,0 +1,227 @@
+"""
+Tests for the batch API.
+"""
+from unittest import mock
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.core.models import Brand, Store, Group, Category, Product
+from apps.user.authentication import SignedTokenAuthentication
+
+
+BATCH_URL = reverse('product:batch')
+
+
+def create_user(**params):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**params)
+
+
+class PublicApiTests(TestCase):
+    """Test unauthenticated API requests."""
+
+    def test_auth_required(self):
+        """Test auth is required to call API."""
+        res = APIClient().post(BATCH_URL, {'operations': []}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class BatchApiTests(TestCase):
+    """Test operations run in order in one transaction."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='test@example.com',
+                                username='Testuser',
+                                password='Testpass123')
+        self.client.force_authenticate(self.user)
+        self.group = Group.objects.get(name='Skin care', user=self.user)
+
+    def post(self, *operations):
+        return self.client.post(BATCH_URL, {'operations': operations},
+                                format='json')
+
+    def test_create_with_references(self):
+        """Test later operations use the ids of earlier ones."""
+        res = self.post(
+            {'method': 'POST', 'path': 'brands/',
+             'body': {'name': 'Brand'}, 'ref': 'brand'},
+            {'method': 'POST', 'path': 'stores/',
+             'body': {'name': 'Store'}, 'ref': 'store'},
+            {'method': 'POST', 'path': f'groups/{self.group.id}/categories/',
+             'body': {'name': 'Creams'}, 'ref': 'category'},
+            {'method': 'POST', 'path': 'products/', 'body': {
+                'name': 'Cream', 'capacity': 50, 'group': self.group.id,
+                'brand': {'$ref': 'brand'},
+                'category': {'$ref': 'category'},
+                'stores': [{'$ref': 'store'}],
+            }},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK, res.data)
+        self.assertEqual([result['status'] for result in res.data['results']],
+                         [status.HTTP_201_CREATED] * 4)
+        product = Product.objects.get(user=self.user, name='Cream')
+        self.assertEqual(product.brand.name, 'Brand')
+        self.assertEqual(product.category.name, 'Creams')
+        self.assertEqual([store.name for store in product.stores.all()],
+                         ['Store'])
+        self.assertEqual(res.data['results'][3]['body']['id'], product.id)
+
+    def test_path_references(self):
+        """Test references in paths address created objects."""
+        res = self.post(
+            {'method': 'POST', 'path': 'brands/',
+             'body': {'name': 'Brand'}, 'ref': 'brand'},
+            {'method': 'PATCH', 'path': 'brands/{brand}/',
+             'body': {'name': 'Renamed'}},
+            {'method': 'GET', 'path': 'brands/{brand}/'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK, res.data)
+        self.assertEqual(res.data['results'][2]['body']['name'], 'Renamed')
+
+    def test_failure_rolls_back(self):
+        """Test a failed operation undoes the operations before it."""
+        res = self.post(
+            {'method': 'POST', 'path': 'brands/', 'body': {'name': 'Brand'}},
+            {'method': 'POST', 'path': 'stores/', 'body': {}},
+            {'method': 'POST', 'path': 'stores/', 'body': {'name': 'Store'}},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['failed'], 1)
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertIn('name', res.data['results'][1]['body'])
+        self.assertFalse(Brand.objects.filter(user=self.user).exists())
+        self.assertFalse(Store.objects.filter(user=self.user).exists())
+
+    def test_product_without_default_category_rejected(self):
+        """Test a product needing a category fails its operation."""
+        group = Group.objects.get(name='Other', user=self.user)
+        res = self.post(
+            {'method': 'POST', 'path': 'brands/', 'body': {'name': 'Brand'}},
+            {'method': 'POST', 'path': 'products/', 'body': {
+                'name': 'Cream', 'capacity': 50, 'group': group.id,
+            }},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['results'][1]['status'],
+                         status.HTTP_400_BAD_REQUEST)
+        self.assertIn('category', res.data['results'][1]['body'])
+        self.assertFalse(Brand.objects.filter(user=self.user).exists())
+
+    def test_conflicting_operation_rejected(self):
+        """Test a write breaking a constraint fails its operation."""
+        res = self.post(
+            {'method': 'POST', 'path': 'brands/', 'body': {'name': 'Brand'}},
+            {'method': 'POST', 'path': f'groups/{self.group.id}/categories/',
+             'body': {'name': 'Other'}},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['failed'], 1)
+        self.assertEqual([result['status'] for result in res.data['results']],
+                         [status.HTTP_201_CREATED,
+                          status.HTTP_400_BAD_REQUEST])
+        self.assertIn('detail', res.data['results'][1]['body'])
+        self.assertFalse(Brand.objects.filter(user=self.user).exists())
+
+    def test_other_users_objects_not_found(self):
+        """Test operations stay scoped to the user of the batch."""
+        other = create_user(email='other@example.com', username='Other',
+                            password='Testpass123')
+        brand = Brand.objects.create(user=other, name='Other')
+
+        res = self.post({'method': 'DELETE', 'path': f'brands/{brand.id}/'})
+
+        self.assertEqual(res.data['results'][0]['status'],
+                         status.HTTP_404_NOT_FOUND)
+        self.assertTrue(Brand.objects.filter(id=brand.id).exists())
+
+    def test_unknown_reference_rejected(self):
+        """Test references to no earlier operation fail the batch."""
+        res = self.post({'method': 'PATCH', 'path': 'brands/{missing}/',
+                         'body': {'name': 'Renamed'}})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['results'][0]['status'],
+                         status.HTTP_400_BAD_REQUEST)
+
+    def test_other_endpoints_refused(self):
+        """Test only the catalog endpoints are reachable."""
+        for operation in (
+            {'method': 'GET', 'path': 'blacklist/'},
+            {'method': 'POST', 'path': 'batch/', 'body': {}},
+            {'method': 'POST', 'path': '/api/account/token/revoke/'},
+            {'method': 'POST', 'path': 'products/import/', 'body': []},
+        ):
+            with self.subTest(operation=operation):
+                res = self.post(operation)
+                self.assertEqual(res.status_code,
+                                 status.HTTP_400_BAD_REQUEST)
+                self.assertIn(res.data['results'][0]['status'], (
+                    status.HTTP_404_NOT_FOUND,
+                    status.HTTP_405_METHOD_NOT_ALLOWED,
+                ))
+
+    def test_duplicate_references_rejected(self):
+        """Test every reference names one operation."""
+        res = self.post(
+            {'method': 'POST', 'path': 'brands/',
+             'body': {'name': 'A'}, 'ref': 'brand'},
+            {'method': 'POST', 'path': 'brands/',
+             'body': {'name': 'B'}, 'ref': 'brand'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('operations', res.data)
+        self.assertFalse(Brand.objects.filter(user=self.user).exists())
+
+    def test_category_delete_and_list(self):
+        """Test nested category paths are dispatched."""
+        category = Category.objects.create(user=self.user, name='Creams',
+                                           group=self.group)
+
+        res = self.post(
+            {'method': 'DELETE',
+             'path': f'groups/{self.group.id}/categories/{category.id}/'},
+            {'method': 'GET', 'path': f'groups/{self.group.id}/categories/'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK, res.data)
+        self.assertEqual(res.data['results'][0]['status'],
+                         status.HTTP_204_NO_CONTENT)
+        names = [item['name']
+                 for item in res.data['results'][1]['body']['results']]
+        self.assertNotIn('Creams', names)
+
+    def test_authenticates_once(self):
+        """Test the token of the batch is checked for the batch only."""
+        client = APIClient()
+        token = client.post(reverse('user:token'), {
+            'email': 'test@example.com', 'password': 'Testpass123',
+        }).data['signed_token']
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        with mock.patch.object(
+            SignedTokenAuthentication, 'authenticate',
+            autospec=True,
+            side_effect=SignedTokenAuthentication.authenticate,
+        ) as authenticate:
+            res = client.post(BATCH_URL, {'operations': [
+                {'method': 'POST', 'path': 'brands/',
+                 'body': {'name': f'Brand {i}'}}
+                for i in range(3)
+            ]}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK, res.data)
+        self.assertEqual(authenticate.call_count, 1)
+        self.assertEqual(Brand.objects.filter(user=self.user).count(), 3)
@@ -0,0 +1,147 @@
+"""
+Tests for the taxonomy bootstrap API.
+"""
+from django.core.cache import cache
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.core.models import Brand, Store, Group, Category, Product
+
+
+BOOTSTRAP_URL = reverse('product:bootstrap')
+
+
+def create_user(**params):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**params)
+
+
+class PublicApiTests(TestCase):
+    """Test unauthenticated API requests."""
+
+    def test_auth_required(self):
+        """Test auth is required to call API."""
+        res = APIClient().get(BOOTSTRAP_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class BootstrapApiTests(TestCase):
+    """Test the whole taxonomy is returned in one call."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = create_user(email='test@example.com',
+                                username='Testuser',
+                                password='Testpass123')
+        self.client.force_authenticate(self.user)
+        self.group = Group.objects.get(name='Skin care', user=self.user)
+        self.category = Category.objects.create(user=self.user,
+                                                name='Creams',
+                                                group=self.group)
+        Brand.objects.create(user=self.user, name='Brand')
+        Store.objects.create(user=self.user, name='Store')
+        for name in ('Day cream', 'Night cream'):
+            Product.objects.create(user=self.user, name=name, capacity=50,
+                                   group=self.group, category=self.category)
+
+    def test_taxonomy_as_list_endpoints(self):
+        """Test every part matches the response of its own endpoint."""
+        res = self.client.get(BOOTSTRAP_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        for key, url in (('groups', 'product:group-list'),
+                         ('brands', 'product:brand-list'),
+                         ('stores', 'product:store-list')):
+            with self.subTest(key=key):
+                listed = self.client.get(reverse(url), {'limit': 1000})
+                self.assertEqual(res.data[key], listed.data['results'])
+
+    def test_product_counts(self):
+        """Test every category has its product count."""
+        res = self.client.get(BOOTSTRAP_URL)
+
+        counts = res.data['product_counts']
+        self.assertEqual(counts[str(self.category.id)], 2)
+        self.assertEqual(
+            set(counts),
+            {str(pk) for pk in Category.objects.filter(
+                user=self.user
+            ).values_list('id', flat=True)},
+        )
+        self.assertEqual(sum(counts.values()), 2)
+
+    def test_other_users_excluded(self):
+        """Test only the taxonomy of the user is returned."""
+        other = create_user(email='other@example.com', username='Other',
+                            password='Testpass123')
+        Brand.objects.create(user=other, name='Other brand')
+
+        res = self.client.get(BOOTSTRAP_URL)
+
+        self.assertEqual([brand['name'] for brand in res.data['brands']],
+                         ['Brand'])
+        group_ids = {group['id'] for group in res.data['groups']}
+        self.assertEqual(group_ids, set(Group.objects.filter(
+            user=self.user
+        ).values_list('id', flat=True)))
+
+    def test_query_count_is_constant(self):
+        """Test the response costs the same queries at any size."""
+        for count in (1, 50):
+            Brand.objects.bulk_create([
+                Brand(user=self.user, name=f'Brand {count} {i}')
+                for i in range(count)
+            ])
+            Store.objects.bulk_create([
+                Store(user=self.user, name=f'Store {count} {i}')
+                for i in range(count)
+            ])
+            group = Group.objects.create(user=self.user,
+                                         name=f'Group {count}')
+            Category.objects.bulk_create([
+                Category(user=self.user, group=group, name=f'Category {i}')
+                for i in range(count)
+            ])
+            cache.clear()
+            with self.subTest(count=count):
+                # Groups, categories, brands, stores and product counts.
+                with self.assertNumQueries(5):
+                    res = self.client.get(BOOTSTRAP_URL)
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_warm_start_not_modified(self):
+        """Test an unchanged taxonomy is answered with a query-free 304."""
+        res = self.client.get(BOOTSTRAP_URL)
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(BOOTSTRAP_URL,
+                                     HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_changes_invalidate(self):
+        """Test a change to any part gives a new ETag and fresh data."""
+        changes = [
+            lambda: Brand.objects.create(user=self.user, name='New'),
+            lambda: Store.objects.create(user=self.user, name='New'),
+            lambda: Category.objects.create(user=self.user, name='New',
+                                            group=self.group),
+            lambda: Product.objects.create(user=self.user, name='New',
+                                           capacity=50, group=self.group,
+                                           category=self.category),
+        ]
+        for change in changes:
+            res = self.client.get(BOOTSTRAP_URL)
+            change()
+            with self.subTest(change=change):
+                fresh = self.client.get(BOOTSTRAP_URL,
+                                        HTTP_IF_NONE_MATCH=res['ETag'])
+                self.assertEqual(fresh.status_code, status.HTTP_200_OK)
+                self.assertNotEqual(fresh['ETag'], res['ETag'])
+                self.assertNotEqual(fresh.data, res.data)
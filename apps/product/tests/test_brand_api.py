@@ -56,7 +56,7 @@ class BrandApiTests(TestCase):
 
         res = self.client.get(BRAND_LIST_URL)
 
-        brands = Brand.objects.all()
+        brands = Brand.objects.all().order_by('-name', '-id')
         serializer = BrandSerializer(brands, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data['results'], serializer.data)
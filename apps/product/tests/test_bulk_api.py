@@ -0,0 +1,269 @@
+"""
+Tests for bulk writes of brands, stores and categories.
+"""
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.core import taxonomy
+from apps.core.models import Brand, Store, Group, Category
+
+
+BRANDS_URL = reverse('product:brand-list')
+STORES_URL = reverse('product:store-list')
+
+
+def categories_url(group_id):
+    """Create and return a category list URL."""
+    return reverse('product:category-list', args=[group_id])
+
+
+def create_user(**params):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**params)
+
+
+class BulkApiTests(TestCase):
+    """Test lists of objects are written with a fixed number of queries."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = create_user(email='test@example.com',
+                                username='Testuser',
+                                password='Testpass123')
+        self.client.force_authenticate(self.user)
+        self.group = Group.objects.get(name='Skin care', user=self.user)
+        self.other = create_user(email='other@example.com',
+                                 username='Other',
+                                 password='Testpass123')
+
+    def test_bulk_create(self):
+        """Test a list creates every object for the user."""
+        for url, model in ((BRANDS_URL, Brand), (STORES_URL, Store)):
+            with self.subTest(url=url):
+                res = self.client.post(url, [{'name': 'A'}, {'name': 'B'}],
+                                       format='json')
+
+                self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+                self.assertEqual([item['name'] for item in res.data],
+                                 ['A', 'B'])
+                created = model.objects.filter(user=self.user)
+                self.assertEqual(
+                    sorted(created.values_list('id', flat=True)),
+                    sorted(item['id'] for item in res.data),
+                )
+
+    def test_single_create_unchanged(self):
+        """Test an object still creates one object."""
+        res = self.client.post(BRANDS_URL, {'name': 'A'}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['name'], 'A')
+
+    def test_bulk_create_queries_fixed(self):
+        """Test a list of any size is inserted with one query."""
+        for count in (1, 100):
+            data = [{'name': f'Brand {count} {i}'} for i in range(count)]
+            with self.subTest(count=count):
+                # The insert in a savepoint.
+                with self.assertNumQueries(3):
+                    res = self.client.post(BRANDS_URL, data, format='json')
+                self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_bulk_create_invalid_writes_nothing(self):
+        """Test one invalid object rejects the whole list."""
+        res = self.client.post(BRANDS_URL,
+                               [{'name': 'A'}, {}, {'name': 'x' * 300}],
+                               format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('name', res.data[1])
+        self.assertIn('name', res.data[2])
+        self.assertFalse(Brand.objects.filter(user=self.user).exists())
+
+    def test_bulk_update(self):
+        """Test a list of objects with ids updates them."""
+        brands = [Brand.objects.create(user=self.user, name=name)
+                  for name in ('A', 'B', 'C')]
+
+        res = self.client.patch(BRANDS_URL, [
+            {'id': brands[2].id, 'name': 'Z'},
+            {'id': brands[0].id, 'name': 'X'},
+        ], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in res.data],
+                         [brands[2].id, brands[0].id])
+        for brand, name in zip(brands, ('X', 'B', 'Z')):
+            brand.refresh_from_db()
+            self.assertEqual(brand.name, name)
+
+    def test_bulk_update_queries_fixed(self):
+        """Test a list of any size is updated with one query."""
+        for count in (1, 100):
+            brands = Brand.objects.bulk_create([
+                Brand(user=self.user, name=f'Brand {i}')
+                for i in range(count)
+            ])
+            data = [{'id': brand.id, 'name': f'New {brand.id}'}
+                    for brand in brands]
+            with self.subTest(count=count):
+                # Savepoints around the select and the update.
+                with self.assertNumQueries(6):
+                    res = self.client.patch(BRANDS_URL, data, format='json')
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_bulk_update_other_user_rejected(self):
+        """Test ids of other users are not found and nothing changes."""
+        own = Brand.objects.create(user=self.user, name='Own')
+        foreign = Brand.objects.create(user=self.other, name='Foreign')
+
+        res = self.client.patch(BRANDS_URL, [
+            {'id': own.id, 'name': 'Changed'},
+            {'id': foreign.id, 'name': 'Changed'},
+        ], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(str(foreign.id), res.data['id'][0])
+        own.refresh_from_db()
+        foreign.refresh_from_db()
+        self.assertEqual(own.name, 'Own')
+        self.assertEqual(foreign.name, 'Foreign')
+
+    def test_bulk_update_ids_required(self):
+        """Test every object needs a unique id."""
+        brand = Brand.objects.create(user=self.user, name='A')
+        for data in ([{'name': 'B'}],
+                     [{'id': brand.id}, {'id': brand.id}],
+                     {'id': brand.id},
+                     []):
+            with self.subTest(data=data):
+                res = self.client.patch(BRANDS_URL, data, format='json')
+                self.assertEqual(res.status_code,
+                                 status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_destroy(self):
+        """Test the objects of the ids of the user are deleted."""
+        brands = [Brand.objects.create(user=self.user, name=name)
+                  for name in ('A', 'B', 'C')]
+        foreign = Brand.objects.create(user=self.other, name='Foreign')
+
+        res = self.client.delete(BRANDS_URL, {
+            'ids': [brands[0].id, brands[1].id, foreign.id],
+        }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(
+            list(Brand.objects.values_list('name', flat=True).order_by('id')),
+            ['C', 'Foreign'],
+        )
+
+    def test_bulk_destroy_queries_fixed(self):
+        """Test a list of any size is deleted with fixed queries."""
+        counts = []
+        for count in (1, 100):
+            stores = Store.objects.bulk_create([
+                Store(user=self.user, name=f'Store {i}')
+                for i in range(count)
+            ])
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.delete(STORES_URL, {
+                    'ids': [store.id for store in stores],
+                }, format='json')
+            self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+            counts.append(len(queries))
+
+        self.assertEqual(counts[0], counts[1])
+
+    def test_versions_bumped(self):
+        """Test bulk writes change the ETag of the list."""
+        brand = Brand.objects.create(user=self.user, name='A')
+        etag = self.client.get(BRANDS_URL)['ETag']
+
+        for method, data in (
+            ('post', [{'name': 'B'}]),
+            ('patch', [{'id': brand.id, 'name': 'C'}]),
+            ('delete', {'ids': [brand.id]}),
+        ):
+            with self.subTest(method=method):
+                getattr(self.client, method)(BRANDS_URL, data, format='json')
+                res = self.client.get(BRANDS_URL, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                etag = res['ETag']
+
+    def test_bulk_create_categories(self):
+        """Test categories are created in the group of the URL."""
+        other_group = Group.objects.create(user=self.user, name='Other')
+
+        res = self.client.post(categories_url(self.group.id), [
+            {'name': 'Creams'},
+            {'name': 'Serums', 'group': other_group.id},
+        ], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            set(Category.objects.filter(
+                name__in=['Creams', 'Serums']
+            ).values_list('group_id', flat=True)),
+            {self.group.id},
+        )
+
+    def test_bulk_create_categories_other_user_group(self):
+        """Test categories are not created in groups of other users."""
+        group = Group.objects.filter(user=self.other).first()
+
+        res = self.client.post(categories_url(group.id),
+                               [{'name': 'Creams'}], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(Category.objects.filter(name='Creams').exists())
+
+    def test_bulk_create_categories_conflict(self):
+        """Test names taken in the group reject the list."""
+        Category.objects.create(user=self.user, name='Creams',
+                                group=self.group)
+
+        res = self.client.post(categories_url(self.group.id), [
+            {'name': 'Serums'}, {'name': 'Creams'},
+        ], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Category.objects.filter(name='Serums').exists())
+
+    def test_bulk_category_default_invalidated(self):
+        """Test renaming categories forgets the default category."""
+        default_id = taxonomy.get_default_category_id(self.group.id)
+        category = Category.objects.create(user=self.user, name='Creams',
+                                           group=self.group)
+
+        res = self.client.patch(categories_url(self.group.id), [
+            {'id': default_id, 'name': 'Misc'},
+            {'id': category.id, 'name': taxonomy.DEFAULT_CATEGORY_NAME},
+        ], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(taxonomy.get_default_category_id(self.group.id),
+                         category.id)
+
+    def test_bulk_category_scoped_to_group(self):
+        """Test categories of other groups are not touched."""
+        group = Group.objects.create(user=self.user, name='Other')
+        category = Category.objects.create(user=self.user, name='Creams',
+                                           group=group)
+
+        res = self.client.patch(categories_url(self.group.id),
+                                [{'id': category.id, 'name': 'Moved'}],
+                                format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.delete(categories_url(self.group.id),
+                           {'ids': [category.id]}, format='json')
+        self.assertTrue(Category.objects.filter(id=category.id).exists())
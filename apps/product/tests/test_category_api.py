@@ -68,6 +68,23 @@ class CategoryApiTests(TestCase):
         self.assertEqual(category.name, payload['name'])
         self.assertEqual(category.group, self.group)
 
+    def test_create_category_in_other_user_group_error(self):
+        """Test creating a category in another user group is not possible."""
+        another_user = create_user(email='test2@example.com',
+                                   username='Testuser2',
+                                   password='Testpass456')
+        another_user_group = Group.objects.get(name='Skin care',
+                                               user=another_user)
+        payload = {
+            'name': 'Test category'
+        }
+        url = category_list_url(another_user_group.id)
+        res = self.client.post(url, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(Category.objects.filter(name=payload['name'])
+                         .exists())
+
     def test_get_category_detail(self):
         """Test get category details with list of products
         belonging to it."""                             # TO-DO: products
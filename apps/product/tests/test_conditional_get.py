@@ -0,0 +1,140 @@
+"""
+Tests for conditional GET requests on the product API.
+"""
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.core.models import Brand, Store, Group, Category, Product
+from apps.product.imports import ProductImporter
+
+
+BRAND_LIST_URL = reverse('product:brand-list')
+STORE_LIST_URL = reverse('product:store-list')
+GROUP_LIST_URL = reverse('product:group-list')
+PRODUCT_LIST_URL = reverse('product:product-list')
+
+
+def create_user(**params):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**params)
+
+
+class ConditionalGetTests(TestCase):
+    """Test ETags follow the catalog versions of the user."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='test@example.com',
+                                username='Testuser',
+                                password='Testpass123')
+        self.client.force_authenticate(self.user)
+        self.group = Group.objects.get(name='Skin care', user=self.user)
+
+    def get(self, url, etag=None):
+        if etag is None:
+            return self.client.get(url)
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def assertNotModified(self, url, etag):
+        with CaptureQueriesContext(connection) as queries:
+            res = self.get(url, etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+        self.assertEqual(len(queries), 0)
+
+    def assertModified(self, url, etag):
+        res = self.get(url, etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+        return res['ETag']
+
+    def test_not_modified_without_queries(self):
+        """Test an unchanged list is answered with 304 and no queries."""
+        Brand.objects.create(name='Test brand', user=self.user)
+        for url in (BRAND_LIST_URL, STORE_LIST_URL, GROUP_LIST_URL,
+                    PRODUCT_LIST_URL):
+            with self.subTest(url=url):
+                etag = self.get(url)['ETag']
+                self.assertNotModified(url, etag)
+
+    def test_change_modifies_list(self):
+        """Test saving and deleting an object changes the ETag."""
+        etag = self.get(BRAND_LIST_URL)['ETag']
+
+        brand = Brand.objects.create(name='Test brand', user=self.user)
+        etag = self.assertModified(BRAND_LIST_URL, etag)
+        brand.delete()
+        self.assertModified(BRAND_LIST_URL, etag)
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    }})
+    def test_cache_without_storage_never_stale(self):
+        """Test a cache keeping no versions does not answer 304."""
+        etag = self.get(BRAND_LIST_URL)['ETag']
+
+        Brand.objects.create(name='Test brand', user=self.user)
+
+        self.assertModified(BRAND_LIST_URL, etag)
+
+    def test_other_user_change_keeps_etag(self):
+        """Test changes of another user keep the ETag."""
+        etag = self.get(BRAND_LIST_URL)['ETag']
+        other_user = create_user(email='test2@example.com',
+                                 username='Testuser2',
+                                 password='Testpass456')
+
+        Brand.objects.create(name='Test brand', user=other_user)
+
+        self.assertNotModified(BRAND_LIST_URL, etag)
+
+    def test_query_params_change_etag(self):
+        """Test every page of a list has its own ETag."""
+        etag = self.get(BRAND_LIST_URL)['ETag']
+
+        res = self.get(f'{BRAND_LIST_URL}?limit=1', etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_category_change_modifies_groups(self):
+        """Test nested categories are part of the group list ETag."""
+        etag = self.get(GROUP_LIST_URL)['ETag']
+
+        Category.objects.create(name='Creams', group=self.group,
+                                user=self.user)
+
+        self.assertModified(GROUP_LIST_URL, etag)
+
+    def test_product_stores_change_modifies_products(self):
+        """Test adding a store to a product changes the product ETag."""
+        product = Product.objects.create(name='Test product',
+                                         group=self.group,
+                                         capacity=50,
+                                         user=self.user)
+        store = Store.objects.create(name='Test store', user=self.user)
+        etag = self.get(PRODUCT_LIST_URL)['ETag']
+
+        product.stores.add(store)
+
+        self.assertModified(PRODUCT_LIST_URL, etag)
+
+    def test_import_modifies_products(self):
+        """Test bulk imported products and brands change the ETags."""
+        product_etag = self.get(PRODUCT_LIST_URL)['ETag']
+        brand_etag = self.get(BRAND_LIST_URL)['ETag']
+
+        ProductImporter(self.user).run([(1, {
+            'name': 'Imported', 'group': 'Skin care', 'capacity': 50,
+            'brand': 'New brand',
+        })])
+
+        self.assertModified(PRODUCT_LIST_URL, product_etag)
+        self.assertModified(BRAND_LIST_URL, brand_etag)
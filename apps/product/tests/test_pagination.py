@@ -0,0 +1,125 @@
+"""
+Tests for the keyset pagination.
+"""
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.pagination import Cursor
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.core.models import Brand
+from apps.product.pagination import KeysetPagination
+
+
+BRAND_LIST_URL = reverse('product:brand-list')
+GROUP_LIST_URL = reverse('product:group-list')
+
+
+def create_user(**params):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**params)
+
+
+class KeysetPaginationTests(TestCase):
+    """Tests for the cursor pagination mode."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='test@example.com',
+                                username='Testuser',
+                                password='Testpass123')
+        self.client.force_authenticate(self.user)
+        # Repeated names make the id tie-breaker matter.
+        Brand.objects.bulk_create([
+            Brand(name=f'Brand {i % 4}', user=self.user) for i in range(25)
+        ])
+
+    def collect(self, url, params=None, key='next'):
+        """Follow cursor links and return the pages."""
+        pages = []
+        while url:
+            res = self.client.get(url, params)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            pages.append(res.data)
+            url, params = res.data[key], None
+        return pages
+
+    def test_cursor_pages_cover_all_rows_in_order(self):
+        """Test following next links returns every row exactly once."""
+        pages = self.collect(BRAND_LIST_URL,
+                             {'pagination': 'cursor', 'limit': 10})
+
+        ids = [brand['id'] for page in pages for brand in page['results']]
+        expected = list(Brand.objects.filter(user=self.user)
+                        .order_by('-name', '-id')
+                        .values_list('id', flat=True))
+        self.assertEqual(len(pages), 3)
+        self.assertEqual(ids, expected)
+        self.assertNotIn('count', pages[0])
+        self.assertIsNone(pages[0]['previous'])
+
+    def test_cursor_previous_links(self):
+        """Test following previous links walks the pages backwards."""
+        pages = self.collect(BRAND_LIST_URL,
+                             {'pagination': 'cursor', 'limit': 10})
+
+        backwards = self.collect(pages[-1]['previous'], key='previous')
+
+        self.assertEqual([page['results'] for page in backwards],
+                         [page['results'] for page in pages[-2::-1]])
+
+    def test_cursor_pagination_skips_count_query(self):
+        """Test a cursor page is read with a single query."""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(BRAND_LIST_URL, {'pagination': 'cursor'})
+
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('COUNT', queries[0]['sql'])
+        self.assertNotIn('OFFSET', queries[0]['sql'])
+
+    def test_invalid_cursor_error(self):
+        """Test a tampered cursor is rejected."""
+        res = self.client.get(BRAND_LIST_URL, {'pagination': 'cursor',
+                                               'cursor': 'cD1ub3Bl'})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_tampered_position_error(self):
+        """Test cursors with values of the wrong types are rejected."""
+        paginator = KeysetPagination()
+        paginator.base_url = f'{BRAND_LIST_URL}?pagination=cursor'
+        for position in (['a', 'x'], [None, None], [1, 2], ['a', True],
+                         ['a', 2 ** 63], ['a\x00', 1], ['a'], {}):
+            with self.subTest(position=position):
+                cursor = paginator.encode_cursor(Cursor(
+                    offset=0, reverse=False, position=position,
+                ))
+                res = self.client.get(cursor)
+
+                self.assertEqual(res.status_code,
+                                 status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_pagination_mode_error(self):
+        """Test an unknown pagination mode is rejected."""
+        res = self.client.get(BRAND_LIST_URL, {'pagination': 'pages'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_offset_pagination_is_default(self):
+        """Test list endpoints keep limit/offset pagination by default."""
+        res = self.client.get(GROUP_LIST_URL)
+
+        self.assertEqual(res.data['count'], 5)
+
+    def test_group_cursor_pagination(self):
+        """Test groups can be paged with cursors."""
+        res = self.client.get(GROUP_LIST_URL, {'pagination': 'cursor'})
+
+        names = [group['name'] for group in res.data['results']]
+        self.assertEqual(names, sorted(names, reverse=True))
+        self.assertIsNone(res.data['next'])
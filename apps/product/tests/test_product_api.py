@@ -0,0 +1,317 @@
+"""
+Tests for the product API.
+"""
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.core.models import (
+    Brand,
+    Store,
+    Group,
+    Category,
+    Product,
+    Blacklist,
+)
+from apps.product.serializers import ProductListSerializer
+
+
+PRODUCT_LIST_URL = reverse('product:product-list')
+PRODUCT_SCAN_URL = reverse('product:product-scan')
+BLACKLIST_URL = reverse('product:blacklist')
+
+
+def product_detail_url(product_id):
+    """Create and return a product detail URL."""
+    return reverse('product:product-detail', args=[product_id])
+
+
+def create_user(**params):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**params)
+
+
+def create_products(user, count):
+    """Create products with a brand, category and stores in bulk."""
+    group = Group.objects.get(name='Skin care', user=user)
+    category, _ = Category.objects.get_or_create(name='Creams',
+                                                 group=group,
+                                                 user=user)
+    brand, _ = Brand.objects.get_or_create(name='Test brand', user=user)
+    stores = [Store.objects.get_or_create(name=f'Store {i}', user=user)[0]
+              for i in range(2)]
+    products = Product.objects.bulk_create([
+        Product(user=user,
+                name=f'Product {i:04}',
+                brand=brand,
+                group=group,
+                category=category,
+                capacity=50)
+        for i in range(count)
+    ])
+    Through = Product.stores.through
+    Through.objects.bulk_create([
+        Through(product_id=product.id, store_id=store.id)
+        for product in products
+        for store in stores
+    ])
+    return products
+
+
+class PublicApiTests(TestCase):
+    """Test unauthenticated API requests."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_product_view_auth_required(self):
+        """Test auth is required to call API."""
+        res = self.client.get(PRODUCT_LIST_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ProductApiTests(TestCase):
+    """Tests for the product API."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='test@example.com',
+                                username='Testuser',
+                                password='Testpass123')
+        self.client.force_authenticate(self.user)
+        self.group = Group.objects.get(name='Skin care', user=self.user)
+
+    def test_retrieve_products(self):
+        """Test retrieving a list of products with related names."""
+        create_products(self.user, 2)
+
+        res = self.client.get(PRODUCT_LIST_URL)
+
+        products = Product.objects.filter(user=self.user).order_by('-name')
+        serializer = ProductListSerializer(products, many=True)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'], serializer.data)
+        product = res.data['results'][0]
+        self.assertEqual(product['brand_name'], 'Test brand')
+        self.assertEqual(product['group_name'], 'Skin care')
+        self.assertEqual(product['category_name'], 'Creams')
+        self.assertEqual(product['store_names'], ['Store 0', 'Store 1'])
+
+    def test_product_list_limited_to_user(self):
+        """Test list of products is limited to authenticated user."""
+        other_user = create_user(email='test2@example.com',
+                                 username='Testuser2',
+                                 password='Testpass456')
+        create_products(self.user, 1)
+        create_products(other_user, 1)
+
+        res = self.client.get(PRODUCT_LIST_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['count'], 1)
+
+    def test_product_list_query_count_is_constant(self):
+        """Test listing products costs the same number of queries
+        regardless of the number of products."""
+        for count in (10, 100, 1000):
+            with self.subTest(count=count):
+                Product.objects.filter(user=self.user).delete()
+                create_products(self.user, count)
+
+                with CaptureQueriesContext(connection) as queries:
+                    res = self.client.get(PRODUCT_LIST_URL,
+                                          {'limit': count})
+
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                self.assertEqual(len(res.data['results']), count)
+                # COUNT, products with joined relations, stores prefetch
+                # and the blacklist of the user.
+                self.assertEqual(len(queries), 4)
+
+    def test_create_product(self):
+        """Test creating a product assigns the default category."""
+        store = Store.objects.create(name='Test store', user=self.user)
+        payload = {
+            'name': 'Test product',
+            'group': self.group.id,
+            'capacity': 50,
+            'stores': [store.id],
+        }
+        res = self.client.post(PRODUCT_LIST_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        product = Product.objects.get(id=res.data['id'])
+        self.assertEqual(product.user, self.user)
+        self.assertEqual(product.category.name, 'Other')
+        self.assertEqual(list(product.stores.all()), [store])
+
+    def test_create_product_with_other_user_brand_error(self):
+        """Test creating a product with another user brand fails."""
+        other_user = create_user(email='test2@example.com',
+                                 username='Testuser2',
+                                 password='Testpass456')
+        brand = Brand.objects.create(name='Test brand', user=other_user)
+        payload = {
+            'name': 'Test product',
+            'group': self.group.id,
+            'brand': brand.id,
+            'capacity': 50,
+        }
+        res = self.client.post(PRODUCT_LIST_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Product.objects.exists())
+
+    def test_create_product_with_category_from_other_group_error(self):
+        """Test the category has to belong to the product group."""
+        other_group = Group.objects.get(name='Hair care', user=self.user)
+        payload = {
+            'name': 'Test product',
+            'group': self.group.id,
+            'category': other_group.categories.first().id,
+            'capacity': 50,
+        }
+        res = self.client.post(PRODUCT_LIST_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('category', res.data)
+
+    def test_create_product_in_group_without_default_category(self):
+        """Test a group without a default category needs a category."""
+        group = Group.objects.get(name='Other', user=self.user)
+        payload = {'name': 'Test product', 'group': group.id, 'capacity': 50}
+        res = self.client.post(PRODUCT_LIST_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('category', res.data)
+        self.assertFalse(Product.objects.exists())
+
+        category = Category.objects.create(user=self.user, name='Tools',
+                                           group=group)
+        res = self.client.post(PRODUCT_LIST_URL,
+                               {**payload, 'category': category.id})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_move_product_to_group_without_default_category(self):
+        """Test moving to a group without a default category fails."""
+        product = create_products(self.user, 1)[0]
+        group = Group.objects.get(name='Other', user=self.user)
+        res = self.client.patch(product_detail_url(product.id),
+                                {'group': group.id})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('category', res.data)
+        product.refresh_from_db()
+        self.assertEqual(product.group, self.group)
+
+    def test_update_product(self):
+        """Test partial update of a product."""
+        product = create_products(self.user, 1)[0]
+        payload = {'name': 'Test product 2'}
+        url = product_detail_url(product.id)
+        res = self.client.patch(url, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        product.refresh_from_db()
+        self.assertEqual(product.name, payload['name'])
+        self.assertEqual(product.user, self.user)
+
+    def test_delete_other_user_product_error(self):
+        """Test trying to delete another user product gives an error."""
+        other_user = create_user(email='test2@example.com',
+                                 username='Testuser2',
+                                 password='Testpass456')
+        product = create_products(other_user, 1)[0]
+
+        url = product_detail_url(product.id)
+        res = self.client.delete(url)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertTrue(Product.objects.filter(id=product.id).exists())
+
+    def test_filter_by_ingredients(self):
+        """Test filtering products that contain or exclude ingredients."""
+        def create(name, ingredients):
+            return Product.objects.create(user=self.user, name=name,
+                                          group=self.group, capacity=50,
+                                          ingredients=ingredients)
+
+        serum = create('Serum', 'Aqua, Niacinamide, Glycerin')
+        create('Toner', 'Aqua, Niacinamide, Alcohol')
+        create('Cream', 'Aqua, Parfum')
+
+        res = self.client.get(PRODUCT_LIST_URL, {
+            'contains': 'niacinamide,AQUA',
+            'excludes': 'alcohol,parfum',
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([product['id'] for product in res.data['results']],
+                         [serum.id])
+
+    def test_update_blacklist(self):
+        """Test replacing the blacklist terms bumps its version."""
+        res = self.client.get(BLACKLIST_URL)
+        self.assertEqual(res.data, {'terms': [], 'version': 1})
+
+        self.client.put(BLACKLIST_URL, {'terms': ['Alcohol']}, format='json')
+        res = self.client.put(BLACKLIST_URL,
+                              {'terms': ['Alcohol denat', 'Parfum']},
+                              format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        blacklist = Blacklist.objects.get(user=self.user)
+        self.assertEqual(blacklist.terms, ['Alcohol denat', 'Parfum'])
+        self.assertEqual(res.data['version'], 2)
+
+    def test_flag_blacklisted_products(self):
+        """Test products listing a blacklisted term are flagged."""
+        def create(name, ingredients):
+            return Product.objects.create(user=self.user, name=name,
+                                          group=self.group, capacity=50,
+                                          ingredients=ingredients)
+
+        create('Toner', 'Aqua, Alcohol Denat., Glycerin')
+        create('Cream', 'Aqua, Cetearyl Alcohol, Fragrance')
+        create('Serum', 'Aqua, Niacinamide')
+        Blacklist.objects.create(user=self.user,
+                                 terms=['alcohol denat', 'Parfum',
+                                        'fragrance'])
+
+        res = self.client.get(PRODUCT_LIST_URL)
+
+        flagged = {product['name']: product['flagged']
+                   for product in res.data['results']}
+        self.assertEqual(flagged, {'Toner': True,
+                                   'Cream': True,
+                                   'Serum': False})
+
+    def test_scan_catalog(self):
+        """Test scanning lists the blacklisted terms of every product."""
+        toner = Product.objects.create(
+            user=self.user, name='Toner', group=self.group, capacity=50,
+            ingredients='Aqua, Alcohol Denat., Parfum',
+        )
+        Product.objects.create(user=self.user, name='Serum',
+                               group=self.group, capacity=50,
+                               ingredients='Aqua, Niacinamide')
+        Blacklist.objects.create(user=self.user,
+                                 terms=['Parfum', 'alcohol denat'])
+
+        res = self.client.get(PRODUCT_SCAN_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['scanned'], 2)
+        self.assertEqual(res.data['flagged'], [{
+            'id': toner.id,
+            'name': 'Toner',
+            'matches': ['alcohol denat', 'Parfum'],
+        }])
@@ -0,0 +1,132 @@
+"""
+Tests for the product export API.
+"""
+import csv
+import io
+import json
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.core.models import Brand, Store, Group, Product
+
+
+PRODUCT_EXPORT_URL = reverse('product:product-export')
+
+
+def create_user(**params):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**params)
+
+
+class PublicApiTests(TestCase):
+    """Test unauthenticated API requests."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_export_auth_required(self):
+        """Test auth is required to call API."""
+        res = self.client.get(PRODUCT_EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ProductExportApiTests(TestCase):
+    """Tests for the product export API."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='test@example.com',
+                                username='Testuser',
+                                password='Testpass123')
+        self.client.force_authenticate(self.user)
+        group = Group.objects.get(name='Skin care', user=self.user)
+        brand = Brand.objects.create(name='Brand A', user=self.user)
+        self.product = Product.objects.create(user=self.user,
+                                              name='Cream',
+                                              brand=brand,
+                                              group=group,
+                                              ingredients='Aqua, Glycerin',
+                                              capacity=50)
+        self.product.stores.set([
+            Store.objects.create(name='Store B', user=self.user),
+            Store.objects.create(name='Store A', user=self.user),
+        ])
+        Product.objects.create(user=self.user, name='Gel', group=group,
+                               capacity=100)
+
+    def test_export_jsonl(self):
+        """Test exporting the catalog as JSON Lines."""
+        res = self.client.get(PRODUCT_EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertTrue(res['Content-Type'].startswith('application/x-ndjson'))
+        rows = [json.loads(line) for line in
+                b''.join(res.streaming_content).splitlines()]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['id'], self.product.id)
+        self.assertEqual(rows[0]['brand'], 'Brand A')
+        self.assertEqual(rows[0]['group'], 'Skin care')
+        self.assertEqual(rows[0]['category'], 'Other')
+        self.assertEqual(rows[0]['stores'], ['Store A', 'Store B'])
+        self.assertEqual(rows[1]['stores'], [])
+
+    def test_export_csv(self):
+        """Test exporting the catalog as CSV."""
+        res = self.client.get(PRODUCT_EXPORT_URL, {'format': 'csv'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['Content-Type'].startswith('text/csv'))
+        content = b''.join(res.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(rows[0]['name'], 'Cream')
+        self.assertEqual(rows[0]['stores'], 'Store A|Store B')
+        self.assertEqual(rows[1]['brand'], '')
+
+    def test_export_limited_to_user(self):
+        """Test only the authenticated user's products are exported."""
+        other_user = create_user(email='test2@example.com',
+                                 username='Testuser2',
+                                 password='Testpass456')
+        Product.objects.create(
+            user=other_user,
+            name='Other product',
+            group=Group.objects.get(name='Skin care', user=other_user),
+            capacity=10,
+        )
+
+        res = self.client.get(PRODUCT_EXPORT_URL)
+
+        lines = b''.join(res.streaming_content).splitlines()
+        self.assertEqual(len(lines), 2)
+
+    def test_export_single_query(self):
+        """Test the export reads the catalog with a single query."""
+        res = self.client.get(PRODUCT_EXPORT_URL)
+
+        with CaptureQueriesContext(connection) as queries:
+            b''.join(res.streaming_content)
+
+        self.assertEqual(len(queries), 1)
+
+    def test_export_round_trips_through_import(self):
+        """Test exported rows can be imported again."""
+        res = self.client.get(PRODUCT_EXPORT_URL)
+        body = b''.join(res.streaming_content)
+        Product.objects.all().delete()
+
+        res = self.client.generic('POST', reverse('product:product-import'),
+                                  body, content_type='application/x-ndjson')
+
+        self.assertEqual(res.data['created'], 2)
+        product = Product.objects.get(name='Cream')
+        self.assertEqual(product.brand.name, 'Brand A')
+        self.assertEqual(product.stores.count(), 2)
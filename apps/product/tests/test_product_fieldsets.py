@@ -0,0 +1,260 @@
+"""
+Tests for sparse fieldsets and expanded relations of products.
+"""
+import re
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.core.models import (
+    Brand,
+    Store,
+    Group,
+    Category,
+    Product,
+    Blacklist,
+)
+
+
+PRODUCT_LIST_URL = reverse('product:product-list')
+PRODUCT_SEARCH_URL = reverse('product:product-search')
+
+
+def product_detail_url(product_id):
+    """Create and return a product detail URL."""
+    return reverse('product:product-detail', args=[product_id])
+
+
+def create_user(**params):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**params)
+
+
+def selected_columns(sql):
+    """Return the columns selected by a query as `table.column`."""
+    select = sql[:sql.index(' FROM ')]
+    return set(re.findall(r'"(core_\w+)"\."(\w+)"', select))
+
+
+def columns(table, *names):
+    return {(table, name) for name in names}
+
+
+class ProductFieldsetTests(TestCase):
+    """Test `?fields=` and `?expand=` shape responses and SQL."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='test@example.com',
+                                username='Testuser',
+                                password='Testpass123')
+        self.client.force_authenticate(self.user)
+        self.group = Group.objects.get(name='Skin care', user=self.user)
+        self.category = Category.objects.create(user=self.user,
+                                                name='Creams',
+                                                group=self.group)
+        self.brand = Brand.objects.create(user=self.user, name='Brand')
+        self.stores = [Store.objects.create(user=self.user, name=name)
+                       for name in ('Store A', 'Store B')]
+        self.product = Product.objects.create(
+            user=self.user, name='Cream', brand=self.brand,
+            group=self.group, category=self.category, capacity=50,
+            ingredients='aqua, glycerin',
+        )
+        self.product.stores.set(self.stores)
+        Blacklist.objects.create(user=self.user, terms=['glycerin'])
+
+    def get(self, url, params):
+        """Return the response and the queries made by the request."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK, res.data)
+        return res, [query['sql'] for query in queries]
+
+    def queries_on(self, queries, table):
+        return [sql for sql in queries
+                if re.search(rf'\bFROM "{table}"', sql)
+                and 'COUNT(' not in sql]
+
+    def product_query(self, queries):
+        [sql] = self.queries_on(queries, 'core_product')
+        return sql
+
+    def test_fields_only_selects_columns(self):
+        """Test a picker list reads two columns and nothing else."""
+        res, queries = self.get(PRODUCT_LIST_URL, {'fields': 'id,name'})
+
+        self.assertEqual(res.data['results'],
+                         [{'id': self.product.id, 'name': 'Cream'}])
+        sql = self.product_query(queries)
+        self.assertEqual(selected_columns(sql),
+                         columns('core_product', 'id', 'name'))
+        self.assertNotIn('JOIN', sql)
+        self.assertEqual(self.queries_on(queries, 'core_store'), [])
+        self.assertEqual(self.queries_on(queries, 'core_blacklist'), [])
+
+    def test_primary_keys_not_joined(self):
+        """Test relation ids are read from the product row."""
+        res, queries = self.get(
+            PRODUCT_LIST_URL, {'fields': 'id,brand,group,category'}
+        )
+
+        self.assertEqual(res.data['results'][0]['brand'], self.brand.id)
+        sql = self.product_query(queries)
+        self.assertEqual(
+            selected_columns(sql),
+            columns('core_product', 'id', 'brand_id', 'group_id',
+                    'category_id'),
+        )
+        self.assertNotIn('JOIN', sql)
+
+    def test_names_joined(self):
+        """Test related names join only the tables they read."""
+        res, queries = self.get(PRODUCT_LIST_URL,
+                                {'fields': 'id,brand_name'})
+
+        self.assertEqual(res.data['results'][0]['brand_name'], 'Brand')
+        sql = self.product_query(queries)
+        self.assertEqual(
+            selected_columns(sql),
+            columns('core_product', 'id', 'brand_id')
+            | columns('core_brand', 'id', 'name'),
+        )
+        self.assertIn('LEFT OUTER JOIN "core_brand"', sql)
+        self.assertNotIn('core_category', sql)
+        self.assertNotIn('core_group', sql)
+
+    def test_store_ids_prefetched(self):
+        """Test store ids prefetch the store ids only."""
+        res, queries = self.get(PRODUCT_LIST_URL, {'fields': 'id,stores'})
+
+        self.assertEqual(res.data['results'][0]['stores'],
+                         [store.id for store in self.stores])
+        [sql] = self.queries_on(queries, 'core_store')
+        self.assertEqual(selected_columns(sql) - columns(
+            'core_product_stores', 'product_id'
+        ), columns('core_store', 'id'))
+
+    def test_flagged_reads_ingredients_and_blacklist(self):
+        """Test the blacklist is only loaded for the flagged field."""
+        res, queries = self.get(PRODUCT_LIST_URL, {'fields': 'id,flagged'})
+
+        self.assertIs(res.data['results'][0]['flagged'], True)
+        self.assertEqual(selected_columns(self.product_query(queries)),
+                         columns('core_product', 'id', 'ingredients'))
+        self.assertEqual(len(self.queries_on(queries, 'core_blacklist')), 1)
+
+    def test_expand_brand(self):
+        """Test the brand object is joined in."""
+        res, queries = self.get(PRODUCT_LIST_URL,
+                                {'fields': 'id,brand', 'expand': 'brand'})
+
+        self.assertEqual(res.data['results'][0]['brand'],
+                         {'id': self.brand.id, 'name': 'Brand'})
+        sql = self.product_query(queries)
+        self.assertEqual(
+            selected_columns(sql),
+            columns('core_product', 'id', 'brand_id')
+            | columns('core_brand', 'id', 'name'),
+        )
+
+    def test_expand_category(self):
+        """Test the category object with its group id is joined in."""
+        res, queries = self.get(PRODUCT_LIST_URL, {
+            'fields': 'id,category', 'expand': 'category',
+        })
+
+        self.assertEqual(res.data['results'][0]['category'], {
+            'id': self.category.id, 'name': 'Creams', 'group': self.group.id,
+        })
+        sql = self.product_query(queries)
+        self.assertEqual(
+            selected_columns(sql),
+            columns('core_product', 'id', 'category_id')
+            | columns('core_category', 'id', 'name', 'group_id'),
+        )
+        self.assertNotIn('core_group', sql)
+
+    def test_expand_stores(self):
+        """Test store objects are prefetched in one query."""
+        res, queries = self.get(PRODUCT_LIST_URL,
+                                {'fields': 'id,stores', 'expand': 'stores'})
+
+        self.assertEqual(res.data['results'][0]['stores'], [
+            {'id': store.id, 'name': store.name} for store in self.stores
+        ])
+        self.assertEqual(selected_columns(self.product_query(queries)),
+                         columns('core_product', 'id'))
+        [sql] = self.queries_on(queries, 'core_store')
+        self.assertEqual(selected_columns(sql) - columns(
+            'core_product_stores', 'product_id'
+        ), columns('core_store', 'id', 'name'))
+
+    def test_expand_all_on_detail(self):
+        """Test a detail screen gets every relation in two queries."""
+        res, queries = self.get(product_detail_url(self.product.id), {
+            'expand': 'brand,category,stores',
+        })
+
+        self.assertEqual(res.data['brand']['name'], 'Brand')
+        self.assertEqual(res.data['category']['name'], 'Creams')
+        self.assertEqual(len(res.data['stores']), 2)
+        self.assertEqual(res.data['group_name'], 'Skin care')
+        sql = self.product_query(queries)
+        for table in ('core_brand', 'core_category', 'core_group'):
+            self.assertIn(f'JOIN "{table}"', sql)
+        self.assertNotIn('search_vector', sql)
+        self.assertEqual(len(self.queries_on(queries, 'core_store')), 1)
+
+    def test_default_list_unchanged(self):
+        """Test without parameters every list field is read."""
+        res, queries = self.get(PRODUCT_LIST_URL, {})
+
+        self.assertEqual(res.data['results'][0]['brand'], self.brand.id)
+        self.assertEqual(res.data['results'][0]['store_names'],
+                         ['Store A', 'Store B'])
+        sql = self.product_query(queries)
+        self.assertNotIn('search_vector', sql)
+        self.assertNotIn('"core_product"."image",', sql)
+        self.assertNotIn('"core_brand"."user_id"', sql)
+
+    def test_search_fields(self):
+        """Test search results take a fieldset too."""
+        res, queries = self.get(PRODUCT_SEARCH_URL,
+                                {'q': 'cream', 'fields': 'id,name,rank'})
+
+        self.assertEqual(set(res.data['results'][0]), {'id', 'name', 'rank'})
+        self.assertNotIn('JOIN', self.product_query(queries))
+
+    def test_expand_outside_fields_ignored(self):
+        """Test relations left out by the fieldset are not expanded."""
+        res, queries = self.get(PRODUCT_LIST_URL,
+                                {'fields': 'id', 'expand': 'brand'})
+
+        self.assertEqual(res.data['results'][0], {'id': self.product.id})
+        self.assertNotIn('JOIN', self.product_query(queries))
+
+    def test_unknown_names_rejected(self):
+        """Test unknown fields and relations are refused."""
+        for params in ({'fields': 'id,secret'}, {'expand': 'group'}):
+            with self.subTest(params=params):
+                res = self.client.get(PRODUCT_LIST_URL, params)
+                self.assertEqual(res.status_code,
+                                 status.HTTP_400_BAD_REQUEST)
+
+    def test_writes_ignore_fieldset(self):
+        """Test updates answer with the full product."""
+        res = self.client.patch(
+            f'{product_detail_url(self.product.id)}?fields=id',
+            {'name': 'Renamed'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['name'], 'Renamed')
+        self.assertIn('brand_name', res.data)
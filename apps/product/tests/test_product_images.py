@@ -0,0 +1,114 @@
+"""
+Tests for product image uploads and variant URLs.
+"""
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from PIL import Image
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.core.models import Group, Product
+
+
+PRODUCT_LIST_URL = reverse('product:product-list')
+
+
+def product_detail_url(product_id):
+    """Create and return a product detail URL."""
+    return reverse('product:product-detail', args=[product_id])
+
+
+def create_user(**params):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**params)
+
+
+def create_image_file(name='photo.jpg'):
+    """Create and return an in-memory JPEG file."""
+    buffer = BytesIO()
+    Image.new('RGB', (800, 600), 'red').save(buffer, 'JPEG')
+    buffer.name = name
+    buffer.seek(0)
+    return buffer
+
+
+class ProductImageApiTests(TestCase):
+    """Test uploading product images through the API."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings = override_settings(MEDIA_ROOT=self.media_root,
+                                     IMAGE_PROCESSING_EAGER=True,
+                                     MEDIA_BLOB_GRACE=0)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.client = APIClient()
+        self.user = create_user(email='test@example.com',
+                                username='Testuser',
+                                password='Testpass123')
+        self.client.force_authenticate(self.user)
+        self.product = Product.objects.create(
+            user=self.user, name='Product', capacity=50,
+            group=Group.objects.get(name='Skin care', user=self.user),
+        )
+
+    def upload_image(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.patch(product_detail_url(self.product.id),
+                                    {'image': create_image_file()},
+                                    format='multipart')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res
+
+    def test_upload_returns_before_processing(self):
+        """Test the upload response has no variants yet."""
+        res = self.upload_image()
+
+        self.assertIn('/media/blobs/', res.data['image'])
+        self.assertIsNone(res.data['images'])
+        self.assertIsNone(res.data['image_width'])
+
+    def test_detail_has_variant_urls(self):
+        """Test details link the original and every variant."""
+        self.upload_image()
+
+        res = self.client.get(product_detail_url(self.product.id))
+
+        self.assertEqual((res.data['image_width'], res.data['image_height']),
+                         (800, 600))
+        self.assertEqual(set(res.data['images']), {'thumbnail', 'medium'})
+        thumbnail = res.data['images']['thumbnail']
+        self.assertEqual(set(thumbnail), {'webp', 'jpeg'})
+        self.assertTrue(thumbnail['webp'].startswith(
+            'http://testserver/media/images/variants/'
+        ))
+
+    def test_list_never_links_original(self):
+        """Test lists link the variants but not the original."""
+        self.upload_image()
+
+        res = self.client.get(PRODUCT_LIST_URL)
+
+        product = res.data['results'][0]
+        self.assertNotIn('image', product)
+        self.assertTrue(product['images']['thumbnail']['jpeg'].endswith(
+            '/thumbnail.jpeg'
+        ))
+
+    def test_processed_image_changes_etag(self):
+        """Test cached lists see the variants once processed."""
+        res = self.client.get(PRODUCT_LIST_URL)
+
+        self.upload_image()
+        res = self.client.get(PRODUCT_LIST_URL,
+                              HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIsNotNone(res.data['results'][0]['images'])
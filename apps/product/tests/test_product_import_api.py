@@ -0,0 +1,135 @@
+"""
+Tests for the product import API.
+"""
+import json
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.core.models import Brand, Store, Category, Product
+
+
+PRODUCT_IMPORT_URL = reverse('product:product-import')
+
+
+def create_user(**params):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**params)
+
+
+def jsonl(rows):
+    """Return rows encoded as JSON Lines."""
+    return '\n'.join(json.dumps(row) for row in rows) + '\n'
+
+
+class ProductImportApiTests(TestCase):
+    """Tests for the product import API."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='test@example.com',
+                                username='Testuser',
+                                password='Testpass123')
+        self.client.force_authenticate(self.user)
+
+    def post(self, body, content_type='application/x-ndjson'):
+        return self.client.generic('POST', PRODUCT_IMPORT_URL, body,
+                                   content_type=content_type)
+
+    def test_import_jsonl(self):
+        """Test importing products from JSON Lines."""
+        body = jsonl([
+            {'name': 'Cream', 'group': 'Skin care', 'brand': 'Brand A',
+             'stores': ['Store A', 'Store B'], 'capacity': 50, 'unit': 2},
+            {'name': 'Shampoo', 'group': 'Hair care', 'capacity': 200},
+        ])
+        res = self.post(body)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['created'], 2)
+        self.assertEqual(res.data['errors'], [])
+        cream = Product.objects.get(name='Cream', user=self.user)
+        self.assertEqual(cream.brand.name, 'Brand A')
+        self.assertEqual(cream.category.name, 'Other')
+        self.assertEqual(cream.category.group, cream.group)
+        self.assertEqual(sorted(cream.stores.values_list('name', flat=True)),
+                         ['Store A', 'Store B'])
+        shampoo = Product.objects.get(name='Shampoo', user=self.user)
+        self.assertIsNone(shampoo.brand)
+        self.assertEqual(shampoo.group.name, 'Hair care')
+
+    def test_import_csv(self):
+        """Test importing products from CSV with existing names."""
+        brand = Brand.objects.create(name='Brand A', user=self.user)
+        Category.objects.create(name='Creams',
+                                group=self.user.group_set.get(
+                                    name='Skin care'),
+                                user=self.user)
+        body = (
+            'name,brand,group,category,stores,capacity,is_favourite\n'
+            'Cream,Brand A,Skin care,Creams,Store A|Store B,50,true\n'
+        )
+        res = self.post(body, content_type='text/csv')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['created'], 1)
+        product = Product.objects.get(user=self.user)
+        self.assertEqual(product.brand, brand)
+        self.assertEqual(product.category.name, 'Creams')
+        self.assertTrue(product.is_favourite)
+        self.assertEqual(Brand.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(product.stores.count(), 2)
+
+    def test_import_reports_row_errors(self):
+        """Test invalid rows are reported without aborting the import."""
+        body = jsonl([
+            {'name': 'Cream', 'group': 'Skin care', 'capacity': 50},
+            {'name': 'No capacity', 'group': 'Skin care'},
+            {'name': 'Unknown group', 'group': 'Nails', 'capacity': 5},
+            {'name': 'Unknown category', 'group': 'Skin care',
+             'category': 'Serums', 'capacity': 5},
+        ]) + 'not json\n'
+        res = self.post(body)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['created'], 1)
+        self.assertEqual(res.data['failed'], 4)
+        self.assertEqual([error['line'] for error in res.data['errors']],
+                         [2, 3, 4, 5])
+        errors = {error['line']: error['errors']
+                  for error in res.data['errors']}
+        self.assertIn('capacity', errors[2])
+        self.assertIn('group', errors[3])
+        self.assertIn('category', errors[4])
+        self.assertIn('non_field_errors', errors[5])
+        self.assertTrue(Product.objects.filter(name='Cream').exists())
+
+    def test_import_uses_queries_per_chunk(self):
+        """Test the number of queries does not grow with the rows."""
+        body = jsonl([
+            {'name': f'Product {i}', 'group': 'Skin care',
+             'brand': f'Brand {i % 3}', 'stores': [f'Store {i % 2}'],
+             'capacity': 50}
+            for i in range(200)
+        ])
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.post(body)
+
+        self.assertEqual(res.data['created'], 200)
+        self.assertEqual(Store.objects.filter(user=self.user).count(), 2)
+        self.assertLess(len(queries), 15)
+
+    def test_import_unsupported_content_type_error(self):
+        """Test an unsupported content type is rejected."""
+        res = self.client.post(PRODUCT_IMPORT_URL, {'name': 'Cream'},
+                               format='json')
+
+        self.assertEqual(res.status_code,
+                         status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
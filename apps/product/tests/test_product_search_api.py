@@ -0,0 +1,103 @@
+"""
+Tests for the product search API.
+"""
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.core.models import Group, Product
+
+
+PRODUCT_SEARCH_URL = reverse('product:product-search')
+
+
+def create_user(**params):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**params)
+
+
+class ProductSearchApiTests(TestCase):
+    """Tests for the product search API."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='test@example.com',
+                                username='Testuser',
+                                password='Testpass123')
+        self.client.force_authenticate(self.user)
+        self.group = Group.objects.get(name='Skin care', user=self.user)
+
+    def create_product(self, name, ingredients='', user=None):
+        user = user or self.user
+        return Product.objects.create(
+            user=user,
+            name=name,
+            group=Group.objects.get(name='Skin care', user=user),
+            ingredients=ingredients,
+            capacity=50,
+        )
+
+    def search(self, q, **params):
+        res = self.client.get(PRODUCT_SEARCH_URL, {'q': q, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [product['name'] for product in res.data['results']]
+
+    def test_search_ranks_name_above_ingredients(self):
+        """Test matches in the name rank above ingredient matches."""
+        self.create_product('Daily cream', 'Aqua, Niacinamide')
+        self.create_product('Niacinamide serum', 'Aqua, Glycerin')
+        self.create_product('Toner', 'Aqua, Alcohol')
+
+        self.assertEqual(self.search('niacinamide'),
+                         ['Niacinamide serum', 'Daily cream'])
+
+    def test_search_vector_updated_with_product(self):
+        """Test edited ingredients are searchable."""
+        product = self.create_product('Cream', 'Aqua')
+        product.ingredients = 'Aqua, Squalane'
+        product.save()
+
+        self.assertEqual(self.search('squalane'), ['Cream'])
+
+    def test_phrase_search(self):
+        """Test phrase search requires adjacent words."""
+        self.create_product('Cream', 'Aqua, Hyaluronic Acid')
+        self.create_product('Peeling', 'Salicylic Acid, Hyaluronic')
+
+        self.assertEqual(self.search('hyaluronic acid', mode='phrase'),
+                         ['Cream'])
+        self.assertEqual(len(self.search('hyaluronic acid')), 2)
+
+    def test_prefix_search(self):
+        """Test prefix search matches the beginning of words."""
+        self.create_product('Cream', 'Aqua, Panthenol')
+        self.create_product('Gel', 'Aqua, Glycerin')
+
+        self.assertEqual(self.search('panth', mode='prefix'), ['Cream'])
+        self.assertEqual(self.search('panth'), [])
+
+    def test_search_limited_to_user(self):
+        """Test only the authenticated user's products are found."""
+        other_user = create_user(email='test2@example.com',
+                                 username='Testuser2',
+                                 password='Testpass456')
+        self.create_product('Cream', 'Aqua', user=other_user)
+
+        self.assertEqual(self.search('cream'), [])
+
+    def test_search_without_words_error(self):
+        """Test a query without words is rejected."""
+        res = self.client.get(PRODUCT_SEARCH_URL, {'q': ' & '})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_search_mode_error(self):
+        """Test an unknown search mode is rejected."""
+        res = self.client.get(PRODUCT_SEARCH_URL,
+                              {'q': 'cream', 'mode': 'fuzzy'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
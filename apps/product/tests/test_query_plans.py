@@ -0,0 +1,156 @@
+"""
+Query plan regression tests for the product API listings.
+
+Every query made by a listing is run through EXPLAIN on a seeded dataset,
+and the test fails when the plan reads a catalog table sequentially or
+sorts rows instead of walking an index. Sorting a handful of rows, like the
+five groups of a user or the store links of one page, is left to the
+planner.
+"""
+import json
+import unittest
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.core.models import Group
+
+
+USERS = 100
+ROWS_PER_USER = 1000
+SORT_NODES = {'Sort', 'Incremental Sort'}
+SMALL_SORT_ROWS = 100
+
+
+def create_user(**params):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**params)
+
+
+def seed_catalog():
+    """Fill the catalog tables for many users and refresh statistics."""
+    User = get_user_model()
+    User.objects.bulk_create([
+        User(email=f'noise{i}@example.com', username=f'noise{i}')
+        for i in range(USERS)
+    ])
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO core_group (user_id, name) "
+            "SELECT u.id, 'Group ' || g FROM core_user u, "
+            "generate_series(1, 5) g "
+            "WHERE u.email LIKE 'noise%%'"
+        )
+        for table in ('core_brand', 'core_store'):
+            cursor.execute(
+                f"INSERT INTO {table} (user_id, name) "
+                "SELECT u.id, 'Name ' || i FROM core_user u, "
+                "generate_series(1, %s) i",
+                [ROWS_PER_USER],
+            )
+        cursor.execute(
+            "INSERT INTO core_category (user_id, group_id, name) "
+            "SELECT g.user_id, g.id, 'Category ' || i FROM core_group g, "
+            "generate_series(1, 20) i"
+        )
+        cursor.execute(
+            "INSERT INTO core_product (user_id, name, brand_id, group_id, "
+            "category_id, price, ingredients, capacity, unit, "
+            "is_available, is_favourite, image) "
+            "SELECT c.user_id, 'Product ' || i, NULL, c.group_id, c.id, "
+            "'2', '', 50, '1', true, false, '' "
+            "FROM core_category c, generate_series(1, 2) i"
+        )
+        cursor.execute(
+            "INSERT INTO core_product_stores (product_id, store_id) "
+            "SELECT p.id, s.id FROM core_product p "
+            "JOIN core_store s ON s.user_id = p.user_id "
+            "AND s.name IN ('Name 1', 'Name 2')"
+        )
+        cursor.execute(
+            "INSERT INTO core_blacklist (user_id, terms, version) "
+            "SELECT u.id, ARRAY(SELECT 'irritant ' || t "
+            "FROM generate_series(1, 100) t), 1 "
+            "FROM core_user u WHERE u.email LIKE 'noise%%'"
+        )
+        cursor.execute('ANALYZE')
+
+
+def plan_nodes(plan):
+    """Yield every node of a JSON query plan."""
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql',
+                     'Query plans are checked on PostgreSQL only.')
+class QueryPlanTests(TestCase):
+    """Test listing queries are served from indexes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(email='test@example.com',
+                               username='Testuser',
+                               password='Testpass123')
+        seed_catalog()
+        cls.group = Group.objects.get(name='Skin care', user=cls.user)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+            result = cursor.fetchone()[0]
+        if isinstance(result, str):
+            result = json.loads(result)
+        return result[0]['Plan']
+
+    def assertIndexedPlans(self, url, params=None):
+        """Assert no query of the request scans or sorts a catalog table."""
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        for query in queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT') or 'core_' not in sql:
+                continue
+            for node in plan_nodes(self.explain(sql)):
+                node_type = node['Node Type']
+                relation = node.get('Relation Name', '')
+                with self.subTest(sql=sql, node=node_type):
+                    if relation.startswith('core_'):
+                        self.assertNotEqual(node_type, 'Seq Scan')
+                    if node_type in SORT_NODES:
+                        self.assertLessEqual(node['Plan Rows'],
+                                             SMALL_SORT_ROWS)
+
+    def test_brand_list_plans(self):
+        self.assertIndexedPlans(reverse('product:brand-list'))
+        self.assertIndexedPlans(reverse('product:brand-list'),
+                                {'pagination': 'cursor'})
+
+    def test_store_list_plans(self):
+        self.assertIndexedPlans(reverse('product:store-list'))
+
+    def test_group_list_plans(self):
+        self.assertIndexedPlans(reverse('product:group-list'))
+
+    def test_category_list_plans(self):
+        self.assertIndexedPlans(
+            reverse('product:category-list', args=[self.group.id])
+        )
+
+    def test_product_list_plans(self):
+        self.assertIndexedPlans(reverse('product:product-list'))
+        self.assertIndexedPlans(reverse('product:product-list'),
+                                {'pagination': 'cursor'})
@@ -0,0 +1,209 @@
+"""
+Tests for the values read path and the orjson renderer.
+"""
+import datetime
+import json
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.core.models import Brand, Category, Group, Store
+from apps.product import serializers, views
+from apps.product.readers import get_reader
+from apps.product.renderers import ORJSONRenderer
+
+
+NAMES = [
+    'Plain',
+    'Zażółć gęślą jaźń',
+    'Quote " and \\ backslash',
+    'Emoji \U0001f484',
+    'Separators \u2028 \u2029',
+    '<script>',
+]
+FAST_JSON = 'application/json; fast=true'
+
+
+def create_user(**params):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**params)
+
+
+class ValuesReadTests(TestCase):
+    """Test the values read path renders today's responses."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='test@example.com',
+                                username='Testuser',
+                                password='Testpass123')
+        self.client.force_authenticate(self.user)
+        self.group = Group.objects.get(name='Skin care', user=self.user)
+        for name in NAMES:
+            Brand.objects.create(user=self.user, name=name)
+            Store.objects.create(user=self.user, name=name)
+            Category.objects.create(user=self.user, name=name,
+                                    group=self.group)
+
+    def get_fast(self, url, params=None):
+        return self.client.get(url, params, HTTP_ACCEPT=FAST_JSON)
+
+    def get_both(self, viewset, url, params=None):
+        """Return the responses of the values path and of DRF."""
+        cache.clear()
+        fast = self.get_fast(url, params)
+        cache.clear()
+        with mock.patch.object(viewset, 'values_read', False):
+            slow = self.get_fast(url, params)
+        return fast, slow
+
+    def assert_same_bytes(self, viewset, url, params=None):
+        fast, slow = self.get_both(viewset, url, params)
+        self.assertEqual(fast.status_code, status.HTTP_200_OK)
+        self.assertEqual(fast.content, slow.content)
+        cache.clear()
+        self.assertEqual(self.client.get(url, params).content, fast.content)
+        return fast
+
+    def test_lists_byte_compatible(self):
+        """Test list responses are identical in both pagination modes."""
+        cases = [
+            (views.BrandViewSet, reverse('product:brand-list')),
+            (views.StoreViewSet, reverse('product:store-list')),
+            (views.GroupViewSet, reverse('product:group-list')),
+            (views.CategoryViewSet, reverse(
+                'product:category-list', args=[self.group.id]
+            )),
+        ]
+        for viewset, url in cases:
+            for params in ({}, {'limit': 2, 'offset': 1},
+                           {'pagination': 'cursor', 'limit': 2}):
+                with self.subTest(url=url, params=params):
+                    self.assert_same_bytes(viewset, url, params)
+
+    def test_cursor_pages_byte_compatible(self):
+        """Test the next cursor pages rows the same way."""
+        url = reverse('product:brand-list')
+        res = self.assert_same_bytes(views.BrandViewSet, url,
+                                     {'pagination': 'cursor', 'limit': 2})
+
+        self.assert_same_bytes(views.BrandViewSet, res.data['next'])
+
+    def test_details_byte_compatible(self):
+        """Test detail responses are identical."""
+        brand = Brand.objects.get(name=NAMES[1])
+        category = Category.objects.get(name=NAMES[3])
+        cases = [
+            (views.BrandViewSet,
+             reverse('product:brand-detail', args=[brand.id])),
+            (views.GroupViewSet,
+             reverse('product:group-detail', args=[self.group.id])),
+            (views.CategoryViewSet,
+             reverse('product:category-detail',
+                     args=[self.group.id, category.id])),
+        ]
+        for viewset, url in cases:
+            with self.subTest(url=url):
+                self.assert_same_bytes(viewset, url)
+
+    def test_missing_detail_not_found(self):
+        """Test unknown and foreign rows are not found."""
+        other = create_user(email='other@example.com', username='Other',
+                            password='Testpass123')
+        brand = Brand.objects.create(user=other, name='Other')
+
+        for brand_id in (brand.id, 'abc'):
+            with self.subTest(brand_id=brand_id):
+                res = self.get_fast(
+                    reverse('product:brand-detail', args=[brand_id])
+                )
+                self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_group_list_queries(self):
+        """Test nested categories are read with one query per page."""
+        Group.objects.create(user=self.user, name='Empty')
+        cache.clear()
+        self.get_fast(reverse('product:group-list'))
+        cache.clear()
+
+        # Count, groups and categories, versions are cached.
+        with self.assertNumQueries(3):
+            res = self.get_fast(reverse('product:group-list'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_fast_path_opt_in(self):
+        """Test only clients asking for it get the values path."""
+        url = reverse('product:brand-list')
+        for accept, params, fast in (
+            (FAST_JSON, {}, True),
+            ('application/json', {}, False),
+            ('*/*', {}, False),
+            ('application/json', {'format': 'json'}, False),
+        ):
+            with self.subTest(accept=accept, params=params):
+                cache.clear()
+                with mock.patch('apps.product.readers.get_reader',
+                                side_effect=get_reader) as reader:
+                    res = self.client.get(url, params, HTTP_ACCEPT=accept)
+
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                self.assertEqual(reader.called, fast)
+                self.assertEqual(isinstance(res.accepted_renderer,
+                                            ORJSONRenderer), fast)
+
+    def test_browsable_api_kept(self):
+        """Test HTML is still negotiated for browsers."""
+        res = self.client.get(reverse('product:brand-list'),
+                              HTTP_ACCEPT='text/html')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('text/html', res['Content-Type'])
+
+    def test_unsupported_serializer_left_to_drf(self):
+        """Test serializers with method fields are not compiled."""
+        self.assertIsNone(get_reader(serializers.ProductSerializer))
+        self.assertIsNotNone(get_reader(serializers.GroupSerializer))
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    """Test the orjson renderer matches JSONRenderer."""
+
+    def assert_same_bytes(self, data, media_type='application/json'):
+        self.assertEqual(ORJSONRenderer().render(data, media_type),
+                         JSONRenderer().render(data, media_type))
+
+    def test_byte_compatible(self):
+        """Test strings, numbers and DRF encoded types render the same."""
+        data = {
+            'names': NAMES,
+            'numbers': [0, -1, 2 ** 40, 0.5, True, None],
+            'datetime': datetime.datetime(2024, 5, 1, 12, 30, 15, 123456,
+                                          tzinfo=datetime.timezone.utc),
+            'date': datetime.date(2024, 5, 1),
+            'time': datetime.time(12, 30),
+            'decimal': Decimal('12.50'),
+            'lazy': gettext_lazy('This field is required.'),
+            'nested': [{'id': 1, 'items': []}],
+        }
+
+        self.assert_same_bytes(data)
+
+    def test_indent_left_to_json_renderer(self):
+        """Test indented output is rendered by JSONRenderer."""
+        data = {'name': NAMES[1]}
+        media_type = 'application/json; indent=2'
+
+        self.assert_same_bytes(data, media_type)
+        self.assertEqual(json.loads(ORJSONRenderer().render(data,
+                                                            media_type)),
+                         data)
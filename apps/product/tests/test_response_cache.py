@@ -0,0 +1,144 @@
+"""
+Tests for the cached group responses.
+"""
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.core.models import Group, Category
+from apps.product import caching
+
+
+GROUP_LIST_URL = reverse('product:group-list')
+
+
+def group_detail_url(group_id):
+    """Create and return a group detail URL."""
+    return reverse('product:group-detail', args=[group_id])
+
+
+def create_user(**params):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**params)
+
+
+class GetOrBuildTests(SimpleTestCase):
+    """Test the single-flight cache helper."""
+
+    def setUp(self):
+        cache.clear()
+        caching.reset_stats()
+
+    def test_concurrent_misses_build_once(self):
+        """Test a burst of misses waits for a single build."""
+        builds = []
+
+        def build():
+            builds.append(1)
+            time.sleep(0.1)
+            return {'value': 1}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                caching.get_or_build('test-key', build, 60)
+            ))
+            for _ in range(20)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(builds), 1)
+        self.assertEqual(results, [{'value': 1}] * 20)
+        self.assertEqual(caching.stats, {'hits': 19, 'misses': 1})
+
+    def test_none_is_not_cached(self):
+        """Test builds returning None run again on the next call."""
+        caching.get_or_build('test-key', lambda: None, 60)
+
+        self.assertEqual(caching.get_or_build('test-key', lambda: 2, 60), 2)
+        self.assertEqual(caching.stats, {'hits': 0, 'misses': 2})
+
+
+class GroupResponseCacheTests(TestCase):
+    """Test group responses are served from the cache."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user(email='test@example.com',
+                                username='Testuser',
+                                password='Testpass123')
+        self.client.force_authenticate(self.user)
+        self.group = Group.objects.get(name='Skin care', user=self.user)
+
+    def assertCached(self, url, params=None):
+        """Assert the second request is answered without queries."""
+        res = self.client.get(url, params)
+        with CaptureQueriesContext(connection) as queries:
+            cached = self.client.get(url, params)
+
+        self.assertEqual(cached.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached.data, res.data)
+        self.assertEqual(len(queries), 0)
+        return cached
+
+    def test_list_cached_per_page(self):
+        """Test each pagination window is cached separately."""
+        first = self.assertCached(GROUP_LIST_URL, {'limit': 2})
+        second = self.assertCached(GROUP_LIST_URL,
+                                   {'limit': 2, 'offset': 2})
+
+        self.assertNotEqual(first.data['results'], second.data['results'])
+
+    def test_detail_cached(self):
+        """Test group details are cached."""
+        self.assertCached(group_detail_url(self.group.id))
+
+    def test_category_change_invalidates(self):
+        """Test a new category of the user shows up at once."""
+        self.assertCached(group_detail_url(self.group.id))
+
+        Category.objects.create(name='Creams', group=self.group,
+                                user=self.user)
+        res = self.client.get(group_detail_url(self.group.id))
+
+        names = [category['name'] for category in res.data['categories']]
+        self.assertIn('Creams', names)
+
+    def test_other_user_change_keeps_cache(self):
+        """Test changes of another user do not invalidate the cache."""
+        self.client.get(GROUP_LIST_URL)
+        other_user = create_user(email='test2@example.com',
+                                 username='Testuser2',
+                                 password='Testpass456')
+        Category.objects.create(
+            name='Creams', user=other_user,
+            group=Group.objects.get(name='Skin care', user=other_user),
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(GROUP_LIST_URL)
+
+        self.assertEqual(len(queries), 0)
+
+    def test_missing_group_not_cached(self):
+        """Test not found responses are not cached."""
+        url = group_detail_url(self.group.id + 1000)
+
+        self.assertEqual(self.client.get(url).status_code,
+                         status.HTTP_404_NOT_FOUND)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+
+        self.assertEqual(len(queries), 1)
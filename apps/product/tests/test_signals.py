@@ -2,9 +2,11 @@
 Tests for signals.
 """
 
-from django.test import TestCase
+from django.db import IntegrityError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
-from apps.core.models import Group
+from apps.core.models import Group, Category
 
 
 def create_user(email='user1@example.com', password='Testpass123'):
@@ -49,3 +51,36 @@ class SignalsTests(TestCase):
         for group in groups:
             category = group.categories.first()
             self.assertEqual(category.name, 'Other')
+
+    def test_groups_and_categories_inserted_in_bulk(self):
+        """Test the taxonomy is created with one INSERT per model."""
+        with CaptureQueriesContext(connection) as queries:
+            create_user()
+
+        inserts = [query['sql'] for query in queries
+                   if query['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 3)   # user, groups, categories
+
+    @override_settings(DEFAULT_TAXONOMY={
+        'Face': ['Serums', 'Other'],
+        'Other': [],
+    })
+    def test_taxonomy_template_configurable(self):
+        """Test groups and categories follow the configured template."""
+        user = create_user()
+
+        categories = (Category.objects.filter(user=user)
+                      .order_by('group__id', 'id')
+                      .values_list('group__name', 'name'))
+        self.assertEqual(list(categories),
+                         [('Face', 'Serums'), ('Face', 'Other')])
+        self.assertEqual(Group.objects.filter(user=user).count(), 2)
+
+    @override_settings(DEFAULT_TAXONOMY={'Face': ['Other', 'Other']})
+    def test_failed_taxonomy_rolls_back_user(self):
+        """Test the user is not created when the taxonomy fails."""
+        with self.assertRaises(IntegrityError):
+            create_user()
+
+        self.assertFalse(get_user_model().objects.exists())
+        self.assertFalse(Group.objects.exists())
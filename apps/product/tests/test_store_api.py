@@ -56,7 +56,7 @@ class StoreApiTests(TestCase):
 
         res = self.client.get(STORE_LIST_URL)
 
-        stores = Store.objects.all()
+        stores = Store.objects.all().order_by('-name', '-id')
         serializer = StoreSerializer(stores, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data['results'], serializer.data)
@@ -0,0 +1,408 @@
+"""
+Tests for resumable image uploads.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.core.blobs import CHUNK_SIZE
+from apps.core.models import Group, MediaBlob, Product, UploadSession
+from apps.product import uploads
+
+
+UPLOAD_LIST_URL = reverse('product:upload-list')
+
+
+def upload_detail_url(session_id):
+    """Create and return an upload session URL."""
+    return reverse('product:upload-detail', args=[session_id])
+
+
+def upload_finalize_url(session_id):
+    """Create and return an upload finalize URL."""
+    return reverse('product:upload-finalize', args=[session_id])
+
+
+def create_user(**params):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(**params)
+
+
+def create_image_bytes(size=(640, 480)):
+    """Create and return the bytes of a JPEG image."""
+    buffer = BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+class BoundedStream(BytesIO):
+    """Request stream refusing reads larger than a chunk."""
+
+    def read(self, size=-1):
+        assert 0 < size <= CHUNK_SIZE, 'unbounded read'
+        return super().read(size)
+
+
+class UploadApiTests(TestCase):
+    """Test uploading product images in chunks."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings = override_settings(MEDIA_ROOT=self.media_root,
+                                     IMAGE_PROCESSING_EAGER=True)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.client = APIClient()
+        self.user = create_user(email='test@example.com',
+                                username='Testuser',
+                                password='Testpass123')
+        self.client.force_authenticate(self.user)
+        self.product = Product.objects.create(
+            user=self.user, name='Product', capacity=50,
+            group=Group.objects.get(name='Skin care', user=self.user),
+        )
+        self.data = create_image_bytes()
+
+    def create_session(self, data=None, **params):
+        data = self.data if data is None else data
+        payload = {
+            'product': self.product.id,
+            'filename': 'photo.jpg',
+            'size': len(data),
+            'checksum': hashlib.sha256(data).hexdigest(),
+            **params,
+        }
+        return self.client.post(UPLOAD_LIST_URL, payload, format='json')
+
+    def send_chunk(self, session_id, chunk, offset,
+                   content_type=uploads.UPLOAD_CONTENT_TYPE):
+        return self.client.generic(
+            'PATCH', upload_detail_url(session_id), chunk,
+            content_type=content_type, HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def upload(self, data=None):
+        """Upload the data in two chunks and return the session id."""
+        data = self.data if data is None else data
+        session_id = self.create_session(data).data['id']
+        middle = len(data) // 2
+        self.send_chunk(session_id, data[:middle], 0)
+        self.send_chunk(session_id, data[middle:], middle)
+        return session_id
+
+    def finalize(self, session_id):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(upload_finalize_url(session_id))
+
+    def test_create_session(self):
+        """Test opening a session creates an empty part file."""
+        res = self.create_session()
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['offset'], 0)
+        self.assertEqual(res['Upload-Offset'], '0')
+        session = UploadSession.objects.get(pk=res.data['id'])
+        self.assertEqual(session.user, self.user)
+        self.assertEqual(os.path.getsize(uploads.part_path(session)), 0)
+
+    def test_chunks_resume_from_offset(self):
+        """Test chunks append and HEAD reports where to resume."""
+        session_id = self.create_session().data['id']
+
+        res = self.send_chunk(session_id, self.data[:1000], 0)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['offset'], 1000)
+
+        res = self.client.head(upload_detail_url(session_id))
+        self.assertEqual(res['Upload-Offset'], '1000')
+
+        res = self.send_chunk(session_id, self.data[1000:], 1000)
+        self.assertEqual(res.data['offset'], len(self.data))
+        with open(uploads.part_path(UploadSession(pk=session_id)),
+                  'rb') as part:
+            self.assertEqual(part.read(), self.data)
+
+    def test_wrong_offset_conflict(self):
+        """Test a chunk at another offset is rejected."""
+        session_id = self.create_session().data['id']
+        self.send_chunk(session_id, self.data[:1000], 0)
+
+        res = self.send_chunk(session_id, self.data[500:1500], 500)
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(UploadSession.objects.get().offset, 1000)
+
+    def test_chunk_past_size_rejected(self):
+        """Test chunks may not exceed the declared size."""
+        session_id = self.create_session().data['id']
+
+        res = self.send_chunk(session_id, self.data + b'extra', 0)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_wrong_content_type_rejected(self):
+        """Test chunks must be sent as offset octet streams."""
+        session_id = self.create_session().data['id']
+
+        res = self.send_chunk(session_id, self.data, 0,
+                              content_type='application/octet-stream')
+
+        self.assertEqual(res.status_code,
+                         status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+    def test_interrupted_chunk_keeps_received_bytes(self):
+        """Test a broken off stream advances the offset to what arrived."""
+        session = UploadSession.objects.get(
+            pk=self.create_session().data['id']
+        )
+
+        written = uploads.write_chunk(session, BytesIO(self.data[:300]), 0,
+                                      len(self.data))
+
+        self.assertEqual(written, 300)
+        session.refresh_from_db()
+        self.assertEqual(session.offset, 300)
+
+    def test_chunks_streamed_to_disk(self):
+        """Test chunks are copied in bounded reads."""
+        data = os.urandom(CHUNK_SIZE * 3)
+        session = UploadSession.objects.get(
+            pk=self.create_session(data).data['id']
+        )
+
+        uploads.write_chunk(session, BoundedStream(data), 0, len(data))
+
+        self.assertEqual(os.path.getsize(uploads.part_path(session)),
+                         len(data))
+
+    def test_chunk_takes_no_row_lock(self):
+        """Test chunks are written without locking the session row."""
+        session_id = self.create_session().data['id']
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.send_chunk(session_id, self.data[:1000], 0)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        for query in queries:
+            self.assertNotIn('FOR UPDATE', query['sql'])
+
+    def test_concurrent_chunk_conflict(self):
+        """Test a chunk sent while another one is in flight is refused."""
+        session = UploadSession.objects.get(
+            pk=self.create_session().data['id']
+        )
+
+        with uploads.lock_part(session):
+            res = self.send_chunk(session.pk, self.data[:1000], 0)
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(UploadSession.objects.get().offset, 0)
+
+    def test_stale_offset_keeps_stored_bytes(self):
+        """Test a chunk at an offset read before another chunk landed
+        neither truncates nor overwrites the stored bytes."""
+        session_id = self.create_session().data['id']
+        stale = UploadSession.objects.get(pk=session_id)
+        self.send_chunk(session_id, self.data[:1000], 0)
+
+        with self.assertRaises(uploads.OffsetConflict):
+            uploads.write_chunk(stale, BytesIO(b'x' * 500), 0, 500)
+
+        with open(uploads.part_path(stale), 'rb') as part:
+            self.assertEqual(part.read(), self.data[:1000])
+        self.assertEqual(UploadSession.objects.get().offset, 1000)
+
+    def test_finalize_attaches_image(self):
+        """Test finalizing stores the image and processes it."""
+        session_id = self.upload()
+        session = UploadSession.objects.get(pk=session_id)
+
+        res = self.finalize(session_id)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.image.name,
+                         MediaBlob.objects.get(references=1).name)
+        self.assertEqual(self.product.image.read(), self.data)
+        self.assertEqual(self.product.image_width, 640)
+        self.assertIn('/media/blobs/', res.data['image'])
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertFalse(os.path.exists(uploads.part_path(session)))
+
+    def test_finalize_incomplete_rejected(self):
+        """Test an upload missing bytes cannot be finalized."""
+        session_id = self.create_session().data['id']
+        self.send_chunk(session_id, self.data[:1000], 0)
+
+        res = self.finalize(session_id)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(UploadSession.objects.get().offset, 1000)
+
+    def test_checksum_mismatch_restarts_upload(self):
+        """Test corrupted bytes are discarded for a new attempt."""
+        corrupted = bytearray(self.data)
+        corrupted[100] ^= 0xff
+        session_id = self.create_session().data['id']
+        self.send_chunk(session_id, bytes(corrupted), 0)
+
+        res = self.finalize(session_id)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('checksum', res.data)
+        self.assertEqual(UploadSession.objects.get().offset, 0)
+        self.product.refresh_from_db()
+        self.assertFalse(self.product.image)
+
+    def test_non_image_rejected(self):
+        """Test uploads that are not images are not attached."""
+        session_id = self.upload(b'not an image')
+
+        res = self.finalize(session_id)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.product.refresh_from_db()
+        self.assertFalse(self.product.image)
+
+    def test_non_image_extension_rejected(self):
+        """Test sessions are only opened for image file names."""
+        for filename in ('page.html', 'icon.svg', 'photo'):
+            with self.subTest(filename=filename):
+                res = self.create_session(filename=filename)
+
+                self.assertEqual(res.status_code,
+                                 status.HTTP_400_BAD_REQUEST)
+                self.assertIn('filename', res.data)
+        self.assertFalse(UploadSession.objects.exists())
+
+    def test_finalize_names_image_by_format(self):
+        """Test the stored image takes the extension of its format."""
+        session_id = self.create_session(filename='photo.png').data['id']
+        self.send_chunk(session_id, self.data, 0)
+
+        res = self.finalize(session_id)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.product.refresh_from_db()
+        self.assertEqual(os.path.splitext(self.product.image.name)[1],
+                         '.jpg')
+
+    @override_settings(UPLOAD_MAX_SIZE=100)
+    def test_size_limited(self):
+        """Test sessions larger than the limit are refused."""
+        res = self.create_session()
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_other_user_product_rejected(self):
+        """Test sessions can only target own products."""
+        other_user = create_user(email='test2@example.com',
+                                 username='Testuser2',
+                                 password='Testpass456')
+        product = Product.objects.create(
+            user=other_user, name='Other', capacity=50,
+            group=Group.objects.get(name='Skin care', user=other_user),
+        )
+
+        res = self.create_session(product=product.id)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_other_user_session_not_found(self):
+        """Test sessions of other users are not accessible."""
+        session_id = self.create_session().data['id']
+        other_user = create_user(email='test2@example.com',
+                                 username='Testuser2',
+                                 password='Testpass456')
+        self.client.force_authenticate(other_user)
+
+        res = self.send_chunk(session_id, self.data, 0)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_abort_deletes_part(self):
+        """Test deleting a session removes its part file."""
+        session_id = self.create_session().data['id']
+        path = uploads.part_path(UploadSession(pk=session_id))
+
+        res = self.client.delete(upload_detail_url(session_id))
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(os.path.exists(path))
+
+    def test_expired_sessions_cleared(self):
+        """Test the cleanup command deletes expired sessions and parts."""
+        expired_id = self.create_session().data['id']
+        active_id = self.create_session().data['id']
+        UploadSession.objects.filter(pk=expired_id).update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        expired_path = uploads.part_path(UploadSession(pk=expired_id))
+        old = (timezone.now() - timedelta(days=2)).timestamp()
+        os.utime(expired_path, (old, old))
+
+        self.assertEqual(self.client.head(
+            upload_detail_url(expired_id)
+        ).status_code, status.HTTP_404_NOT_FOUND)
+        call_command('clear_uploads', stdout=StringIO())
+
+        self.assertEqual(list(UploadSession.objects.values_list(
+            'pk', flat=True
+        )), [UploadSession.objects.get(pk=active_id).pk])
+        self.assertFalse(os.path.exists(expired_path))
+        self.assertTrue(os.path.exists(
+            uploads.part_path(UploadSession(pk=active_id))
+        ))
+
+
+class ConnectionReleaseTests(TransactionTestCase):
+    """Test chunks are streamed without holding a database connection."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings = override_settings(MEDIA_ROOT=self.media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        user = create_user(email='test@example.com', username='Testuser',
+                           password='Testpass123')
+        product = Product.objects.create(
+            user=user, name='Product', capacity=50,
+            group=Group.objects.get(name='Skin care', user=user),
+        )
+        self.session = UploadSession.objects.create(
+            user=user, product=product, filename='photo.jpg', size=1000,
+            checksum='0' * 64, expires_at=uploads.get_expiry(),
+        )
+        uploads.create_part(self.session)
+
+    def test_connection_released_while_streaming(self):
+        """Test the connection is back in the pool during reads."""
+        test = self
+
+        class Stream(BytesIO):
+            def read(self, size=-1):
+                test.assertIsNone(connection.connection)
+                return super().read(size)
+
+        written = uploads.write_chunk(self.session, Stream(b'x' * 1000), 0,
+                                      1000)
+
+        self.assertEqual(written, 1000)
+        self.assertEqual(UploadSession.objects.get().offset, 1000)
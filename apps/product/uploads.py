@@ -0,0 +1,202 @@
+"""
+Resumable uploads of product images.
+
+A session is opened with the size and SHA-256 of the file. Each PATCH
+appends a chunk at the session offset, read from the request stream
+straight into a part file on disk, so an interrupted upload resumes from
+the last byte the server stored. Chunks are streamed holding a lock on the
+part file but no database lock or connection, so slow clients do not tie
+up the connection pool. Finalizing checks the size, checksum and
+image, then moves the part file into the blob storage and attaches it to
+the product.
+"""
+import fcntl
+import hashlib
+import mimetypes
+import os
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+from rest_framework import exceptions, status
+
+from apps.core.blobs import CHUNK_SIZE, blob_storage
+from apps.core.models import Product, UploadSession
+
+
+UPLOAD_CONTENT_TYPE = 'application/offset+octet-stream'
+OFFSET_HEADER = 'Upload-Offset'
+
+
+class OffsetConflict(exceptions.APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'The offset does not match the received bytes.'
+    default_code = 'offset_conflict'
+
+
+class ChecksumMismatch(exceptions.ValidationError):
+    pass
+
+
+class PartFile(File):
+    """Finished part file, hashed already and moved into the storage."""
+
+    def __init__(self, file, name, sha256):
+        super().__init__(file, name)
+        self.sha256 = sha256
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def part_path(session):
+    return blob_storage.path(f'uploads/{session.pk}.part')
+
+
+def get_expiry():
+    return timezone.now() + timedelta(seconds=settings.UPLOAD_SESSION_TTL)
+
+
+def create_part(session):
+    """Create the empty part file of a new session."""
+    path = part_path(session)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'wb').close()
+
+
+def delete_part(session):
+    try:
+        os.remove(part_path(session))
+    except FileNotFoundError:
+        pass
+
+
+@contextmanager
+def lock_part(session):
+    """Open the part file of the session, locked against other chunks."""
+    with open(part_path(session), 'r+b') as part:
+        try:
+            fcntl.flock(part, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise OffsetConflict('Another chunk of the upload is in flight.')
+        yield part
+
+
+def release_connection():
+    """Give the database connection back to the pool while the client is
+    streaming, unless a transaction needs it."""
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        connection.close()
+
+
+def write_chunk(session, stream, offset, length):
+    """Append `length` bytes from the stream at `offset` of the session.
+
+    Bytes received before the stream breaks off are kept, so the client can
+    resume from the new offset.
+    """
+    with lock_part(session) as part:
+        # Chunks move the offset holding the file lock, so it is current.
+        try:
+            session.refresh_from_db(fields=['offset', 'size'])
+        except UploadSession.DoesNotExist:
+            raise exceptions.NotFound()
+        if offset != session.offset:
+            raise OffsetConflict()
+        if offset + length > session.size:
+            raise exceptions.ValidationError(
+                {'detail': 'The chunk ends after the declared size.'}
+            )
+        release_connection()
+        written = 0
+        # Drop anything after the offset left by a failed write.
+        part.seek(offset)
+        part.truncate()
+        while written < length:
+            try:
+                chunk = stream.read(min(CHUNK_SIZE, length - written))
+            except OSError:
+                # The client went away, keep what arrived.
+                break
+            if not chunk:
+                break
+            part.write(chunk)
+            written += len(chunk)
+        part.flush()
+        session.offset = offset + written
+        session.expires_at = get_expiry()
+        updated = UploadSession.objects.filter(
+            pk=session.pk, offset=offset
+        ).update(offset=session.offset, expires_at=session.expires_at)
+    if not updated:
+        # Restarted or finalized meanwhile.
+        raise OffsetConflict()
+    return written
+
+
+def restart(session):
+    """Discard the received bytes so the client sends them again."""
+    session.offset = 0
+    session.save(update_fields=['offset'])
+    open(part_path(session), 'wb').close()
+
+
+def hash_part(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as part:
+        for chunk in iter(lambda: part.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def image_filename(filename, image_format):
+    """Return the file name with an extension of the detected format, so
+    the file is served as what it is."""
+    root, extension = os.path.splitext(filename)
+    if Image.registered_extensions().get(extension.lower()) != image_format:
+        extension = mimetypes.guess_extension(
+            Image.MIME.get(image_format, '')
+        ) or ''
+    return root + extension
+
+
+def finalize(session):
+    """Check the finished upload and attach it as the product image."""
+    if session.offset != session.size:
+        raise exceptions.ValidationError(
+            {'detail': f'Upload incomplete, {session.offset} of '
+                       f'{session.size} bytes received.'}
+        )
+    path = part_path(session)
+    digest = hash_part(path)
+    if digest != session.checksum:
+        raise ChecksumMismatch(
+            {'checksum': 'The received bytes do not match the checksum.'}
+        )
+    try:
+        with Image.open(path) as image:
+            image_format = image.format
+            image.verify()
+    except Exception:
+        raise exceptions.ValidationError(
+            {'detail': 'The upload is not a valid image.'}
+        )
+
+    filename = image_filename(session.filename, image_format)
+    with open(path, 'rb') as part:
+        name = blob_storage.save(filename, PartFile(part, filename, digest))
+    delete_part(session)
+    with transaction.atomic():
+        product = Product.objects.select_for_update().get(
+            pk=session.product_id
+        )
+        product.image = name
+        product.save(update_fields=['image', 'image_width', 'image_height',
+                                    'image_variants'])
+        session.delete()
+    return product
@@ -2,31 +2,73 @@
 URL mappings for the user API.
 """
 from django.urls import include, path
-from rest_framework import routers
+from .async_views import (
+    BrandAsyncView,
+    StoreAsyncView,
+    GroupAsyncView,
+    CategoryAsyncView,
+    ProductAsyncView,
+)
+from .bulk import BulkRouter
 from .views import (
     BrandViewSet,
     StoreViewSet,
     GroupViewSet,
     CategoryViewSet,
+    ProductViewSet,
+    BlacklistView,
+    BatchView,
+    BootstrapView,
+    UploadSessionViewSet,
 )
 
 
-router = routers.DefaultRouter()
+router = BulkRouter()
 router.register(r'brands', BrandViewSet, basename='brand')
 router.register(r'stores', StoreViewSet, basename='store')
 router.register(r'groups', GroupViewSet, basename='group')
+router.register(r'products', ProductViewSet, basename='product')
+router.register(r'uploads', UploadSessionViewSet, basename='upload')
 
 
 app_name = 'product'
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('blacklist/', BlacklistView.as_view(), name='blacklist'),
+    path('batch/', BatchView.as_view(), name='batch'),
+    path('bootstrap/', BootstrapView.as_view(), name='bootstrap'),
     path('groups/<int:group_id>/categories/',
-         CategoryViewSet.as_view({'get': 'list', 'post': 'create'}),
+         CategoryViewSet.as_view({'get': 'list',
+                                  'post': 'create',
+                                  'patch': 'bulk_update',
+                                  'delete': 'bulk_destroy'}),
          name='category-list'),
     path('groups/<int:group_id>/categories/<int:pk>/',
          CategoryViewSet.as_view({'get': 'retrieve',
                                   'put': 'update',
                                   'delete': 'destroy'}),
          name='category-detail'),
+    path('async/brands/', BrandAsyncView.as_view(),
+         name='async-brand-list'),
+    path('async/brands/<int:pk>/', BrandAsyncView.as_view(),
+         name='async-brand-detail'),
+    path('async/stores/', StoreAsyncView.as_view(),
+         name='async-store-list'),
+    path('async/stores/<int:pk>/', StoreAsyncView.as_view(),
+         name='async-store-detail'),
+    path('async/groups/', GroupAsyncView.as_view(),
+         name='async-group-list'),
+    path('async/groups/<int:pk>/', GroupAsyncView.as_view(),
+         name='async-group-detail'),
+    path('async/groups/<int:group_id>/categories/',
+         CategoryAsyncView.as_view(),
+         name='async-category-list'),
+    path('async/groups/<int:group_id>/categories/<int:pk>/',
+         CategoryAsyncView.as_view(),
+         name='async-category-detail'),
+    path('async/products/', ProductAsyncView.as_view(),
+         name='async-product-list'),
+    path('async/products/<int:pk>/', ProductAsyncView.as_view(),
+         name='async-product-detail'),
 ]
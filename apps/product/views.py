@@ -1,73 +1,361 @@
 """
 Views for the product API.
 """
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Count, Prefetch
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from drf_spectacular.utils import extend_schema
 from rest_framework import (
+    generics,
+    mixins,
+    status,
     viewsets,
-    generics
+    exceptions,
 )
+from rest_framework.decorators import action
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
+from apps.core import taxonomy
+from apps.core.ingredients import filter_by_ingredients
+from apps.core.matching import get_blacklist_matcher
 from apps.core.models import (
     Brand,
     Store,
     Group,
     Category,
+    Product,
+    Blacklist,
+    UploadSession,
 )
-from . import serializers
+from apps.user.authentication import SignedTokenAuthentication
+from . import batch, serializers, uploads
+from .bulk import BulkModelMixin
+from .caching import ConditionalGetMixin, ResponseCacheMixin
+from .exports import EXPORT_FIELDS, iter_catalog_rows
+from .fieldsets import FieldsetMixin
+from .imports import ProductImporter
+from .pagination import PaginationModeMixin
+from .readers import ValuesReadMixin, get_reader
+from .renderers import JSONLinesRenderer, CSVRenderer, ORJSONRenderer
+from .search import SEARCH_MODES, build_search_query, search_products
 
 
-class BaseViewSet(viewsets.GenericViewSet):
+class BaseViewSet(ConditionalGetMixin,
+                  PaginationModeMixin,
+                  viewsets.GenericViewSet):
     """Base viewset for model viewsets."""
 
     def get_queryset(self):
         queryset = self.queryset
         return queryset.filter(
             user=self.request.user
-        ).order_by('-name').distinct()
+        ).order_by('-name', '-id')
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
 
-class BrandViewSet(BaseViewSet, viewsets.ModelViewSet):
+class BrandViewSet(BaseViewSet,
+                   BulkModelMixin,
+                   ValuesReadMixin,
+                   viewsets.ModelViewSet):
     """Manage Brands in the database."""
     queryset = Brand.objects.all()
     serializer_class = serializers.BrandSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [SignedTokenAuthentication,
+                              TokenAuthentication]
     permission_classes = [IsAuthenticated]
+    etag_resources = ('brand',)
 
 
-class StoreViewSet(BaseViewSet, viewsets.ModelViewSet):
+class StoreViewSet(BaseViewSet,
+                   BulkModelMixin,
+                   ValuesReadMixin,
+                   viewsets.ModelViewSet):
     """Manage Stores in the database."""
     queryset = Store.objects.all()
     serializer_class = serializers.StoreSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [SignedTokenAuthentication,
+                              TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    etag_resources = ('store',)
+
+
+class ProductViewSet(BaseViewSet,
+                     FieldsetMixin,
+                     viewsets.ModelViewSet):
+    """Manage Products in the database.
+
+    Reads take `?fields=` to select fields and `?expand=` to nest the
+    brand, category and stores.
+    """
+    queryset = Product.objects.all()
+    serializer_class = serializers.ProductSerializer
+    authentication_classes = [SignedTokenAuthentication,
+                              TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    etag_resources = ('product', 'brand', 'group', 'category', 'store',
+                      'blacklist')
+    fieldset_actions = ('list', 'retrieve', 'search')
+
+    def get_queryset(self):
+        """Fetch related names with a constant number of queries, reads
+        load only the selected fields."""
+        if self.action in self.fieldset_actions:
+            return self.shape_queryset(super().get_queryset())
+        return super().get_queryset().select_related(
+            'brand',
+            'group',
+            'category',
+        ).prefetch_related(
+            Prefetch('stores', queryset=Store.objects.order_by('id'))
+        ).defer('search_vector')
+
+    def filter_queryset(self, queryset):
+        """Filter by ingredients with `?contains=` and `?excludes=`, both
+        comma separated lists of ingredient names."""
+        queryset = super().filter_queryset(queryset)
+        params = self.request.query_params
+        return filter_by_ingredients(
+            queryset,
+            contains=self.split_param(params.get('contains', '')),
+            excludes=self.split_param(params.get('excludes', '')),
+        )
+
+    @staticmethod
+    def split_param(value):
+        return [name for name in value.split(',') if name.strip()]
+
+    def get_serializer_class(self):
+        if self.action == 'search':
+            return serializers.ProductSearchSerializer
+        if self.action == 'list':
+            return serializers.ProductListSerializer
+        return self.serializer_class
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        fields = context['fields']
+        if fields is None or 'flagged' in fields:
+            context['blacklist_matcher'] = self.get_blacklist_matcher()
+        return context
+
+    def get_blacklist_matcher(self):
+        """Return the matcher of the user's blacklist, if any."""
+        user = getattr(self.request, 'user', None)
+        if user is None or not user.is_authenticated:
+            return None
+        try:
+            blacklist = Blacklist.objects.get(user=user)
+        except Blacklist.DoesNotExist:
+            return None
+        return get_blacklist_matcher(blacklist)
+
+    @action(detail=False, methods=['get'])
+    def scan(self, request):
+        """List the products containing blacklisted ingredients."""
+        matcher = self.get_blacklist_matcher()
+        scanned = 0
+        flagged = []
+        rows = self.filter_queryset(self.get_queryset()).prefetch_related(
+            None
+        ).values_list('id', 'name', 'ingredients').iterator(chunk_size=2000)
+        for product_id, name, ingredients in rows:
+            scanned += 1
+            matches = matcher.search(ingredients) if matcher else []
+            if matches:
+                flagged.append({
+                    'id': product_id,
+                    'name': name,
+                    'matches': matches,
+                })
+        return Response({'scanned': scanned, 'flagged': flagged})
+
+    @action(detail=False, methods=['get'],
+            pagination_modes={'offset': LimitOffsetPagination})
+    def search(self, request):
+        """Search product names and ingredients, best matches first.
+
+        `?q=` holds the query and `?mode=` one of websearch (default),
+        plain, phrase or prefix.
+        """
+        mode = request.query_params.get('mode', SEARCH_MODES[0])
+        if mode not in SEARCH_MODES:
+            raise exceptions.ValidationError({
+                'mode': [f'Choose one of: {", ".join(SEARCH_MODES)}.']
+            })
+        query = build_search_query(request.query_params.get('q', ''), mode)
+        if query is None:
+            raise exceptions.ValidationError({
+                'q': ['Enter at least one word.']
+            })
+        queryset = search_products(
+            self.filter_queryset(self.get_queryset()), query
+        )
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['post'], url_path='import',
+            url_name='import')
+    def import_products(self, request):
+        """Import products streamed as JSON Lines or CSV rows."""
+        reader = ProductImporter.get_reader(request.content_type)
+        if reader is None:
+            raise exceptions.UnsupportedMediaType(request.content_type)
+        importer = ProductImporter(request.user)
+        rows = reader(request.stream or [])
+        return Response(importer.run(rows))
+
+    @action(detail=False, methods=['get'], url_path='export',
+            url_name='export',
+            renderer_classes=[JSONLinesRenderer, CSVRenderer])
+    def export_products(self, request):
+        """Stream the whole catalog as JSON Lines or CSV rows."""
+        renderer = request.accepted_renderer
+        rows = iter_catalog_rows(request.user)
+        response = StreamingHttpResponse(
+            renderer.render_rows(rows, EXPORT_FIELDS),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}',
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="catalog.{renderer.format}"'
+        )
+        return response
+
+
+class BlacklistView(generics.RetrieveUpdateAPIView):
+    """Manage the ingredient blacklist of the authenticated user."""
+    serializer_class = serializers.BlacklistSerializer
+    authentication_classes = [SignedTokenAuthentication,
+                              TokenAuthentication]
     permission_classes = [IsAuthenticated]
 
+    def get_object(self):
+        """Return the user's blacklist, unsaved until first updated."""
+        user = self.request.user
+        try:
+            return Blacklist.objects.get(user=user)
+        except Blacklist.DoesNotExist:
+            return Blacklist(user=user)
+
+
+class UploadSessionViewSet(mixins.CreateModelMixin,
+                           mixins.RetrieveModelMixin,
+                           mixins.DestroyModelMixin,
+                           viewsets.GenericViewSet):
+    """Upload product images in resumable chunks.
+
+    Open a session with the product, file name, size and SHA-256, PATCH
+    the bytes as `application/offset+octet-stream` with an `Upload-Offset`
+    header, then finalize. `HEAD` tells the offset to resume from.
+    """
+    serializer_class = serializers.UploadSessionSerializer
+    authentication_classes = [SignedTokenAuthentication,
+                              TokenAuthentication]
+    permission_classes = [IsAuthenticated]
 
-class GroupViewSet(viewsets.ReadOnlyModelViewSet):
+    def get_queryset(self):
+        return UploadSession.objects.filter(user=self.request.user,
+                                            expires_at__gt=timezone.now())
+
+    def perform_create(self, serializer):
+        session = serializer.save(user=self.request.user,
+                                  expires_at=uploads.get_expiry())
+        uploads.create_part(session)
+
+    def perform_destroy(self, instance):
+        uploads.delete_part(instance)
+        instance.delete()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """Send the offset as a header too, `HEAD` responses have no
+        body."""
+        data = getattr(response, 'data', None)
+        if isinstance(data, dict) and 'offset' in data:
+            response[uploads.OFFSET_HEADER] = data['offset']
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    def partial_update(self, request, *args, **kwargs):
+        """Append the request body at the `Upload-Offset` of the session."""
+        if request.content_type != uploads.UPLOAD_CONTENT_TYPE:
+            raise exceptions.UnsupportedMediaType(request.content_type)
+        try:
+            offset = int(request.headers[uploads.OFFSET_HEADER])
+            length = int(request.headers['Content-Length'])
+        except (KeyError, ValueError):
+            raise exceptions.ValidationError({
+                'detail': 'Upload-Offset and Content-Length are required.'
+            })
+        # No transaction, the chunk is streamed without holding a
+        # connection. Chunks of one upload take turns on the part file.
+        session = self.get_object()
+        uploads.write_chunk(session, request.stream, offset, length)
+        return Response(self.get_serializer(session).data)
+
+    def get_object_for_update(self):
+        return generics.get_object_or_404(
+            self.get_queryset().select_for_update(), pk=self.kwargs['pk']
+        )
+
+    @action(detail=True, methods=['post'])
+    def finalize(self, request, pk=None):
+        """Verify the upload and attach it as the product image."""
+        try:
+            with transaction.atomic():
+                session = self.get_object_for_update()
+                product = uploads.finalize(session)
+        except uploads.ChecksumMismatch:
+            # Outside the rolled back transaction, so the reset is kept.
+            with transaction.atomic():
+                uploads.restart(self.get_object_for_update())
+            raise
+        serializer = serializers.ProductSerializer(
+            product, context=self.get_serializer_context()
+        )
+        return Response(serializer.data)
+
+
+class GroupViewSet(BaseViewSet,
+                   ResponseCacheMixin,
+                   ValuesReadMixin,
+                   viewsets.ReadOnlyModelViewSet):
     """List all groups and retrieve a single group with its categories."""
     queryset = Group.objects.all()
     serializer_class = serializers.GroupSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [SignedTokenAuthentication,
+                              TokenAuthentication]
     permission_classes = [IsAuthenticated]
+    etag_resources = ('group', 'category')
 
     def get_queryset(self):
         """Filter queryset to authenticated user."""
         queryset = self.queryset
         return queryset.filter(
             user=self.request.user
-        ).prefetch_related('categories').order_by('-name').distinct()
+        ).prefetch_related('categories').order_by('-name', '-id')
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(BaseViewSet,
+                      BulkModelMixin,
+                      ValuesReadMixin,
+                      viewsets.ModelViewSet):
     """Manage categories in the database."""
     queryset = Category.objects.all()
     serializer_class = serializers.CategorySerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [SignedTokenAuthentication,
+                              TokenAuthentication]
     permission_classes = [IsAuthenticated]
+    etag_resources = ('category',)
 
     def get_queryset(self):
         """Filter queryset to authenticated user."""
@@ -76,11 +364,85 @@ class CategoryViewSet(viewsets.ModelViewSet):
         return queryset.filter(
             user=self.request.user,
             group_id=group_id
-        ).order_by('-name').distinct()
+        ).order_by('-name', '-id')
 
     def perform_create(self, serializer):
         """Customize the creation process to assign
         the category to a specific group."""
         group_id = self.kwargs.get('group_id')
-        group = generics.get_object_or_404(Group, id=group_id)
-        serializer.save(user=self.request.user, group=group)
+        if group_id not in taxonomy.get_group_ids(self.request.user.id):
+            raise exceptions.NotFound()
+        serializer.save(user=self.request.user, group_id=group_id)
+
+    def bulk_written(self):
+        super().bulk_written()
+        taxonomy.invalidate_default_category(self.kwargs.get('group_id'))
+
+
+class BootstrapView(ConditionalGetMixin, ResponseCacheMixin, APIView):
+    """Return the whole taxonomy of the user in one response.
+
+    Groups with their categories, brands and stores come as their list
+    endpoints render them, along with the product count of every category
+    keyed by category id. The ETag follows the versions of all of them, so
+    a client starting with unchanged data gets a 304.
+    """
+    authentication_classes = [SignedTokenAuthentication,
+                              TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
+    etag_resources = ('group', 'category', 'brand', 'store', 'product')
+
+    def get(self, request, *args, **kwargs):
+        return self.conditional(partial(self.cached, self.build), request)
+
+    def read(self, queryset, serializer_class):
+        reader = get_reader(serializer_class)
+        return reader.to_representation(list(reader.get_queryset(
+            queryset.filter(user=self.request.user).order_by('-name', '-id')
+        )))
+
+    def build(self, request):
+        groups = self.read(Group.objects.all(), serializers.GroupSerializer)
+        counts = dict(Product.objects.filter(
+            user=request.user
+        ).order_by().values_list('category').annotate(Count('id')))
+        return Response({
+            'groups': groups,
+            'brands': self.read(Brand.objects.all(),
+                                serializers.BrandSerializer),
+            'stores': self.read(Store.objects.all(),
+                                serializers.StoreSerializer),
+            'product_counts': {
+                str(category['id']): counts.get(category['id'], 0)
+                for group in groups for category in group['categories']
+            },
+        })
+
+
+class BatchView(APIView):
+    """Run an ordered list of operations in one transaction.
+
+    Operations go to the brand, store, category and product endpoints and
+    answer with their status and body. The first failed operation rolls
+    back the whole batch.
+    """
+    authentication_classes = [SignedTokenAuthentication,
+                              TokenAuthentication]
+    permission_classes = [IsAuthenticated]
+    viewsets = (BrandViewSet, StoreViewSet, CategoryViewSet, ProductViewSet)
+
+    @extend_schema(request=serializers.BatchSerializer)
+    def post(self, request, *args, **kwargs):
+        serializer = serializers.BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            with transaction.atomic():
+                results = batch.run(request,
+                                    serializer.validated_data['operations'],
+                                    self.viewsets)
+        except batch.OperationFailed as exc:
+            [results] = exc.args
+            return Response({'failed': len(results) - 1, 'results': results},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response({'results': results})
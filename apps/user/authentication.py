@@ -0,0 +1,157 @@
+"""
+Stateless signed auth tokens.
+
+A signed token carries the user id and the user's token generation, signed
+with a timestamp by Django's `TimestampSigner`. Verifying it needs no
+database query: the signature and age are checked in process and the user
+is rebuilt from a small cached snapshot, which also holds the current
+generation so tokens are revoked by bumping it. Snapshots live for
+`SIGNED_TOKEN_SNAPSHOT_TTL` seconds only, so a revocation or deactivation
+reaches workers whose cache missed the invalidation that soon. Tokens
+signed with a key listed in `SECRET_KEY_FALLBACKS` stay valid while keys
+are rotated.
+
+`aauthenticate` checks both signed and DRF tokens for the async views.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import (
+    TokenAuthentication,
+    get_authorization_header,
+)
+from rest_framework.authtoken.models import Token
+
+
+SALT = 'apps.user.signed-token'
+USER_FIELDS = (
+    'id',
+    'email',
+    'username',
+    'is_active',
+    'is_staff',
+    'is_superuser',
+    'token_generation',
+)
+
+
+def get_signer():
+    return signing.TimestampSigner(salt=SALT)
+
+
+def issue_token(user):
+    """Return a new signed token of a user."""
+    return get_signer().sign(f'{user.pk}:{user.token_generation}')
+
+
+def user_snapshot_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def snapshot_fields():
+    """Return USER_FIELDS in model field order, as `from_db` expects."""
+    return [field.attname
+            for field in get_user_model()._meta.concrete_fields
+            if field.attname in USER_FIELDS]
+
+
+def get_user_snapshot(user_id):
+    """Return the cached field values of a user, None if it is missing."""
+    key = user_snapshot_key(user_id)
+    values = cache.get(key)
+    if values is None:
+        values = get_user_model().objects.filter(pk=user_id).values_list(
+            *snapshot_fields()
+        ).first()
+        if values is None:
+            return None
+        cache.set(key, values, settings.SIGNED_TOKEN_SNAPSHOT_TTL)
+    return values
+
+
+async def aget_user_snapshot(user_id):
+    """Async version of `get_user_snapshot`."""
+    key = user_snapshot_key(user_id)
+    values = await cache.aget(key)
+    if values is None:
+        values = await get_user_model().objects.filter(
+            pk=user_id
+        ).values_list(*snapshot_fields()).afirst()
+        if values is None:
+            return None
+        await cache.aset(key, values,
+                         settings.SIGNED_TOKEN_SNAPSHOT_TTL)
+    return values
+
+
+def invalidate_user_snapshot(user_id):
+    cache.delete(user_snapshot_key(user_id))
+
+
+def verify_signed_token(key):
+    """Return the user id and token generation of a signed token."""
+    try:
+        value = get_signer().unsign(key, max_age=settings.SIGNED_TOKEN_MAX_AGE)
+        user_id, generation = map(int, value.split(':'))
+    except signing.SignatureExpired:
+        raise exceptions.AuthenticationFailed(_('Token has expired.'))
+    except (signing.BadSignature, ValueError):
+        raise exceptions.AuthenticationFailed(_('Invalid token.'))
+    return user_id, generation
+
+
+def load_snapshot_user(values, generation):
+    """Return the user of a snapshot if the token generation is current."""
+    if values is None:
+        raise exceptions.AuthenticationFailed(_('Invalid token.'))
+    user = get_user_model().from_db(DEFAULT_DB_ALIAS, snapshot_fields(),
+                                    values)
+    if user.token_generation != generation:
+        raise exceptions.AuthenticationFailed(_('Token was revoked.'))
+    if not user.is_active:
+        raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+    return user
+
+
+class SignedTokenAuthentication(TokenAuthentication):
+    """Authenticate `Authorization: Bearer <signed token>` headers."""
+    keyword = 'Bearer'
+
+    def authenticate_credentials(self, key):
+        user_id, generation = verify_signed_token(key)
+        user = load_snapshot_user(get_user_snapshot(user_id), generation)
+        return (user, key)
+
+
+async def aauthenticate(request):
+    """Authenticate a Django request like the API authentication classes.
+
+    Returns the user or None without credentials, and raises
+    AuthenticationFailed for invalid ones.
+    """
+    auth = get_authorization_header(request).split()
+    if len(auth) != 2:
+        return None
+    try:
+        keyword, key = auth[0].decode(), auth[1].decode()
+    except UnicodeError:
+        raise exceptions.AuthenticationFailed(_('Invalid token.'))
+    if keyword.lower() == SignedTokenAuthentication.keyword.lower():
+        user_id, generation = verify_signed_token(key)
+        values = await aget_user_snapshot(user_id)
+        return load_snapshot_user(values, generation)
+    if keyword.lower() == TokenAuthentication.keyword.lower():
+        try:
+            token = await Token.objects.select_related('user').aget(key=key)
+        except Token.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+        return token.user
+    return None
@@ -43,6 +43,8 @@ class AuthTokenSerializer(serializers.Serializer):
 class TokenCreateViewResponseSerializer(serializers.Serializer):
     """Serializer for the TokenCreateView response."""
     token = serializers.CharField()
+    signed_token = serializers.CharField()
+    expires_in = serializers.IntegerField()
     username = serializers.CharField()
     email = serializers.CharField()
 
@@ -1,16 +1,27 @@
 """
 Tests for the user API.
 """
-
-from django.test import TestCase
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from apps.user.authentication import issue_token
+
 CREATE_USER_URL = reverse('user:user-register')
 TOKEN_URL = reverse('user:token')
+TOKEN_REVOKE_URL = reverse('user:token-revoke')
+GROUP_LIST_URL = reverse('product:group-list')
 
 
 def create_user(**params):
@@ -118,3 +129,116 @@ class AuthTokenTests(TestCase):
         res = self.client.get(TOKEN_URL)
 
         self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+class SignedTokenTests(TestCase):
+    """Tests for the signed auth tokens."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = create_user(username='testuser',
+                                email='test@example.com',
+                                password='Testpass123')
+
+    def get_groups(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return self.client.get(GROUP_LIST_URL)
+
+    def test_obtain_signed_token(self):
+        """Test the token endpoint also issues a signed token."""
+        res = self.client.post(TOKEN_URL, {'email': 'test@example.com',
+                                           'password': 'Testpass123'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.get_groups(res.data['signed_token'])
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['count'], 5)
+
+    def test_signed_token_skips_user_query(self):
+        """Test a cached user is authenticated without queries."""
+        token = issue_token(self.user)
+        self.get_groups(token)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.get_groups(token)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        for query in queries:
+            self.assertNotIn('core_user', query['sql'])
+            self.assertNotIn('authtoken_token', query['sql'])
+
+    def test_tampered_token_rejected(self):
+        """Test a token with a forged user id is rejected."""
+        _, rest = issue_token(self.user).split(':', 1)
+        other = create_user(username='other', email='other@example.com',
+                            password='Testpass123')
+
+        res = self.get_groups(f'{other.id}:{rest}')
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(SIGNED_TOKEN_MAX_AGE=-1)
+    def test_expired_token_rejected(self):
+        """Test a token older than the max age is rejected."""
+        res = self.get_groups(issue_token(self.user))
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revoke_tokens(self):
+        """Test revoking invalidates the tokens issued before."""
+        token = issue_token(self.user)
+        self.assertEqual(self.get_groups(token).status_code,
+                         status.HTTP_200_OK)
+
+        res = self.client.post(TOKEN_REVOKE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.get_groups(token).status_code,
+                         status.HTTP_401_UNAUTHORIZED)
+        self.user.refresh_from_db()
+        self.assertEqual(self.get_groups(issue_token(self.user)).status_code,
+                         status.HTTP_200_OK)
+
+    def test_revoke_reaches_other_workers(self):
+        """Test a revocation handled by a worker with a cold cache of its
+        own reaches a worker with a cached snapshot."""
+        token = issue_token(self.user)
+        self.assertEqual(self.get_groups(token).status_code,
+                         status.HTTP_200_OK)
+
+        other_worker_cache = LocMemCache('other-worker', {})
+        with mock.patch('apps.user.authentication.cache',
+                        other_worker_cache):
+            res = self.client.post(TOKEN_REVOKE_URL)
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+
+        later = time.time() + settings.SIGNED_TOKEN_SNAPSHOT_TTL + 1
+        with mock.patch('django.core.cache.backends.locmem.time') as clock:
+            clock.time.return_value = later
+            self.assertEqual(self.get_groups(token).status_code,
+                             status.HTTP_401_UNAUTHORIZED)
+
+    def test_inactive_user_rejected(self):
+        """Test deactivating a user invalidates its cached snapshot."""
+        token = issue_token(self.user)
+        self.get_groups(token)
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.get_groups(token).status_code,
+                         status.HTTP_401_UNAUTHORIZED)
+
+    def test_rotated_secret_key(self):
+        """Test tokens signed with a fallback key stay valid."""
+        with override_settings(SECRET_KEY='old-secret-key'):
+            token = issue_token(self.user)
+
+        with override_settings(SECRET_KEY='new-secret-key',
+                               SECRET_KEY_FALLBACKS=['old-secret-key']):
+            self.assertEqual(self.get_groups(token).status_code,
+                             status.HTTP_200_OK)
+        with override_settings(SECRET_KEY='new-secret-key'):
+            self.assertEqual(self.get_groups(token).status_code,
+                             status.HTTP_401_UNAUTHORIZED)
@@ -3,12 +3,13 @@ URL mappings for the user API.
 """
 from django.urls import path
 
-from .views import UserRegisterView, TokenCreateView
+from .views import UserRegisterView, TokenCreateView, TokenRevokeView
 
 
 app_name = 'user'
 
 urlpatterns = [
     path('register/', UserRegisterView.as_view(), name='user-register'),
-    path('token/', TokenCreateView.as_view(), name='token')
+    path('token/', TokenCreateView.as_view(), name='token'),
+    path('token/revoke/', TokenRevokeView.as_view(), name='token-revoke'),
 ]
\ No newline at end of file
@@ -4,11 +4,20 @@ Views for the user API.
 from drf_spectacular.utils import extend_schema, OpenApiResponse
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.authtoken.models import Token
-from rest_framework import permissions
+from rest_framework import permissions, status
+from rest_framework.authentication import TokenAuthentication
 from rest_framework.generics import CreateAPIView
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db.models import F
 
+from apps.user.authentication import (
+    SignedTokenAuthentication,
+    invalidate_user_snapshot,
+    issue_token,
+)
 from apps.user.serializers import (
     UserSerializer,
     AuthTokenSerializer,
@@ -46,6 +55,25 @@ class TokenCreateView(ObtainAuthToken):
         token, created = Token.objects.get_or_create(user=user)
         return Response({
             'token': token.key,
+            'signed_token': issue_token(user),
+            'expires_in': settings.SIGNED_TOKEN_MAX_AGE,
             'username': user.username,
             'email': user.email
         })
+
+
+@extend_schema(request=None, responses={204: None})
+class TokenRevokeView(APIView):
+    """Revoke every token issued to the user."""
+    authentication_classes = [SignedTokenAuthentication,
+                              TokenAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        user = request.user
+        get_user_model().objects.filter(pk=user.pk).update(
+            token_generation=F('token_generation') + 1
+        )
+        invalidate_user_snapshot(user.pk)
+        Token.objects.filter(user=user).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
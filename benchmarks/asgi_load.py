@@ -0,0 +1,172 @@
+"""
+Sync WSGI against async ASGI under concurrent load.
+
+Starts gunicorn with sync workers (WSGI) and with uvicorn workers (ASGI) on
+a local port, then keeps `--connections` concurrent clients requesting the
+first product page. Three setups are compared: the sync viewset under
+WSGI, the same viewset under ASGI, and the async view under ASGI.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.utils import setup, test_database
+
+
+HOST = '127.0.0.1'
+PORT = 8765
+
+
+def seed(products):
+    from django.contrib.auth import get_user_model
+    from rest_framework.authtoken.models import Token
+    from apps.core.models import Brand, Group, Product, Store
+
+    user = get_user_model().objects.create_user('load@example.com',
+                                                'Testpass123')
+    group = Group.objects.get(user=user, name='Skin care')
+    brand = Brand.objects.create(user=user, name='Brand')
+    stores = Store.objects.bulk_create([
+        Store(user=user, name=f'Store {i}') for i in range(3)
+    ])
+    created = Product.objects.bulk_create([
+        Product(user=user, name=f'Product {i}', brand=brand, group=group,
+                category=group.categories.get(name='Other'), capacity=50,
+                ingredients='Aqua, Glycerin, Niacinamide')
+        for i in range(products)
+    ])
+    Through = Product.stores.through
+    Through.objects.bulk_create([
+        Through(product_id=product.id, store_id=store.id)
+        for product in created for store in stores
+    ])
+    return Token.objects.create(user=user).key
+
+
+def start_server(worker_class, workers, env):
+    asgi = 'uvicorn' in worker_class
+    app = ('cosmetics_api.asgi:application'
+           if asgi else 'cosmetics_api.wsgi:application')
+    if asgi:
+        # Persistent connections would pile up, one per request thread.
+        env = {**env, 'DB_CONN_MAX_AGE': '0'}
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', app,
+         '--bind', f'{HOST}:{PORT}',
+         '--workers', str(workers),
+         '--worker-class', worker_class,
+         '--backlog', '2048',
+         '--log-level', 'warning'],
+        env=env,
+    )
+    return wait_until_listening(process)
+
+
+def wait_until_listening(process):
+    """Return the server process once its port accepts connections."""
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((HOST, PORT), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('server did not start')
+
+
+def stop_server(process):
+    process.terminate()
+    process.wait(timeout=30)
+
+
+async def fetch(request):
+    """Send one request on a new connection and return the status."""
+    reader, writer = await asyncio.open_connection(HOST, PORT)
+    writer.write(request)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return int(response.split(b' ', 2)[1])
+
+
+async def run_load(path, token, connections, duration):
+    request = (f'GET {path} HTTP/1.1\r\nHost: {HOST}\r\n'
+               f'Authorization: Token {token}\r\n'
+               'Connection: close\r\n\r\n').encode()
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + duration
+
+    async def client():
+        nonlocal errors
+        while time.monotonic() < deadline:
+            start = time.monotonic()
+            try:
+                status_code = await fetch(request)
+            except (OSError, IndexError, ValueError):
+                status_code = None
+            if status_code == 200:
+                latencies.append(time.monotonic() - start)
+            else:
+                errors += 1
+
+    await asyncio.gather(*(client() for _ in range(connections)))
+    return latencies, errors
+
+
+def report_load(label, latencies, errors, duration):
+    latencies.sort()
+    if latencies:
+        p50 = statistics.median(latencies) * 1000
+        p99 = latencies[int(len(latencies) * 0.99)] * 1000
+    else:
+        p50 = p99 = float('nan')
+    print(f'{label:<26} {len(latencies) / duration:>8.1f} req/s '
+          f'p50 {p50:>7.1f}ms  p99 {p99:>7.1f}ms  errors {errors}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--connections', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--products', type=int, default=100)
+    args = parser.parse_args()
+
+    setup()
+    with test_database():
+        from django.db import connection
+
+        token = seed(args.products)
+        env = {**os.environ,
+               'DB_NAME': connection.settings_dict['NAME']}
+        connection.close()
+        setups = [
+            ('WSGI, sync viewset', 'sync', '/api/product/products/'),
+            ('ASGI, sync viewset', 'uvicorn.workers.UvicornWorker',
+             '/api/product/products/'),
+            ('ASGI, async view', 'uvicorn.workers.UvicornWorker',
+             '/api/product/async/products/'),
+        ]
+        print(f'{args.connections} connections, {args.workers} workers, '
+              f'{args.duration:.0f}s per run')
+        for label, worker_class, path in setups:
+            server = start_server(worker_class, args.workers, env)
+            try:
+                asyncio.run(run_load(path, token, 10, 2))
+                latencies, errors = asyncio.run(run_load(
+                    path, token, args.connections, args.duration
+                ))
+            finally:
+                stop_server(server)
+            report_load(label, latencies, errors, args.duration)
+
+
+if __name__ == '__main__':
+    main()
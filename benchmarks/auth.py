@@ -0,0 +1,89 @@
+"""
+Signed tokens against DRF's Token table for authenticated requests.
+
+Times the authentication step alone, then GET requests on the group list,
+a small read endpoint, with each authentication class, and counts the
+queries made per call.
+"""
+import argparse
+import contextlib
+
+from benchmarks.utils import setup, test_database, timer, report
+
+
+@contextlib.contextmanager
+def count_queries():
+    """Collect the SQL run in the block."""
+    from django.db import connection
+
+    queries = []
+
+    def count_query(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count_query):
+        yield queries
+
+
+def bench_authenticate(label, count, authentication, header):
+    from rest_framework.test import APIRequestFactory
+
+    request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=header)
+    # Warm up the cached user snapshot.
+    assert authentication.authenticate(request) is not None
+    with count_queries() as queries, timer() as elapsed:
+        for _ in range(count):
+            authentication.authenticate(request)
+    report(label, count, elapsed[0], unit='calls')
+    print(f'{"":<40} {len(queries) / count:.1f} queries per call')
+
+
+def bench_requests(label, count, header):
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=header)
+    url = reverse('product:group-list')
+    assert client.get(url).status_code == 200
+    with count_queries() as queries, timer() as elapsed:
+        for _ in range(count):
+            client.get(url)
+    report(label, count, elapsed[0], unit='requests')
+    print(f'{"":<40} {len(queries) / count:.1f} queries per request')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calls', type=int, default=20000)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    setup()
+    with test_database():
+        from django.contrib.auth import get_user_model
+        from rest_framework.authentication import TokenAuthentication
+        from rest_framework.authtoken.models import Token
+        from apps.user.authentication import (
+            SignedTokenAuthentication,
+            issue_token,
+        )
+
+        user = get_user_model().objects.create_user('auth@example.com',
+                                                    'Testpass123')
+        token = f'Token {Token.objects.create(user=user).key}'
+        signed_token = f'Bearer {issue_token(user)}'
+
+        bench_authenticate('authenticate: Token table lookup', args.calls,
+                           TokenAuthentication(), token)
+        bench_authenticate('authenticate: signed token', args.calls,
+                           SignedTokenAuthentication(), signed_token)
+        bench_requests('group list: Token table lookup', args.requests,
+                       token)
+        bench_requests('group list: signed token', args.requests,
+                       signed_token)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Blacklist matcher against a regex alternation of the same terms.
+
+Scans random INCI lists in memory, as the scan endpoint does after reading
+the rows, and flags those containing any of the blacklisted terms.
+"""
+import argparse
+import random
+import re
+
+from benchmarks.utils import report, timer
+
+
+def vocabulary(size):
+    words = ['acid', 'extract', 'oil', 'alcohol', 'sodium', 'peg', 'glycol',
+             'sulfate', 'chloride', 'ester', 'leaf', 'seed', 'root', 'gum']
+    return [f'{random.choice(words).title()} {random.choice(words)} {i}'
+            for i in range(size)]
+
+
+def regex_matcher(terms):
+    """Return a function listing the terms found by a regex alternation."""
+    pattern = re.compile(
+        r'\b(?:%s)\b' % '|'.join(
+            re.escape(term) for term in sorted(terms, key=len, reverse=True)
+        ),
+        re.IGNORECASE,
+    )
+    return lambda text: pattern.findall(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--vocabulary', type=int, default=20_000)
+    args = parser.parse_args()
+
+    from apps.core.matching import KeywordMatcher
+
+    random.seed(0)
+    names = vocabulary(args.vocabulary)
+    texts = [', '.join(random.sample(names, 25)) for _ in range(args.rows)]
+
+    for size in (50, 200):
+        terms = random.sample(names, size)
+        with timer() as compile_time:
+            matcher = KeywordMatcher(terms)
+            regex = regex_matcher(terms)
+        with timer() as automaton:
+            flagged = sum(1 for text in texts if matcher.search(text))
+        with timer() as alternation:
+            expected = sum(1 for text in texts if regex(text))
+        assert flagged == expected, (flagged, expected)
+        print(f'{size} terms, {flagged:,} flagged, compiled in '
+              f'{compile_time[0] * 1000:.1f}ms')
+        report('  automaton', len(texts), automaton[0])
+        report('  regex alternation', len(texts), alternation[0])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Disk usage and upload throughput of plain and content-addressed storage.
+
+Stores `--uploads` files drawn from `--distinct` different packshots, as
+when many users upload the same brand images, streaming each from disk.
+"""
+import argparse
+import os
+import shutil
+import tempfile
+
+from benchmarks.utils import report, setup, timer
+
+
+def create_packshots(directory, count, size):
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f'packshot-{i}.jpg')
+        with open(path, 'wb') as file:
+            file.write(os.urandom(size))
+        paths.append(path)
+    return paths
+
+
+def disk_usage(directory):
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, files in os.walk(directory) for name in files)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--uploads', type=int, default=2000)
+    parser.add_argument('--distinct', type=int, default=50)
+    parser.add_argument('--size', type=int, default=512 * 1024,
+                        help='Bytes per packshot.')
+    args = parser.parse_args()
+
+    setup()
+    from django.core.files import File
+    from django.core.files.storage import FileSystemStorage
+    from apps.core.blobs import BlobStorage
+
+    workdir = tempfile.mkdtemp()
+    try:
+        packshots = create_packshots(workdir, args.distinct, args.size)
+        uploaded = args.uploads * args.size
+        print(f'{args.uploads:,} uploads of {args.distinct} distinct files, '
+              f'{uploaded / 2 ** 20:,.0f} MiB uploaded')
+        for label, storage_class in (('Plain file system storage',
+                                      FileSystemStorage),
+                                     ('Content-addressed storage',
+                                      BlobStorage)):
+            location = os.path.join(workdir, 'media', storage_class.__name__)
+            storage = storage_class(location=location)
+            with timer() as elapsed:
+                for i in range(args.uploads):
+                    path = packshots[i % len(packshots)]
+                    with open(path, 'rb') as file:
+                        storage.save('images/packshot.jpg', File(file))
+            report(label, args.uploads, elapsed[0], 'uploads')
+            print(f'{"":<40} {disk_usage(location) / 2 ** 20:>9,.1f} MiB '
+                  f'on disk, {uploaded / elapsed[0] / 2 ** 20:,.0f} MiB/s')
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
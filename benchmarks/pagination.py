@@ -0,0 +1,84 @@
+"""
+Page latency of limit/offset against cursor pagination at growing depth.
+"""
+import argparse
+import statistics
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.utils import setup, test_database, timer
+
+
+def seed(user, rows):
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'INSERT INTO core_brand (user_id, name) '
+            "SELECT %s, 'Brand ' || lpad((i %% 50000)::text, 6, '0') "
+            'FROM generate_series(1, %s) AS i',
+            [user.id, rows],
+        )
+        cursor.execute('ANALYZE core_brand')
+
+
+def cursor_at(user, offset):
+    """Return the cursor of the page starting after `offset` rows."""
+    from rest_framework.pagination import Cursor
+    from rest_framework.test import APIRequestFactory
+    from apps.core.models import Brand
+    from apps.product.pagination import KeysetPagination
+
+    paginator = KeysetPagination()
+    paginator.base_url = APIRequestFactory().get('/').build_absolute_uri()
+    last = Brand.objects.filter(user=user).order_by(
+        *paginator.ordering
+    )[offset - 1]
+    url = paginator.encode_cursor(Cursor(offset=0, reverse=False,
+                                         position=[last.name, last.id]))
+    return parse_qs(urlparse(url).query)['cursor'][0]
+
+
+def measure(client, url, params, repeat):
+    timings = []
+    for _ in range(repeat):
+        with timer() as elapsed:
+            res = client.get(url, params)
+        assert res.status_code == 200, res.data
+        timings.append(elapsed[0] * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup()
+    with test_database():
+        from django.contrib.auth import get_user_model
+        from django.urls import reverse
+        from rest_framework.test import APIClient
+
+        user = get_user_model().objects.create_user('page@example.com',
+                                                    'Testpass123')
+        seed(user, args.rows)
+        client = APIClient()
+        client.force_authenticate(user)
+        url = reverse('product:brand-list')
+
+        print(f'{"offset":>8} {"limit/offset ms":>16} {"cursor ms":>10}')
+        for offset in (0, 1_000, 10_000, 100_000):
+            if offset >= args.rows:
+                break
+            offset_ms = measure(client, url, {'offset': offset},
+                                args.repeat)
+            params = {'pagination': 'cursor'}
+            if offset:
+                params['cursor'] = cursor_at(user, offset)
+            cursor_ms = measure(client, url, params, args.repeat)
+            print(f'{offset:>8,} {offset_ms:>16.2f} {cursor_ms:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Request throughput with new, persistent and pooled database connections.
+
+Sends requests through the WSGI handler from `--threads` threads, so every
+request opens and returns its connection like under a threaded server. Each
+setup runs in a subprocess with its own database settings.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import threading
+
+from benchmarks.utils import report, setup, test_database, timer
+
+
+SETUPS = [
+    ('New connection per request',
+     {'DB_ENGINE': 'django.db.backends.postgresql', 'DB_CONN_MAX_AGE': '0'}),
+    ('Persistent connections',
+     {'DB_ENGINE': 'django.db.backends.postgresql', 'DB_CONN_MAX_AGE': '60'}),
+    ('Pooled connections',
+     {'DB_ENGINE': 'apps.core.db.postgresql_pool'}),
+]
+
+
+def run(requests, threads):
+    from django.contrib.auth import get_user_model
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.db import connection, connections
+    from django.test import RequestFactory
+    from rest_framework.authtoken.models import Token
+
+    user = get_user_model().objects.create_user('pool@example.com',
+                                                'Testpass123')
+    token = Token.objects.create(user=user).key
+    factory = RequestFactory()
+    handler = WSGIHandler()
+    connection.close()
+
+    def client():
+        for _ in range(requests // threads):
+            environ = factory.get('/api/product/brands/',
+                                  HTTP_AUTHORIZATION=f'Token {token}').environ
+            handler(environ, lambda status, headers: None).close()
+        connections.close_all()
+
+    clients = [threading.Thread(target=client) for _ in range(threads)]
+    with timer() as elapsed:
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+    return elapsed[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--run', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        setup()
+        with test_database():
+            print(run(args.requests, args.threads))
+        return
+
+    for label, env in SETUPS:
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.pool', '--run',
+             '--requests', str(args.requests),
+             '--threads', str(args.threads)],
+            env={**os.environ, **env}, check=True, capture_output=True,
+            text=True,
+        ).stdout
+        report(label, args.requests, float(output.split()[-1]), 'requests')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Throughput of the streaming product import endpoint.
+
+Compares the JSON Lines import with saving the same rows one by one through
+`Product.objects.create`.
+"""
+import argparse
+import json
+
+from benchmarks.utils import setup, test_database, timer, report
+
+
+def generate_rows(count):
+    groups = ['Skin care', 'Hair care', 'Body care', 'Makeup']
+    for i in range(count):
+        yield {
+            'name': f'Product {i}',
+            'brand': f'Brand {i % 50}',
+            'group': groups[i % len(groups)],
+            'stores': [f'Store {i % 7}', f'Store {i % 11}'],
+            'ingredients': 'Aqua, Glycerin, Niacinamide',
+            'capacity': 50,
+            'unit': 2,
+        }
+
+
+def bench_import(user, rows):
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    client.force_authenticate(user)
+    body = ''.join(json.dumps(row) + '\n' for row in generate_rows(rows))
+    with timer() as elapsed:
+        res = client.generic('POST', reverse('product:product-import'),
+                             body, content_type='application/x-ndjson')
+    assert res.data['created'] == rows, res.data['failed']
+    report('import endpoint (JSON Lines)', rows, elapsed[0])
+
+
+def bench_save(user, rows):
+    from apps.core.models import Brand, Group, Store, Product
+
+    groups = {group.name: group for group in Group.objects.filter(user=user)}
+    with timer() as elapsed:
+        for row in generate_rows(rows):
+            brand, _ = Brand.objects.get_or_create(user=user,
+                                                   name=row['brand'])
+            product = Product.objects.create(
+                user=user,
+                name=row['name'],
+                brand=brand,
+                group=groups[row['group']],
+                ingredients=row['ingredients'],
+                capacity=row['capacity'],
+                unit=row['unit'],
+            )
+            product.stores.set([
+                Store.objects.get_or_create(user=user, name=name)[0]
+                for name in row['stores']
+            ])
+    report('Product.objects.create per row', rows, elapsed[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--baseline-rows', type=int, default=5_000)
+    args = parser.parse_args()
+
+    setup()
+    with test_database():
+        from django.contrib.auth import get_user_model
+
+        User = get_user_model()
+        user = User.objects.create_user('import@example.com', 'Testpass123')
+        bench_import(user, args.rows)
+        baseline_user = User.objects.create_user('baseline@example.com',
+                                                 'Testpass123')
+        bench_save(baseline_user, args.baseline_rows)
+
+
+if __name__ == '__main__':
+    main()
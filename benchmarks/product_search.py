@@ -0,0 +1,92 @@
+"""
+Full-text search against `icontains` on product ingredients.
+
+Seeds products with random INCI lists and times the first result page plus
+the match count, as the search endpoint does, for a common and a rare term.
+"""
+import argparse
+import statistics
+
+from benchmarks.utils import setup, test_database, timer
+
+
+COMMON = [
+    'Aqua', 'Glycerin', 'Niacinamide', 'Panthenol', 'Squalane',
+    'Tocopherol', 'Allantoin', 'Urea', 'Ceramide NP', 'Sodium Hyaluronate',
+    'Cetearyl Alcohol', 'Parfum', 'Phenoxyethanol', 'Citric Acid',
+    'Xanthan Gum', 'Dimethicone', 'Caprylic Triglyceride', 'Lactic Acid',
+]
+RARE = [f'Extract{number}' for number in range(2000)]
+
+
+def seed(user, rows, batch=100_000):
+    from django.db import connection
+    from apps.core.models import Group
+
+    group = Group.objects.get(user=user, name='Skin care')
+    words = COMMON * 20 + RARE
+    with connection.cursor() as cursor:
+        for start in range(0, rows, batch):
+            cursor.execute(
+                'INSERT INTO core_product (user_id, name, group_id, '
+                'category_id, price, ingredients, capacity, unit, '
+                'is_available, is_favourite, image) '
+                "SELECT %s, 'Product ' || i, %s, %s, '2', "
+                "(SELECT string_agg((%s::text[])[1 + floor(random() * %s)"
+                "::int], ', ') FROM generate_series(1, 12) "
+                # Referencing i draws new ingredients for every row.
+                'WHERE i IS NOT NULL), '
+                "50, '1', true, false, '' "
+                'FROM generate_series(%s, %s) AS i',
+                [user.id, group.id, group.categories.get(name='Other').id,
+                 words, len(words), start, min(start + batch, rows) - 1],
+            )
+            print(f'seeded {min(start + batch, rows):,} products')
+        cursor.execute('ANALYZE core_product')
+
+
+def measure(queryset, repeat):
+    timings = []
+    for _ in range(repeat):
+        with timer() as elapsed:
+            count = queryset.count()
+            list(queryset[:20])
+        timings.append(elapsed[0] * 1000)
+    return count, statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup()
+    with test_database():
+        from django.contrib.auth import get_user_model
+        from apps.core.models import Product
+        from apps.product.search import build_search_query, search_products
+
+        user = get_user_model().objects.create_user('search@example.com',
+                                                    'Testpass123')
+        seed(user, args.rows)
+        products = Product.objects.filter(user=user).defer('search_vector')
+
+        print(f'{"term":<12} {"matches":>9} {"icontains ms":>13} '
+              f'{"full-text ms":>13}')
+        for term in ('niacinamide', 'extract1234'):
+            count, icontains_ms = measure(
+                products.filter(ingredients__icontains=term).order_by('-id'),
+                args.repeat,
+            )
+            search_count, search_ms = measure(
+                search_products(products, build_search_query(term)),
+                args.repeat,
+            )
+            assert search_count <= count
+            print(f'{term:<12} {search_count:>9,} {icontains_ms:>13.1f} '
+                  f'{search_ms:>13.1f}')
+
+
+if __name__ == '__main__':
+    main()
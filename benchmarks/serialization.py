@@ -0,0 +1,101 @@
+"""
+Serialization time per 1k rows of DRF serializers against the values read
+path, with the stdlib JSON renderer against orjson.
+"""
+import argparse
+
+from benchmarks.utils import setup, test_database, timer
+
+
+def seed(user, rows):
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'INSERT INTO core_brand (user_id, name) '
+            "SELECT %s, 'Brand ' || i FROM generate_series(1, %s) AS i",
+            [user.id, rows],
+        )
+        cursor.execute(
+            'INSERT INTO core_group (user_id, name) '
+            "SELECT %s, 'Group ' || i FROM generate_series(1, %s) AS i",
+            [user.id, rows // 5],
+        )
+        # Five categories in each group.
+        cursor.execute(
+            'INSERT INTO core_category (user_id, group_id, name) '
+            "SELECT %s, g.id, 'Category ' || i "
+            'FROM core_group g, generate_series(1, 5) AS i '
+            "WHERE g.user_id = %s AND g.name LIKE 'Group %%'",
+            [user.id, user.id],
+        )
+
+
+def best_of(repeat, function):
+    """Return the result and the fastest time of the function."""
+    best = None
+    for _ in range(repeat):
+        with timer() as elapsed:
+            result = function()
+        best = elapsed[0] if best is None else min(best, elapsed[0])
+    return result, best
+
+
+def measure(label, queryset, serializer_class, rows, repeat):
+    from rest_framework.renderers import JSONRenderer
+    from apps.product.readers import get_reader
+    from apps.product.renderers import ORJSONRenderer
+
+    reader = get_reader(serializer_class)
+    drf_data, drf = best_of(repeat, lambda: serializer_class(
+        list(queryset), many=True
+    ).data)
+    values_data, values = best_of(repeat, lambda: reader.to_representation(
+        list(reader.get_queryset(queryset))
+    ))
+    json_bytes, stdlib = best_of(
+        repeat, lambda: JSONRenderer().render(drf_data)
+    )
+    orjson_bytes, fast = best_of(
+        repeat, lambda: ORJSONRenderer().render(values_data)
+    )
+    assert json_bytes == orjson_bytes, 'responses differ'
+
+    per_1k = 1000 / rows * 1000
+    print(f'{label} ({rows:,} rows, ms per 1k rows)')
+    print(f'  {"serializer":<24} {drf * per_1k:8.2f}')
+    print(f'  {"values reader":<24} {values * per_1k:8.2f}')
+    print(f'  {"JSONRenderer":<24} {stdlib * per_1k:8.2f}')
+    print(f'  {"ORJSONRenderer":<24} {fast * per_1k:8.2f}')
+    print(f'  {"total speedup":<24} '
+          f'{(drf + stdlib) / (values + fast):7.1f}x')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup()
+    with test_database():
+        from django.contrib.auth import get_user_model
+        from apps.core.models import Brand, Group
+        from apps.product import serializers
+
+        user = get_user_model().objects.create_user('serial@example.com',
+                                                    'Testpass123')
+        seed(user, args.rows)
+        brands = Brand.objects.filter(user=user).order_by('-name', '-id')
+        groups = Group.objects.filter(
+            user=user, name__startswith='Group '
+        ).prefetch_related('categories').order_by('-name', '-id')
+
+        measure('Brands', brands, serializers.BrandSerializer,
+                brands.count(), args.repeat)
+        measure('Groups with 5 categories', groups,
+                serializers.GroupSerializer, groups.count(), args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Requests per second per core of `manage.py serve`.
+
+Runs the command on a local port with persistent database connections
+turned off and on, loads the group list, a short request, from concurrent
+clients and divides the throughput by the cores the workers can use.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+
+from benchmarks.asgi_load import (
+    HOST,
+    PORT,
+    run_load,
+    report_load,
+    seed,
+    stop_server,
+    wait_until_listening,
+)
+from benchmarks.utils import setup, test_database
+
+
+def start_serve(workers, env):
+    process = subprocess.Popen(
+        [sys.executable, 'manage.py', 'serve',
+         '--bind', f'{HOST}:{PORT}',
+         '--workers', str(workers),
+         '--access-log', ''],
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    return wait_until_listening(process)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--connections', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--workers', type=int,
+                        default=(os.cpu_count() or 1) * 2 + 1)
+    args = parser.parse_args()
+
+    cores = min(args.workers, os.cpu_count() or 1)
+    setup()
+    with test_database():
+        from django.db import connection
+
+        token = seed(products=0)
+        env = {**os.environ, 'DB_NAME': connection.settings_dict['NAME']}
+        connection.close()
+        print(f'{args.connections} connections, {args.workers} workers '
+              f'on {cores} cores, {args.duration:.0f}s per run')
+        for label, max_age in (('CONN_MAX_AGE=0', '0'),
+                               ('CONN_MAX_AGE=60', '60')):
+            server = start_serve(args.workers,
+                                 {**env, 'DB_CONN_MAX_AGE': max_age})
+            try:
+                asyncio.run(run_load('/api/product/groups/', token, 10, 2))
+                latencies, errors = asyncio.run(run_load(
+                    '/api/product/groups/', token, args.connections,
+                    args.duration,
+                ))
+            finally:
+                stop_server(server)
+            report_load(label, latencies, errors, args.duration)
+            print(f'{"":<26} {len(latencies) / args.duration / cores:>8.1f} '
+                  'req/s per core')
+
+
+if __name__ == '__main__':
+    main()
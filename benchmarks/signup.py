@@ -0,0 +1,81 @@
+"""
+Signups per second through UserRegisterView.
+
+Compares the batched onboarding receiver with the previous one, which
+created every group and category with its own INSERT. Passwords are hashed
+with MD5 so the numbers show database work rather than PBKDF2 rounds.
+"""
+import argparse
+
+from benchmarks.utils import setup, test_database, timer, report
+
+
+def legacy_onboarding(sender, instance, created, **kwargs):
+    """The onboarding receiver as it was before batching."""
+    from apps.core.models import Group, Category
+
+    if created:
+        for group_name in ['Skin care', 'Hair care', 'Body care', 'Makeup',
+                           'Other']:
+            group = Group.objects.create(name=group_name, user=instance)
+            if group_name != 'Other':
+                Category.objects.create(name='Other', group=group,
+                                        user=instance)
+
+
+def bench_signups(label, count, prefix):
+    from django.db import connection
+    from django.urls import reverse
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    url = reverse('user:user-register')
+    queries = []
+
+    def count_query(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count_query):
+        with timer() as elapsed:
+            for i in range(count):
+                res = client.post(url, {
+                    'username': f'{prefix}{i}',
+                    'email': f'{prefix}{i}@example.com',
+                    'password': 'Testpass123',
+                })
+                assert res.status_code == 201, res.data
+    report(label, count, elapsed[0], unit='signups')
+    print(f'{"":<40} {len(queries) / count:.1f} queries per signup')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--signups', type=int, default=1000)
+    args = parser.parse_args()
+
+    setup()
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.db.models.signals import post_save
+    from apps.product.signals import create_groups_and_categories_for_user
+
+    settings.PASSWORD_HASHERS = [
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+    ]
+    User = get_user_model()
+    with test_database():
+        post_save.disconnect(create_groups_and_categories_for_user,
+                             sender=User)
+        post_save.connect(legacy_onboarding, sender=User)
+        bench_signups('before: INSERT per group and category',
+                      args.signups, 'before')
+        post_save.disconnect(legacy_onboarding, sender=User)
+        post_save.connect(create_groups_and_categories_for_user,
+                          sender=User)
+        bench_signups('after: bulk_create in one transaction',
+                      args.signups, 'after')
+
+
+if __name__ == '__main__':
+    main()
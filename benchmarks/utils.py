@@ -0,0 +1,56 @@
+"""
+Helpers shared by the benchmark scripts.
+
+Benchmarks run against a throwaway test database created from the regular
+database settings, e.g.:
+
+    python -m benchmarks.product_import --rows 100000
+"""
+import contextlib
+import os
+import time
+
+import django
+
+
+def setup():
+    """Configure Django for a standalone script."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cosmetics_api.settings')
+    django.setup()
+
+
+@contextlib.contextmanager
+def test_database():
+    """Run the block against a freshly created test database."""
+    from django.db import connection
+    from django.test.utils import (
+        setup_test_environment,
+        teardown_test_environment,
+    )
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+@contextlib.contextmanager
+def timer():
+    """Measure the wall time of the block, available as `result[0]`."""
+    result = [0.0]
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result[0] = time.perf_counter() - start
+
+
+def report(label, count, seconds, unit='rows'):
+    """Print the throughput of a measured run."""
+    rate = count / seconds if seconds else float('inf')
+    print(f'{label:<40} {count:>9,} {unit} in {seconds:8.3f}s '
+          f'({rate:,.0f} {unit}/s)')
@@ -22,6 +22,12 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = os.environ.get('SECRET_KEY', 'very_secret_key')
 
+# Previous secret keys, comma separated, still accepted while rotating.
+SECRET_KEY_FALLBACKS = [
+    key for key in os.environ.get('SECRET_KEY_FALLBACKS', '').split(',')
+    if key
+]
+
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 
@@ -37,6 +43,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'drf_spectacular',
@@ -81,12 +88,39 @@ WSGI_APPLICATION = 'cosmetics_api.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': os.environ.get('DB_ENGINE',
+                                 'apps.core.db.postgresql_pool'),
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        # Keep connections open between requests, checked before reuse.
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        # Used by the pooled engine, which ignores CONN_MAX_AGE.
+        'POOL': {
+            'SIZE': int(os.environ.get('DB_POOL_SIZE', 5)),
+            'MAX_OVERFLOW': int(os.environ.get('DB_POOL_MAX_OVERFLOW', 10)),
+            'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            'MAX_IDLE': float(os.environ.get('DB_POOL_MAX_IDLE', 300)),
+        },
+    }
+}
 
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Use a shared backend (e.g. Redis) when running several processes, so
+# invalidations reach every worker. `serve` runs a single worker on the
+# local memory default.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
     }
 }
 
@@ -141,8 +175,52 @@ AUTH_USER_MODEL = 'core.User'
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        'apps.user.authentication.SignedTokenAuthentication',
         'rest_framework.authentication.TokenAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 20
 }
+
+# Lifetime in seconds of the signed tokens issued at login.
+SIGNED_TOKEN_MAX_AGE = int(os.environ.get('SIGNED_TOKEN_MAX_AGE',
+                                          60 * 60 * 24))
+# Seconds the user snapshot checked by signed tokens is cached. Bounds how
+# long a revoked token is accepted by a worker with a cache of its own.
+SIGNED_TOKEN_SNAPSHOT_TTL = int(os.environ.get('SIGNED_TOKEN_SNAPSHOT_TTL',
+                                               5))
+
+# Product image variants are created by a thread pool after the upload
+# commits, or before the request returns when eager.
+IMAGE_PROCESSING_WORKERS = int(os.environ.get('IMAGE_PROCESSING_WORKERS', 2))
+IMAGE_PROCESSING_EAGER = os.environ.get('IMAGE_PROCESSING_EAGER') == '1'
+
+# Seconds an unreferenced image blob is kept after its last upload, so an
+# upload of the same content still in flight can claim it.
+MEDIA_BLOB_GRACE = int(os.environ.get('MEDIA_BLOB_GRACE', 300))
+
+# Resumable image uploads expire after this many idle seconds.
+UPLOAD_SESSION_TTL = int(os.environ.get('UPLOAD_SESSION_TTL', 60 * 60 * 24))
+UPLOAD_MAX_SIZE = int(os.environ.get('UPLOAD_MAX_SIZE', 50 * 1024 * 1024))
+
+# Media files are handed to the front proxy with 'x-accel-redirect' (nginx,
+# below the internal location MEDIA_ACCEL_PREFIX) or 'x-sendfile' (Apache,
+# lighttpd). Left empty, Django streams them itself.
+MEDIA_ACCEL = os.environ.get('MEDIA_ACCEL', '')
+MEDIA_ACCEL_PREFIX = os.environ.get('MEDIA_ACCEL_PREFIX', '/protected-media/')
+MEDIA_CACHE_MAX_AGE = int(os.environ.get('MEDIA_CACHE_MAX_AGE', 60 * 60))
+
+# Most operations accepted by one request to the batch endpoint.
+BATCH_MAX_SIZE = int(os.environ.get('BATCH_MAX_SIZE', 100))
+
+# Most objects written by one bulk create, update or delete.
+BULK_MAX_SIZE = int(os.environ.get('BULK_MAX_SIZE', 1000))
+
+# Groups and their categories created for every new user.
+DEFAULT_TAXONOMY = {
+    'Skin care': ['Other'],
+    'Hair care': ['Other'],
+    'Body care': ['Other'],
+    'Makeup': ['Other'],
+    'Other': [],
+}
@@ -22,7 +22,8 @@ from django.contrib import admin
 from django.urls import path, include
 
 from django.conf import settings
-from django.conf.urls.static import static
+
+from apps.core.views import MediaView
 
 
 urlpatterns = [
@@ -34,11 +35,11 @@ urlpatterns = [
         name='api-docs',
     ),
     path('api/account/', include('apps.user.urls')),
-    path('api/product/', include('apps.product.urls'))
+    path('api/product/', include('apps.product.urls')),
+    path('api/metrics/', include('apps.core.urls')),
+    path(
+        f'{settings.MEDIA_URL.lstrip("/")}<path:name>',
+        MediaView.as_view(),
+        name='media',
+    ),
 ]
-
-if settings.DEBUG:
-    urlpatterns += static(
-        settings.MEDIA_URL,
-        document_root=settings.MEDIA_ROOT
-    )